@@ -0,0 +1,58 @@
+# benchmarks/compare.py
+#
+# python -m benchmarks.compare base.json head.json [--threshold 0.2]
+# Prints the change in seconds per benchmark and exits 1 when any benchmark
+# slowed down by more than the threshold.
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+Key = Tuple[str, int]
+
+
+def load_results(path: Path) -> Dict[Key, Dict[str, Any]]:
+    report = json.loads(path.read_text(encoding="utf-8"))
+    return {(r["name"], r["size"]): r for r in report["results"]}
+
+
+def compare(
+    base: Dict[Key, Dict[str, Any]], head: Dict[Key, Dict[str, Any]], threshold: float
+) -> Tuple[List[str], List[Key]]:
+    lines = [f"{'benchmark':<34} {'size':>9} {'base':>9} {'head':>9} {'change':>8}"]
+    regressions: List[Key] = []
+    for key in sorted(base.keys() & head.keys()):
+        before, after = base[key]["seconds"], head[key]["seconds"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  ⚠️"
+        lines.append(
+            f"{key[0]:<34} {key[1]:>9} {before:>8.3f}s {after:>8.3f}s {change:>+7.1%}{flag}"
+        )
+    return lines, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.compare")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    lines, regressions = compare(
+        load_results(args.base), load_results(args.head), args.threshold
+    )
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
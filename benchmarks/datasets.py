@@ -0,0 +1,69 @@
+# benchmarks/datasets.py
+#
+# Deterministic synthetic sheet data. Rows use the prettified column titles,
+# exactly like get_all_records() / values_to_records() return them.
+import random
+from typing import Any, Dict, Iterator, List
+
+INDUSTRIES = ["Fintech", "MedTech", "SaaS", "Security", "AI", "DevTools", "Climate"]
+TAGS = ["AI", "B2B", "Cloud", "Compliance", "Data", "Infra", "Open Source", "Payments"]
+ROLES = ["CTO", "VP Engineering", "Head of AI", "Developer Advocate", "Recruiter"]
+
+PROCESSED_COMPANIES_HEADER = [
+    "Company",
+    "Summary",
+    "Tags",
+    "Industry",
+    "Ideal Roles",
+    "Website Url",
+    "Company Processed",
+]
+
+
+def company_name(i: int) -> str:
+    return f"Company {i:07d}"
+
+
+def iter_company_values(n: int, seed: int = 0, processed_ratio: float = 0.0) -> Iterator[List[Any]]:
+    rng = random.Random(seed)
+    for i in range(n):
+        yield [
+            company_name(i),
+            f"Builds {rng.choice(TAGS).lower()} tooling for {rng.choice(INDUSTRIES).lower()} teams",
+            ", ".join(rng.sample(TAGS, 3)),
+            rng.choice(INDUSTRIES),
+            ", ".join(rng.sample(ROLES, 2)),
+            f"https://company{i}.example",
+            "TRUE" if rng.random() < processed_ratio else "FALSE",
+        ]
+
+
+def generate_company_rows(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    return [
+        dict(zip(PROCESSED_COMPANIES_HEADER, values))
+        for values in iter_company_values(n, seed)
+    ]
+
+
+def generate_company_values(n: int, seed: int = 0) -> List[List[Any]]:
+    # Worksheet grid for the fake gspread backend: header row first
+    return [PROCESSED_COMPANIES_HEADER] + list(iter_company_values(n, seed))
+
+
+def mutate_rows(
+    rows: List[Dict[str, Any]], fraction: float, seed: int = 1
+) -> List[Dict[str, Any]]:
+    # Copy of the sheet with `fraction` of the rows edited, for delta runs
+    rng = random.Random(seed)
+    changed = set(rng.sample(range(len(rows)), int(len(rows) * fraction)))
+    return [
+        {**row, "Summary": row["Summary"] + " (updated)"} if i in changed else row
+        for i, row in enumerate(rows)
+    ]
+
+
+def generate_research_values(n: int, seed: int = 0) -> List[List[Any]]:
+    rng = random.Random(seed)
+    return [["Company", "Company Info", "Contact Info"]] + [
+        [company_name(i), f"Founded {rng.randint(1990, 2024)}", ""] for i in range(n)
+    ]
@@ -0,0 +1,126 @@
+# benchmarks/fake_openai.py
+#
+# In-process stand-in for the OpenAI chat completions endpoint. Runs on a
+# local port in a background thread, sleeps `latency` per request and
+# answers a configurable fraction of requests with 429 + Retry-After.
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+
+def enriched_payload(prompt: str) -> Dict[str, Any]:
+    return {
+        "summary": "Synthetic summary",
+        "product": "Synthetic product",
+        "tags": ["AI", "Infra"],
+        "investors": ["Fund I"],
+        "ideal_roles": "CTO",
+        "recent_news": "",
+        "tone_advice": "Technical and warm",
+        "alignment_reason": "",
+        "suggested_opener": "",
+        "funding_stage": "Seed",
+        "technologies_used": "Go, DuckDB",
+        "website_url": "https://example.com",
+        "industry": "SaaS",
+        "linkedin_company_url": "",
+        "linkedin_search_links": [],
+    }
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Dict[str, str]) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self) -> None:
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(server.latency)
+                with server._lock:
+                    server.requests += 1
+                    throttle = server.rng.random() < server.error_rate
+                    if throttle:
+                        server.throttled += 1
+                if throttle:
+                    self._send(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                        {"retry-after-ms": "10"},
+                    )
+                    return
+                self._send(200, server.completion(request), {})
+
+        return Handler
+
+    def completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = request["messages"][-1]["content"]
+        if request.get("response_format") or "Return a JSON object" in prompt:
+            content = json.dumps(enriched_payload(prompt))
+        else:
+            content = f"Synthetic answer to: {prompt[:80]}"
+        prompt_tokens = sum(len(m.get("content") or "") for m in request["messages"]) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
@@ -0,0 +1,300 @@
+# benchmarks/run.py
+#
+# Offline benchmark suite: python -m benchmarks.run [--sizes 1000,10000]
+#
+# Every benchmark runs against a fresh DuckDB file in a temporary directory,
+# a fake gspread backend and an in-process fake OpenAI server, so nothing
+# touches ~/.scout, Google or OpenAI. Results are written as JSON (one file
+# per commit by default) for benchmarks/compare.py.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import duckdb  # noqa: E402
+from openai import AsyncOpenAI, OpenAI  # noqa: E402
+
+from benchmarks.datasets import (  # noqa: E402
+    generate_company_rows,
+    generate_company_values,
+    generate_research_values,
+    mutate_rows,
+)
+from benchmarks.fake_openai import FakeOpenAIServer  # noqa: E402
+from src import main as sheets_sync  # noqa: E402
+from src.clients import gsuite, llm_cache, ratelimit  # noqa: E402
+from src.clients import openai as enrichment  # noqa: E402
+from src.db import connection, insert, telemetry  # noqa: E402
+from src.db.init import init_tables  # noqa: E402
+from tests.fake_gspread import FakeGspreadClient  # noqa: E402
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+TABLE = "processed_companies"
+
+Result = Dict[str, Any]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - started, value
+
+
+def result(name: str, size: int, seconds: float, **extra: Any) -> Result:
+    return {
+        "name": name,
+        "size": size,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(size / seconds, 1) if seconds > 0 else None,
+        "max_rss_mb": max_rss_mb(),
+        **extra,
+    }
+
+
+@contextmanager
+def isolated_db(workdir: Path, name: str) -> Iterator[duckdb.DuckDBPyConnection]:
+    path = workdir / f"{name}.db"
+    connection.configure(path)
+    previous_cache = llm_cache._cache
+    previous_limiter = ratelimit._limiter
+    previous_telemetry = telemetry._telemetry
+    # Lookups are bypassed so every enrichment run really hits the fake server
+    llm_cache._cache = llm_cache.LLMCache(path=workdir / f"{name}-llm.db", bypass=True)
+    ratelimit._limiter = ratelimit.RateLimiter(
+        requests_per_minute=1e9, tokens_per_minute=1e12, backoff_base=0.01
+    )
+    telemetry._telemetry = telemetry.Telemetry()
+    try:
+        init_tables()
+        yield connection.get_cursor()
+    finally:
+        telemetry._telemetry.close()
+        telemetry._telemetry = previous_telemetry
+        llm_cache._cache.close()
+        llm_cache._cache = previous_cache
+        ratelimit._limiter = previous_limiter
+        connection.configure()
+        for leftover in workdir.glob(f"{name}*"):
+            leftover.unlink()
+
+
+def bench_insert_into_table(workdir: Path, size: int) -> List[Result]:
+    rows = generate_company_rows(size)
+    with isolated_db(workdir, f"insert-{size}") as con:
+        seconds, _ = timed(lambda: insert.insert_into_table(TABLE, rows))
+        (count,) = con.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()  # type: ignore
+    return [result("insert_into_table", size, seconds, rows_written=count)]
+
+
+def bench_sync_table(workdir: Path, size: int, changed_fraction: float) -> List[Result]:
+    rows = generate_company_rows(size)
+    changed = mutate_rows(rows, changed_fraction)
+    results: List[Result] = []
+    with isolated_db(workdir, f"sync-{size}"):
+        for name, incoming in [
+            ("sync_table_initial", rows),
+            ("sync_table_unchanged", rows),
+            ("sync_table_delta", changed),
+        ]:
+            with mock.patch.object(insert, "get_incoming_for_table", lambda _, r=incoming: r):
+                seconds, counts = timed(lambda: insert.sync_table(TABLE))
+            results.append(result(name, size, seconds, **counts))
+
+        existing = insert.fetch_existing_rows(TABLE, "company")
+        fields = insert.get_comparison_fields_for_table(TABLE)
+        seconds, (to_insert, to_delete) = timed(
+            lambda: insert.compute_delta_rows(existing, rows, "Company", fields)
+        )
+        results.append(
+            result(
+                "compute_delta_rows",
+                size,
+                seconds,
+                to_insert=len(to_insert),
+                to_delete=len(to_delete),
+            )
+        )
+    return results
+
+
+def bench_sheets_sync(workdir: Path, size: int, page_size: int) -> List[Result]:
+    client = FakeGspreadClient(
+        {
+            gsuite.get_processed_companies_sheet_name(): generate_company_values(size),
+            gsuite.get_company_research_sheet_name(): generate_research_values(size),
+        }
+    )
+    with isolated_db(workdir, f"sheets-{size}"), mock.patch.dict(
+        os.environ, {"SHEET_URL": "https://sheets.example/d/bench"}
+    ), mock.patch.object(gsuite, "load_gcp_settings", lambda: ""), mock.patch.object(
+        gsuite, "_session", gsuite.SheetsSession(lambda: client)
+    ):
+        seconds, counts = timed(
+            lambda: sheets_sync.sync_google_sheets_to_duckdb(page_size=page_size)
+        )
+        noop_seconds, _ = timed(sheets_sync.sync_google_sheets_to_duckdb)
+    inserted = sum(c["inserted"] for c in counts.values())
+    return [
+        result("sync_google_sheets", size, seconds, rows_written=inserted, requests=dict(client.calls)),
+        result("sync_google_sheets_unchanged", size, noop_seconds),
+    ]
+
+
+def bench_enrichment(
+    workdir: Path,
+    companies: int,
+    mode: str,
+    latency: float,
+    error_rate: float,
+) -> List[Result]:
+    with FakeOpenAIServer(latency=latency, error_rate=error_rate) as server, isolated_db(
+        workdir, f"enrich-{mode}-{companies}"
+    ) as con:
+        con.execute(
+            f"INSERT INTO {TABLE} (company) SELECT printf('Company %07d', i) FROM range(?) t(i)",
+            [companies],
+        )
+        with mock.patch.object(
+            enrichment, "_client", OpenAI(base_url=server.base_url, max_retries=0)
+        ), mock.patch.object(
+            enrichment, "_async_client", AsyncOpenAI(base_url=server.base_url, max_retries=0)
+        ):
+            if mode == "sequential":
+                run: Callable[[], Any] = enrichment.run_enrichment_pipeline
+            else:
+                structured = mode == "structured"
+                run = lambda: asyncio.run(  # noqa: E731
+                    enrichment.run_enrichment_pipeline_async(structured=structured)
+                )
+            seconds, _ = timed(run)
+        (processed,) = con.execute(
+            f"SELECT COUNT(*) FROM {TABLE} WHERE company_processed"
+        ).fetchone()  # type: ignore
+    return [
+        result(
+            f"run_enrichment_pipeline_{mode}",
+            companies,
+            seconds,
+            processed=processed,
+            requests=server.requests,
+            throttled=server.throttled,
+            latency_ms=latency * 1000,
+            error_rate=error_rate,
+        )
+    ]
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory(prefix="scout-bench-") as tmp:
+        workdir = Path(tmp)
+        for size in args.sizes:
+            print(f"▶ sheet benchmarks at {size} rows", file=sys.stderr)
+            results += bench_insert_into_table(workdir, size)
+            results += bench_sync_table(workdir, size, args.changed_fraction)
+            results += bench_sheets_sync(workdir, size, args.page_size)
+        for mode in args.enrich_modes:
+            companies = (
+                args.sequential_companies if mode == "sequential" else args.enrich_companies
+            )
+            if companies <= 0:
+                continue
+            print(f"▶ enrichment ({mode}) on {companies} companies", file=sys.stderr)
+            results += bench_enrichment(
+                workdir, companies, mode, args.latency_ms / 1000, args.error_rate
+            )
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "duckdb": duckdb.__version__,
+        "platform": platform.platform(),
+        "params": {
+            "sizes": args.sizes,
+            "changed_fraction": args.changed_fraction,
+            "page_size": args.page_size,
+            "enrich_companies": args.enrich_companies,
+            "sequential_companies": args.sequential_companies,
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+        },
+        "results": results,
+    }
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(float(v)) for v in value.split(",") if v]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.run", description="Offline Scout benchmark suite"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=[1_000, 10_000, 100_000],
+        help="Comma-separated sheet sizes, up to 1e6",
+    )
+    parser.add_argument("--changed-fraction", type=float, default=0.1)
+    parser.add_argument("--page-size", type=int, default=gsuite.SHEETS_PAGE_SIZE)
+    parser.add_argument("--enrich-companies", type=int, default=200)
+    parser.add_argument("--sequential-companies", type=int, default=10)
+    parser.add_argument(
+        "--enrich-modes",
+        type=lambda v: v.split(","),
+        default=["async", "structured", "sequential"],
+    )
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--output", type=Path, help="Default: benchmarks/results/<commit>.json")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run_suite(args)
+    output = args.output or RESULTS_DIR / f"{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    for r in report["results"]:
+        print(f"{r['name']:<34} {r['size']:>9} {r['seconds']:>10.3f}s")
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+# src/cli.py
+#
+# Entry point for every pipeline stage: `python -m src.cli <command>`.
+# Stage modules (and with them OpenAI, gspread, DuckDB and pyarrow) are only
+# imported inside the command that needs them, so `--help` and unrelated
+# commands start instantly and don't require unrelated secrets.
+import argparse
+import sys
+from typing import Callable, List, Optional
+
+
+def cmd_init(args: argparse.Namespace) -> int:
+    from src.db.init import init_tables
+
+    init_tables()
+    return 0
+
+
+def cmd_sync(args: argparse.Namespace) -> int:
+    from src.db.init import init_tables
+    from src.main import sync_google_sheets_to_duckdb
+
+    init_tables()
+    sync_google_sheets_to_duckdb(force=args.force)
+    return 0
+
+
+def cmd_enrich(args: argparse.Namespace) -> int:
+    from src.clients import llm_cache
+    from src.clients import openai as enrichment
+    from src.db.init import init_tables
+
+    init_tables()
+    if args.no_cache:
+        llm_cache.get_llm_cache().bypass = True
+
+    structured = args.prompt == "structured"
+    if structured and args.mode == "batch":
+        print("--prompt structured is not supported in batch mode", file=sys.stderr)
+        return 2
+
+    if args.mode == "sequential":
+        enrichment.run_enrichment_pipeline(structured=structured)
+    elif args.mode == "workers":
+        from src.clients import workers
+
+        workers.run_enrichment_workers(
+            workers=args.workers or workers.ENRICHMENT_WORKERS,
+            structured=structured,
+            retry_failed=args.retry_failed,
+        )
+    elif args.mode == "batch":
+        from src.clients import openai_batch
+
+        openai_batch.run_batch_enrichment_pipeline(
+            local=args.local,
+            poll_interval=openai_batch.BATCH_POLL_INTERVAL
+            if args.poll_interval is None
+            else args.poll_interval,
+        )
+    else:
+        enrichment.run_concurrent_enrichment_pipeline(
+            max_concurrent_companies=args.max_companies
+            or enrichment.MAX_CONCURRENT_COMPANIES,
+            max_inflight_requests=args.max_requests
+            or enrichment.MAX_INFLIGHT_REQUESTS,
+            structured=structured,
+        )
+    return 0
+
+
+def cmd_refresh(args: argparse.Namespace) -> int:
+    import json
+
+    from src.db import freshness
+    from src.db.connection import get_cursor
+    from src.db.init import init_tables
+
+    init_tables()
+    if args.dry_run:
+        con = get_cursor()
+        budget = freshness.REFRESH_DAILY_CALL_BUDGET if args.budget is None else args.budget
+        plan = freshness.plan_refresh(con, budget - freshness.refresh_calls_spent(con))
+        if args.json:
+            print(json.dumps(plan, indent=2))
+        else:
+            for item in plan:
+                print(
+                    f"{item['company']}: {', '.join(item['topics'])} "
+                    f"({item['calls']} calls, priority {item['priority']})"
+                )
+            print(f"{len(plan)} companies, {sum(i['calls'] for i in plan)} calls")
+        return 0
+
+    from src.clients import refresh
+
+    refresh.run_refresh_pipeline(
+        budget=args.budget,
+        max_concurrent_companies=args.max_companies
+        or refresh.enrichment.MAX_CONCURRENT_COMPANIES,
+        max_inflight_requests=args.max_requests
+        or refresh.enrichment.MAX_INFLIGHT_REQUESTS,
+    )
+    return 0
+
+
+def cmd_aliases(args: argparse.Namespace) -> int:
+    import json
+
+    from src.db import canonical
+    from src.db.connection import transaction
+    from src.db.init import init_tables
+
+    init_tables()
+    with transaction() as con:
+        if args.split:
+            if not canonical.split_alias(con, args.split):
+                print(f"Unknown company: {args.split}", file=sys.stderr)
+                return 1
+            print(f"{args.split} is now its own company")
+            return 0
+        if args.merge:
+            alias, target = args.merge
+            if not canonical.merge_alias(con, alias, target):
+                print(f"Unknown company: {alias} or {target}", file=sys.stderr)
+                return 1
+            print(f"{alias} is now enriched as part of {target}")
+            return 0
+        groups = canonical.merged_groups(con, include_exact=args.all)
+    if args.json:
+        print(json.dumps(groups, indent=2))
+    else:
+        print(canonical.format_groups(groups))
+    return 0
+
+
+def cmd_contacts(args: argparse.Namespace) -> int:
+    from src.clients import contacts, llm_cache
+    from src.db.init import init_tables
+
+    init_tables()
+    if args.no_cache:
+        llm_cache.get_llm_cache().bypass = True
+    contacts.run_contact_discovery(
+        max_concurrent_companies=args.max_companies
+        or contacts.MAX_CONCURRENT_COMPANIES,
+        max_inflight_requests=args.max_requests or contacts.MAX_INFLIGHT_REQUESTS,
+        rediscover=args.rediscover,
+    )
+    return 0
+
+
+def cmd_drafts(args: argparse.Namespace) -> int:
+    from src.clients import drafts, llm_cache
+    from src.db.init import init_tables
+
+    init_tables()
+    # A redraft wants a fresh completion, not the cached previous one
+    if args.no_cache or args.redraft:
+        llm_cache.get_llm_cache().bypass = True
+    drafts.run_draft_generation(
+        max_concurrent_contacts=args.max_contacts or drafts.MAX_CONCURRENT_CONTACTS,
+        max_inflight_requests=args.max_requests or drafts.MAX_INFLIGHT_REQUESTS,
+        intent=args.intent,
+        redraft=args.redraft,
+    )
+    return 0
+
+
+def cmd_send(args: argparse.Namespace) -> int:
+    from src.clients import mailer
+    from src.db.init import init_tables
+
+    init_tables()
+    pacer = mailer.SendPacer(
+        per_minute=mailer.SEND_RATE_PER_MINUTE if args.rate is None else args.rate,
+        domain_per_minute=mailer.SEND_DOMAIN_RATE_PER_MINUTE
+        if args.domain_rate is None
+        else args.domain_rate,
+    )
+    mailer.run_email_sending(
+        limit=args.limit,
+        batch_size=args.batch_size or mailer.SEND_BATCH_SIZE,
+        pool_size=args.pool_size or mailer.SMTP_POOL_SIZE,
+        pacer=pacer,
+        resend_unconfirmed=args.resend_unconfirmed,
+    )
+    return 0
+
+
+def cmd_replies(args: argparse.Namespace) -> int:
+    from src.clients import inbox
+    from src.db.init import init_tables
+
+    init_tables()
+    inbox.run_reply_import(
+        args.path,
+        batch_size=args.batch_size or inbox.REPLY_IMPORT_BATCH_SIZE,
+        full=args.full,
+    )
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    from src.db.init import init_tables
+    from src.export import run_export
+
+    init_tables()
+    run_export(
+        args.out_dir,
+        fmt=args.format,
+        partition_by=args.partition_by,
+        tables=args.tables,
+        graph=not args.no_html,
+    )
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    from src.db.init import init_tables
+    from src.db.summary import refresh_summaries
+    from src.report import build_report, render_report
+
+    init_tables()
+    refresh_summaries(full_refresh=args.full_refresh)
+    output = render_report(build_report(top_tags=args.top_tags), args.format)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    import json
+
+    from src.db.init import init_tables
+    from src.db.telemetry import format_summary, get_telemetry, summarize
+
+    init_tables()
+    get_telemetry().flush()
+    summary = summarize(since_hours=args.since)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    import json
+
+    from src.clients import enrichment_compare
+
+    companies = args.companies or enrichment_compare.sample_companies(args.sample)
+    if not companies:
+        print("No companies to compare", file=sys.stderr)
+        return 1
+    report = enrichment_compare.compare_enrichment_modes(companies)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(enrichment_compare.format_report(report))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="scout", description="Personal outreach intelligence pipeline"
+    )
+    parser.add_argument(
+        "--db", help="Path to the DuckDB database (default: ~/.scout/scout.db)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="Create or migrate the DuckDB tables")
+    init.set_defaults(handler=cmd_init)
+
+    sync = commands.add_parser("sync", help="Sync Google Sheets into DuckDB")
+    sync.add_argument(
+        "--force", action="store_true", help="Sync even if the sheet looks unchanged"
+    )
+    sync.set_defaults(handler=cmd_sync)
+
+    enrich = commands.add_parser("enrich", help="Enrich unprocessed companies")
+    enrich.add_argument(
+        "--mode", choices=["async", "sequential", "batch", "workers"], default="async"
+    )
+    enrich.add_argument(
+        "--prompt",
+        choices=["two-stage", "structured"],
+        default="two-stage",
+        help="Six questions + synthesis, or one structured JSON-schema call",
+    )
+    enrich.add_argument("--max-companies", type=int, help="Companies enriched at once")
+    enrich.add_argument("--max-requests", type=int, help="OpenAI requests in flight")
+    enrich.add_argument(
+        "--no-cache", action="store_true", help="Ignore cached LLM responses"
+    )
+    enrich.add_argument(
+        "--workers", type=int, help="Workers mode: worker processes (default: CPU count)"
+    )
+    enrich.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Workers mode: re-queue jobs that used up their attempts",
+    )
+    enrich.add_argument(
+        "--local",
+        action="store_true",
+        help="Batch mode: run the JSONL requests locally instead of the Batch API",
+    )
+    enrich.add_argument(
+        "--poll-interval",
+        type=float,
+        help="Batch mode: seconds between batch status checks "
+        "(default: ENRICHMENT_BATCH_POLL_INTERVAL)",
+    )
+    enrich.set_defaults(handler=cmd_enrich)
+
+    refresh = commands.add_parser(
+        "refresh", help="Re-ask the stale questions of enriched companies"
+    )
+    refresh.add_argument(
+        "--budget",
+        type=int,
+        help="API calls per day (default: REFRESH_DAILY_CALL_BUDGET)",
+    )
+    refresh.add_argument(
+        "--dry-run", action="store_true", help="List what would be refreshed, in order"
+    )
+    refresh.add_argument("--json", action="store_true", help="Print the plan as JSON")
+    refresh.add_argument("--max-companies", type=int, help="Companies refreshed at once")
+    refresh.add_argument("--max-requests", type=int, help="OpenAI requests in flight")
+    refresh.set_defaults(handler=cmd_refresh)
+
+    aliases = commands.add_parser(
+        "aliases", help="Review company names grouped under one canonical company"
+    )
+    aliases.add_argument(
+        "--all", action="store_true", help="Also list groups of identical keys"
+    )
+    aliases.add_argument("--json", action="store_true", help="Print the groups as JSON")
+    aliases.add_argument(
+        "--split", metavar="NAME", help="Enrich NAME as a company of its own"
+    )
+    aliases.add_argument(
+        "--merge",
+        nargs=2,
+        metavar=("NAME", "INTO"),
+        help="Enrich NAME as part of the company INTO",
+    )
+    aliases.set_defaults(handler=cmd_aliases)
+
+    contacts = commands.add_parser(
+        "contacts", help="Discover contacts for enriched companies"
+    )
+    contacts.add_argument("--max-companies", type=int, help="Companies searched at once")
+    contacts.add_argument("--max-requests", type=int, help="OpenAI requests in flight")
+    contacts.add_argument(
+        "--no-cache", action="store_true", help="Ignore cached LLM responses"
+    )
+    contacts.add_argument(
+        "--rediscover",
+        action="store_true",
+        help="Also search companies that already went through discovery",
+    )
+    contacts.set_defaults(handler=cmd_contacts)
+
+    drafts = commands.add_parser("drafts", help="Generate email drafts for contacts")
+    drafts.add_argument("--max-contacts", type=int, help="Contacts drafted at once")
+    drafts.add_argument("--max-requests", type=int, help="OpenAI requests in flight")
+    drafts.add_argument("--intent", default="networking", help="Stored on each draft")
+    drafts.add_argument(
+        "--no-cache", action="store_true", help="Ignore cached LLM responses"
+    )
+    drafts.add_argument(
+        "--redraft",
+        action="store_true",
+        help="Also draft contacts that already have one (adds a new version)",
+    )
+    drafts.set_defaults(handler=cmd_drafts)
+
+    send = commands.add_parser("send", help="Send approved drafts that are due")
+    send.add_argument("--limit", type=int, help="Send at most N drafts this run")
+    send.add_argument("--batch-size", type=int, help="Drafts claimed per batch")
+    send.add_argument("--pool-size", type=int, help="SMTP connections (and threads)")
+    send.add_argument("--rate", type=float, help="Emails per minute overall (0: no limit)")
+    send.add_argument(
+        "--domain-rate", type=float, help="Emails per minute per recipient domain"
+    )
+    send.add_argument(
+        "--resend-unconfirmed",
+        action="store_true",
+        help="Re-queue drafts whose send was interrupted (they may go out twice)",
+    )
+    send.set_defaults(handler=cmd_send)
+
+    replies = commands.add_parser(
+        "replies", help="Import replies from an mbox file or Maildir into replies_log"
+    )
+    replies.add_argument("path", help="mbox file or Maildir directory")
+    replies.add_argument("--batch-size", type=int, help="Messages written per batch")
+    replies.add_argument(
+        "--full",
+        action="store_true",
+        help="Read the whole mailbox again (already imported replies are skipped)",
+    )
+    replies.set_defaults(handler=cmd_replies)
+
+    export = commands.add_parser(
+        "export", help="Export the outreach tables (Parquet/CSV) and an HTML outreach graph"
+    )
+    export.add_argument("out_dir", help="Directory to write to")
+    export.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    export.add_argument(
+        "--partition-by",
+        choices=["company", "date"],
+        help="One directory per company or per day (hive-style)",
+    )
+    export.add_argument(
+        "--tables",
+        nargs="+",
+        choices=[
+            "processed_companies",
+            "company_contacts",
+            "email_drafts",
+            "send_log",
+            "replies_log",
+        ],
+        help="Only these tables (default: all)",
+    )
+    export.add_argument(
+        "--no-html", action="store_true", help="Skip the HTML outreach graph"
+    )
+    export.set_defaults(handler=cmd_export)
+
+    report = commands.add_parser("report", help="Pipeline dashboard")
+    report.add_argument(
+        "--format", choices=["text", "json", "html"], default="text"
+    )
+    report.add_argument("--output", help="Write the report to a file")
+    report.add_argument("--top-tags", type=int, default=10)
+    report.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Rebuild the summary tables instead of updating them incrementally",
+    )
+    report.set_defaults(handler=cmd_report)
+
+    stats = commands.add_parser(
+        "stats", help="Latency percentiles, retries and cost per API call and stage"
+    )
+    stats.add_argument(
+        "--since", type=float, help="Only include the last N hours (default: all)"
+    )
+    stats.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    stats.set_defaults(handler=cmd_stats)
+
+    compare = commands.add_parser(
+        "compare", help="Compare two-stage and structured enrichment (no writes)"
+    )
+    compare.add_argument("companies", nargs="*", help="Companies to enrich")
+    compare.add_argument(
+        "--sample", type=int, default=5, help="Companies taken from the DB if none given"
+    )
+    compare.add_argument("--json", action="store_true", help="Print the report as JSON")
+    compare.set_defaults(handler=cmd_compare)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.db:
+        from src.db import connection
+
+        connection.configure(args.db)
+    handler: Callable[[argparse.Namespace], int] = args.handler
+    return handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
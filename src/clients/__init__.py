@@ -1,2 +1,13 @@
 # src/clients/__init__.py
-from .gsuite import get_gsheet_client, get_processed_companies # type: ignore
+from typing import Any
+
+# Re-exported lazily so importing one client doesn't pull in gspread
+_GSUITE_EXPORTS = {"get_gsheet_client", "get_processed_companies"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _GSUITE_EXPORTS:
+        from . import gsuite
+
+        return getattr(gsuite, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
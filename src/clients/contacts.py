@@ -0,0 +1,237 @@
+# src/clients/contacts.py
+#
+# Step 4: contact discovery. Enriched companies are read in one query, the
+# contact prompt runs concurrently through the shared rate limiter and LLM
+# cache, and validated people are deduped (by email and LinkedIn URL, within
+# the run and against company_contacts) before batched upserts.
+import asyncio
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
+
+from src.clients import openai as enrichment
+from src.clients.llm_cache import get_llm_cache
+from src.clients.ratelimit import AdaptiveConcurrency, get_rate_limiter
+from src.common.models import Contact
+from src.common.utils import strip_code_fence
+from src.db.canonical import not_alias_sql
+from src.db.connection import get_cursor
+from src.db.contacts import ContactWriter, load_known_linkedin_urls
+from src.db.errors import log_api_error
+from src.db.writer import run_pipeline
+from src.log import SAMPLED, get_logger
+
+logger = get_logger("contacts")
+
+CONTACT_TEMPERATURE = 0.3
+MAX_CONCURRENT_COMPANIES = int(os.getenv("CONTACTS_MAX_CONCURRENT_COMPANIES", 16))
+MAX_INFLIGHT_REQUESTS = int(os.getenv("CONTACTS_MAX_INFLIGHT_REQUESTS", 24))
+FETCH_SIZE = 1000
+
+DEFAULT_ROLES = (
+    "CTO, VP Engineering, Head of AI/Privacy, Technical Recruiter, Developer Advocate"
+)
+
+CONTACT_PROMPT_TEMPLATE = """
+You are helping a researcher identify contacts at the company "{company}".
+Find people in the following roles: {roles}.
+
+For each person, provide:
+
+- Full name
+- Role or title
+- Contact email (if public or guessable)
+- LinkedIn URL (if available)
+- A short note about why they are relevant for outreach
+
+Return your result in structured JSON:
+[
+  {{
+    "name": "Jane Doe",
+    "role": "Head of Engineering",
+    "email": "jane.doe@company.com",
+    "linkedin": "https://linkedin.com/in/janedoe",
+    "note": "Oversees backend hiring"
+  }}
+]
+"""
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def build_contact_prompt(company: str, ideal_roles: Optional[str] = None) -> str:
+    return CONTACT_PROMPT_TEMPLATE.format(
+        company=company, roles=(ideal_roles or "").strip() or DEFAULT_ROLES
+    )
+
+
+def normalize_email(value: Any) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    email = value.strip().lower().removeprefix("mailto:")
+    return email if EMAIL_PATTERN.match(email) else None
+
+
+def normalize_linkedin_url(value: Any) -> Optional[str]:
+    # https://www.LinkedIn.com/in/Jane-Doe/?trk=x -> https://linkedin.com/in/jane-doe
+    if not isinstance(value, str) or "linkedin.com/" not in value.lower():
+        return None
+    url = value.strip()
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/").lower()
+    if not host.endswith("linkedin.com") or not path:
+        return None
+    return f"https://linkedin.com{path}"
+
+
+def _text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def parse_contacts(company: str, content: object) -> List[Contact]:
+    # The answer must be a JSON list; individual entries without a usable
+    # email are dropped since contact_email is the primary key.
+    if not isinstance(content, str):
+        raise ValueError("OpenAI response content is not a string")
+    data = json.loads(strip_code_fence(content))
+    if isinstance(data, dict) and isinstance(data.get("contacts"), list):
+        data = data["contacts"]
+    if not isinstance(data, list):
+        raise ValueError("Contact discovery did not return a JSON list")
+
+    contacts: List[Contact] = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        email = normalize_email(item.get("email"))
+        name = _text(item.get("name"))
+        if not email or not name:
+            continue
+        contacts.append(
+            Contact(
+                company=company,
+                contact_name=name,
+                contact_email=email,
+                contact_linkedin_url=normalize_linkedin_url(item.get("linkedin")),
+                title=_text(item.get("role") or item.get("title")),
+                note=_text(item.get("note")),
+            )
+        )
+    return contacts
+
+
+class ContactDeduper:
+    # Seeded from company_contacts. An email already stored is kept (the
+    # upsert refreshes it); an email seen earlier in this run, or a LinkedIn
+    # profile already owned by a different email, is the same person again.
+    def __init__(self, linkedin: Dict[str, str]):
+        self.linkedin = linkedin
+        self.seen: Set[str] = set()
+        self.duplicates = 0
+
+    def filter(self, contacts: List[Contact]) -> List[Contact]:
+        unique: List[Contact] = []
+        for contact in contacts:
+            email = contact["contact_email"]
+            url = contact["contact_linkedin_url"]
+            owner = self.linkedin.get(url) if url else None
+            if email in self.seen or (owner is not None and owner != email):
+                self.duplicates += 1
+                continue
+            self.seen.add(email)
+            if url:
+                self.linkedin[url] = email
+            unique.append(contact)
+        return unique
+
+
+def get_companies_for_discovery(rediscover: bool = False) -> List[Tuple[str, Optional[str]]]:
+    # Aliases share their canonical company's contacts
+    query = f"""
+        SELECT company, ideal_roles FROM processed_companies p
+        WHERE company_processed = TRUE AND {not_alias_sql("p.company")}
+    """
+    if not rediscover:
+        query += " AND contacts_discovered_at IS NULL"
+    cursor = get_cursor().execute(query + " ORDER BY company")
+    companies: List[Tuple[str, Optional[str]]] = []
+    while rows := cursor.fetchmany(FETCH_SIZE):
+        companies.extend(rows)
+    return companies
+
+
+async def discover_contacts_async(
+    company: str, ideal_roles: Optional[str], request_slots: AdaptiveConcurrency
+) -> List[Contact]:
+    content = await enrichment.chat_completion_async(
+        enrichment.synthesis_messages(build_contact_prompt(company, ideal_roles)),
+        CONTACT_TEMPERATURE,
+        request_slots,
+        expect_json=True,
+        operation="contacts",
+    )
+    return parse_contacts(company, content)
+
+
+async def run_contact_discovery_async(
+    max_concurrent_companies: int = MAX_CONCURRENT_COMPANIES,
+    max_inflight_requests: int = MAX_INFLIGHT_REQUESTS,
+    rediscover: bool = False,
+) -> int:
+    companies = get_companies_for_discovery(rediscover)
+    if not companies:
+        logger.info("No companies pending contact discovery")
+        return 0
+
+    request_slots = AdaptiveConcurrency(max_inflight_requests)
+    writer = ContactWriter()
+    deduper = ContactDeduper(load_known_linkedin_urls())
+
+    async def discover(row: Tuple[str, Optional[str]]) -> List[Contact]:
+        return await discover_contacts_async(*row, request_slots)
+
+    # Runs in the pipeline's writer task, so dedupe never races on the seen-sets
+    def handle(
+        row: Tuple[str, Optional[str]], contacts: Union[List[Contact], Exception]
+    ) -> None:
+        company = row[0]
+        if isinstance(contacts, Exception):
+            # Not marked as discovered, so the next run retries it
+            log_api_error("contacts", contacts, company=company)
+            return
+        unique = deduper.filter(contacts)
+        writer.add(company, unique)
+        logger.info("👥 %s: %s contacts", company, len(unique), extra=SAMPLED)
+
+    workers = min(max_concurrent_companies, len(companies))
+    logger.info(
+        "Discovering contacts for %s companies with %s workers",
+        len(companies),
+        workers,
+    )
+    await run_pipeline(companies, discover, handle, writer, workers)
+    logger.info(
+        "[CONTACTS] %s contacts written, %s duplicates skipped",
+        writer.written,
+        deduper.duplicates,
+    )
+    logger.info("[CACHE] LLM cache stats: %s", get_llm_cache().stats())
+    logger.info("[RATE] %s throttled requests", get_rate_limiter().throttled)
+    return writer.written
+
+
+def run_contact_discovery(
+    max_concurrent_companies: int = MAX_CONCURRENT_COMPANIES,
+    max_inflight_requests: int = MAX_INFLIGHT_REQUESTS,
+    rediscover: bool = False,
+) -> int:
+    return asyncio.run(
+        run_contact_discovery_async(
+            max_concurrent_companies, max_inflight_requests, rediscover
+        )
+    )
@@ -0,0 +1,249 @@
+# src/clients/drafts.py
+#
+# Step 5: email drafts. Every pending contact's context (company, contact,
+# LinkedIn profile) comes from one joined query, the sender profile is read
+# and baked into the prompt template once per run, drafts are generated
+# concurrently, and results are bulk-inserted with versions assigned in SQL.
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from src.clients import openai as enrichment
+from src.clients.llm_cache import get_llm_cache
+from src.clients.ratelimit import AdaptiveConcurrency, get_rate_limiter
+from src.common.models import Draft
+from src.db.canonical import not_alias_sql
+from src.db.connection import get_cursor
+from src.db.drafts import DraftWriter
+from src.db.errors import log_api_error
+from src.db.writer import run_pipeline
+from src.log import get_logger
+
+logger = get_logger("drafts")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PROFILE_PATH = Path(os.getenv("SCOUT_PROFILE_PATH", str(PROJECT_ROOT / "meta" / "you.json")))
+
+DRAFT_TEMPERATURE = 0.6
+DEFAULT_INTENT = "networking"
+MAX_CONCURRENT_CONTACTS = int(os.getenv("DRAFTS_MAX_CONCURRENT_CONTACTS", 16))
+MAX_INFLIGHT_REQUESTS = int(os.getenv("DRAFTS_MAX_INFLIGHT_REQUESTS", 24))
+FETCH_SIZE = 1000
+
+DRAFT_PROMPT_TEMPLATE = """
+You're helping me write a short, respectful, and personalized cold email.
+
+Here's the context:
+
+📍 Company: {company}
+📋 Company summary: {summary}
+🛠️ Product: {product}
+🏷️ Tags: {tags}
+🎯 Alignment reason: {alignment_reason}
+🧠 Tone: {tone}
+🧑‍💼 Contact: {contact_name}, {title}
+🔗 Contact LinkedIn summary: {contact_profile}
+✍️ Reason for outreach: {note}
+
+💼 About me:
+{about_me}
+
+Now, write a cold email draft that:
+- Is brief (100-150 words)
+- Opens with personalization
+- Ends with an ask for a quick conversation or intro
+- Avoids sounding spam-like or generic
+
+Return the result as plain text.
+"""
+
+# Only canonical companies get contacts discovered and drafted, not aliases
+PENDING_CONTACTS_QUERY = f"""
+SELECT
+  c.company, c.contact_name, c.contact_email, c.title, c.note,
+  p.summary, p.product, p.tags, p.alignment_reason, p.tone_advice,
+  cp.linkedin_headline, cp.bio_summary, cp.focus_areas
+FROM company_contacts c
+JOIN processed_companies p ON p.company = c.company AND p.company_processed
+  AND {not_alias_sql("p.company")}
+LEFT JOIN contact_profiles cp ON cp.contact_email = c.contact_email
+{{where}}
+ORDER BY c.company, c.contact_email
+"""
+
+CONTEXT_FIELDS = [
+    "company",
+    "contact_name",
+    "contact_email",
+    "title",
+    "note",
+    "summary",
+    "product",
+    "tags",
+    "alignment_reason",
+    "tone_advice",
+    "linkedin_headline",
+    "bio_summary",
+    "focus_areas",
+]
+
+
+def load_profile(path: Path = PROFILE_PATH) -> Dict[str, Any]:
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_about_me(profile: Dict[str, Any]) -> str:
+    lines = []
+    if profile.get("title"):
+        lines.append(profile["title"])
+    resume = (profile.get("resume") or {}).get("blurb")
+    if resume:
+        lines.append(resume)
+    github = profile.get("github") or {}
+    if github.get("blurb"):
+        lines.append(github["blurb"])
+    if github.get("url"):
+        lines.append(f"GitHub: {github['url']}")
+    linkedin = profile.get("linkedin") or {}
+    if linkedin.get("url"):
+        lines.append(f"LinkedIn: {linkedin['url']}")
+    if profile.get("interests"):
+        lines.append("Interests: " + ", ".join(profile["interests"]))
+    return "\n".join(f"- {line}" for line in lines)
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value).strip()
+
+
+class DraftPrompt:
+    # Everything that depends only on the sender is rendered here once; the
+    # per-contact render is a single str.format over the remaining fields.
+    def __init__(self, profile: Dict[str, Any], template: str = DRAFT_PROMPT_TEMPLATE):
+        self.default_tone = profile.get("tone_preference") or "Respectful and warm"
+        about_me = format_about_me(profile).replace("{", "{{").replace("}", "}}")
+        self.template = template.replace("{about_me}", about_me)
+
+    def tone_for(self, context: Dict[str, Any]) -> str:
+        return _text(context.get("tone_advice")) or self.default_tone
+
+    def render(self, context: Dict[str, Any]) -> str:
+        contact_profile = " ".join(
+            part
+            for part in (
+                _text(context.get("linkedin_headline")),
+                _text(context.get("bio_summary")),
+                _text(context.get("focus_areas")),
+            )
+            if part
+        )
+        return self.template.format(
+            company=_text(context.get("company")),
+            summary=_text(context.get("summary")),
+            product=_text(context.get("product")),
+            tags=_text(context.get("tags")),
+            alignment_reason=_text(context.get("alignment_reason")),
+            tone=self.tone_for(context),
+            contact_name=_text(context.get("contact_name")),
+            title=_text(context.get("title")),
+            contact_profile=contact_profile or "Not available",
+            note=_text(context.get("note")),
+        )
+
+
+def get_pending_contexts(redraft: bool = False) -> List[Dict[str, Any]]:
+    where = (
+        ""
+        if redraft
+        else "WHERE NOT EXISTS (SELECT 1 FROM email_drafts d WHERE d.contact_email = c.contact_email)"
+    )
+    cursor = get_cursor().execute(PENDING_CONTACTS_QUERY.format(where=where))
+    contexts: List[Dict[str, Any]] = []
+    while rows := cursor.fetchmany(FETCH_SIZE):
+        contexts.extend(dict(zip(CONTEXT_FIELDS, row)) for row in rows)
+    return contexts
+
+
+async def generate_draft_async(
+    context: Dict[str, Any],
+    prompt: DraftPrompt,
+    request_slots: AdaptiveConcurrency,
+    intent: str = DEFAULT_INTENT,
+) -> Draft:
+    content = await enrichment.chat_completion_async(
+        [{"role": "user", "content": prompt.render(context)}],
+        DRAFT_TEMPERATURE,
+        request_slots,
+        operation="drafts",
+    )
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("OpenAI returned an empty draft")
+    return Draft(
+        company=context["company"],
+        contact_name=context["contact_name"],
+        contact_email=context["contact_email"],
+        tone=prompt.tone_for(context),
+        draft_content=content.strip(),
+        intent=intent,
+    )
+
+
+async def run_draft_generation_async(
+    max_concurrent_contacts: int = MAX_CONCURRENT_CONTACTS,
+    max_inflight_requests: int = MAX_INFLIGHT_REQUESTS,
+    intent: str = DEFAULT_INTENT,
+    redraft: bool = False,
+    profile_path: Path = PROFILE_PATH,
+) -> int:
+    contexts = get_pending_contexts(redraft)
+    if not contexts:
+        logger.info("No contacts pending a draft")
+        return 0
+
+    prompt = DraftPrompt(load_profile(profile_path))
+    request_slots = AdaptiveConcurrency(max_inflight_requests)
+    writer = DraftWriter()
+
+    async def generate(context: Dict[str, Any]) -> Draft:
+        return await generate_draft_async(context, prompt, request_slots, intent)
+
+    def handle(context: Dict[str, Any], draft: Union[Draft, Exception]) -> None:
+        if isinstance(draft, Exception):
+            log_api_error(
+                "drafts",
+                draft,
+                company=context["company"],
+                contact_email=context["contact_email"],
+            )
+            return
+        writer.add(draft)
+
+    workers = min(max_concurrent_contacts, len(contexts))
+    logger.info(
+        "Drafting emails for %s contacts with %s workers", len(contexts), workers
+    )
+    await run_pipeline(contexts, generate, handle, writer, workers)
+    logger.info("[DRAFTS] %s drafts written", writer.written)
+    logger.info("[CACHE] LLM cache stats: %s", get_llm_cache().stats())
+    logger.info("[RATE] %s throttled requests", get_rate_limiter().throttled)
+    return writer.written
+
+
+def run_draft_generation(
+    max_concurrent_contacts: int = MAX_CONCURRENT_CONTACTS,
+    max_inflight_requests: int = MAX_INFLIGHT_REQUESTS,
+    intent: str = DEFAULT_INTENT,
+    redraft: bool = False,
+) -> int:
+    return asyncio.run(
+        run_draft_generation_async(
+            max_concurrent_contacts, max_inflight_requests, intent, redraft
+        )
+    )
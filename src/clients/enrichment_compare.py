@@ -0,0 +1,119 @@
+# src/clients/enrichment_compare.py
+#
+# Side-by-side run of the two-stage (six questions + synthesis) and the
+# single-call structured enrichment flows on the same companies. Reports
+# latency, API calls, tokens and how many EnrichedCompany fields came back
+# filled. Nothing is written to processed_companies.
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from src.clients import openai as enrichment
+from src.clients import ratelimit
+from src.clients.llm_cache import get_llm_cache
+from src.common.models import EnrichedCompany
+from src.db.connection import get_cursor
+from src.log import get_logger
+
+logger = get_logger("enrichment_compare")
+
+MODES = {"two-stage": False, "structured": True}
+
+
+def field_completeness(enriched: EnrichedCompany) -> float:
+    fields = list(EnrichedCompany.__annotations__)
+    filled = sum(1 for f in fields if enriched.get(f))
+    return filled / len(fields)
+
+
+def sample_companies(limit: int) -> List[str]:
+    rows = get_cursor().execute(
+        "SELECT company FROM processed_companies ORDER BY company LIMIT ?", [limit]
+    ).fetchall()
+    return [company for (company,) in rows]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+
+async def _run_mode(
+    companies: List[str], structured: bool, max_inflight_requests: int
+) -> Dict[str, Any]:
+    request_slots = ratelimit.AdaptiveConcurrency(max_inflight_requests)
+    latencies: List[float] = []
+    completeness: List[float] = []
+    failures = 0
+
+    async def one(company: str) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            enriched: Union[EnrichedCompany, Exception] = (
+                await enrichment.enrich_company_async(company, request_slots, structured)
+            )
+        except Exception as e:
+            enriched = e
+        latencies.append(time.perf_counter() - started)
+        if isinstance(enriched, Exception):
+            failures += 1
+            logger.warning("[COMPARE] %s failed: %s", company, enriched)
+        else:
+            completeness.append(field_completeness(enriched))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(company) for company in companies))
+    wall = time.perf_counter() - started
+
+    limiter = ratelimit.get_rate_limiter()
+    return {
+        "companies": len(companies),
+        "failures": failures,
+        "wall_seconds": round(wall, 3),
+        "latency_p50": round(_percentile(latencies, 0.5), 3),
+        "latency_p95": round(_percentile(latencies, 0.95), 3),
+        "calls": limiter.calls,
+        "prompt_tokens": limiter.prompt_tokens,
+        "completion_tokens": limiter.completion_tokens,
+        "field_completeness": round(sum(completeness) / len(completeness), 3)
+        if completeness
+        else 0.0,
+    }
+
+
+def compare_enrichment_modes(
+    companies: List[str],
+    max_inflight_requests: int = enrichment.MAX_INFLIGHT_REQUESTS,
+) -> Dict[str, Dict[str, Any]]:
+    # Cached answers would make either mode look free, so lookups are skipped
+    # and each mode gets its own limiter for clean call/token counts.
+    cache = get_llm_cache()
+    previous_bypass = cache.bypass
+    previous_limiter: Optional[ratelimit.RateLimiter] = ratelimit._limiter
+    cache.bypass = True
+    report: Dict[str, Dict[str, Any]] = {}
+    try:
+        for mode, structured in MODES.items():
+            ratelimit._limiter = ratelimit.RateLimiter()
+            logger.info("[COMPARE] Running %s on %s companies", mode, len(companies))
+            report[mode] = asyncio.run(
+                _run_mode(companies, structured, max_inflight_requests)
+            )
+    finally:
+        cache.bypass = previous_bypass
+        ratelimit._limiter = previous_limiter
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, Any]]) -> str:
+    metrics = list(next(iter(report.values())))
+    modes = list(report)
+    lines = [f"{'metric':<20}" + "".join(f"{m:>14}" for m in modes)]
+    for metric in metrics:
+        lines.append(
+            f"{metric:<20}" + "".join(f"{report[m][metric]:>14}" for m in modes)
+        )
+    return "\n".join(lines)
@@ -1,65 +1,202 @@
 # src/clients/gsuite.py
+import hashlib
+import json
 import os
-from typing import List, Dict
+from functools import lru_cache
+from typing import Any, Callable, List, Dict, Iterator, Optional, Tuple
 import gspread
+from gspread.utils import absolute_range_name, numericise_all, to_records
 from google.oauth2.service_account import Credentials
 from dotenv import load_dotenv
 
+from src.db.telemetry import api_call_timer
+from src.log import get_logger
+
+logger = get_logger("gsuite")
+
 # Constants
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets.readonly",
     "https://www.googleapis.com/auth/drive.readonly",
 ]
 
-# Load .env variables
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 GCP_SECRETS_DIR = os.path.join(PROJECT_ROOT, "secrets", "gcp")
 GCP_COMMON_ENV_VAR_FILE = os.path.join(GCP_SECRETS_DIR, "common.env")
 GCP_SECRETS_FILE = os.path.join(GCP_SECRETS_DIR, ".env")
 
-# Validate secrets
-for path in [GCP_COMMON_ENV_VAR_FILE, GCP_SECRETS_FILE]:
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"Missing required env file: {path}")
+# Rows fetched per request when streaming a worksheet; bounds sync memory
+SHEETS_PAGE_SIZE = int(os.getenv("SHEETS_PAGE_SIZE", 5000))
+
 
-# Load the .env file
-load_dotenv(GCP_SECRETS_FILE)
+# Secrets are validated and loaded on first use, not at import, so commands
+# that never touch Google Sheets don't need them.
+@lru_cache(maxsize=None)
+def load_gcp_settings() -> str:
+    for path in [GCP_COMMON_ENV_VAR_FILE, GCP_SECRETS_FILE]:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Missing required env file: {path}")
 
-SERVICE_ACCOUNT_FILENAME = os.getenv(
-    "GCLOUD_SERVICE_ACCOUNT_FILENAME", "gcloud_service_account.json"
-)
-SERVICE_ACCOUNT_PATH = os.path.join(GCP_SECRETS_DIR, SERVICE_ACCOUNT_FILENAME)
+    # Load the .env file
+    load_dotenv(GCP_SECRETS_FILE)
 
-if not os.path.isfile(SERVICE_ACCOUNT_PATH):
-    raise FileNotFoundError(f"Missing service account file: {SERVICE_ACCOUNT_PATH}")
+    service_account_filename = os.getenv(
+        "GCLOUD_SERVICE_ACCOUNT_FILENAME", "gcloud_service_account.json"
+    )
+    service_account_path = os.path.join(GCP_SECRETS_DIR, service_account_filename)
+
+    if not os.path.isfile(service_account_path):
+        raise FileNotFoundError(f"Missing service account file: {service_account_path}")
+    return service_account_path
 
 
 def get_gsheet_client() -> gspread.Client:
     credentials: Credentials = Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_PATH, scopes=SCOPES
+        load_gcp_settings(), scopes=SCOPES
     )
     return gspread.authorize(credentials)
 
 
+def update_checksum(hasher: Any, rows: List[List[Any]]) -> None:
+    # Row by row so a streamed worksheet hashes the same as a full fetch;
+    # blank rows are skipped because paging can't tell them from the end.
+    for row in rows:
+        if row:
+            hasher.update(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+            hasher.update(b"\n")
+
+
+def values_checksum(values: List[List[Any]]) -> str:
+    hasher = hashlib.sha256()
+    update_checksum(hasher, values)
+    return hasher.hexdigest()
+
+
+def values_to_records(values: List[List[Any]]) -> List[Dict[str, int | float | str]]:
+    # Same shape as Worksheet.get_all_records(): first row is the header,
+    # short rows are padded and numeric strings become numbers.
+    if not values:
+        return []
+    keys = values[0]
+    rows = [row + [""] * (len(keys) - len(row)) for row in values[1:]]
+    return to_records(keys, [numericise_all(row) for row in rows])
+
+
+class SheetsSession:
+    # One authorized client for the whole process; spreadsheets are opened
+    # once per URL and every worksheet needed by a sync is read in one
+    # batch_get instead of an open + full download per table.
+    def __init__(self, client_factory: Callable[[], gspread.Client] = get_gsheet_client):
+        self.client_factory = client_factory
+        self._client: Optional[gspread.Client] = None
+        self._spreadsheets: Dict[str, gspread.Spreadsheet] = {}
+
+    @property
+    def client(self) -> gspread.Client:
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def spreadsheet(self, sheet_url: str) -> gspread.Spreadsheet:
+        if sheet_url not in self._spreadsheets:
+            with api_call_timer("sheets", "open"):
+                self._spreadsheets[sheet_url] = self.client.open_by_url(sheet_url)
+        return self._spreadsheets[sheet_url]
+
+    def revision(self, sheet_url: str) -> Optional[str]:
+        # Drive's modifiedTime changes on every edit; callers fall back to
+        # content checksums when it's unavailable.
+        try:
+            spreadsheet = self.spreadsheet(sheet_url)
+            with api_call_timer("sheets", "revision"):
+                return spreadsheet.get_lastUpdateTime()
+        except Exception as e:
+            logger.warning("[SHEETS] Could not read sheet revision: %s", e)
+            return None
+
+    def row_counts(self, sheet_url: str) -> Dict[str, int]:
+        # Grid sizes for every worksheet in one metadata request
+        spreadsheet = self.spreadsheet(sheet_url)
+        with api_call_timer("sheets", "metadata"):
+            worksheets = spreadsheet.worksheets()
+        return {worksheet.title: worksheet.row_count for worksheet in worksheets}
+
+    def batch_get(self, sheet_url: str, ranges: List[str]) -> Dict[str, Any]:
+        spreadsheet = self.spreadsheet(sheet_url)
+        with api_call_timer("sheets", "batch_get"):
+            return spreadsheet.values_batch_get(ranges)
+
+    def iter_pages(
+        self, sheet_url: str, sheet_names: List[str], page_size: int = SHEETS_PAGE_SIZE
+    ) -> Iterator[Tuple[str, List[List[Any]]]]:
+        # The first page of every worksheet comes back from one batch_get, so
+        # small sheets still cost a single request. Larger ones are paged by
+        # row range up to their grid size; only one page is held at a time.
+        row_counts = self.row_counts(sheet_url)
+        first_pages = self.batch_get(
+            sheet_url, [absolute_range_name(name, f"1:{page_size}") for name in sheet_names]
+        )
+        for name, value_range in zip(sheet_names, first_pages.get("valueRanges", [])):
+            yield name, value_range.get("values", [])
+
+        for name in sheet_names:
+            for start in range(page_size + 1, row_counts.get(name, 0) + 1, page_size):
+                response = self.batch_get(
+                    sheet_url, [absolute_range_name(name, f"{start}:{start + page_size - 1}")]
+                )
+                value_ranges = response.get("valueRanges", [{}])
+                yield name, value_ranges[0].get("values", [])
+
+    def fetch_values(
+        self, sheet_url: str, sheet_names: List[str]
+    ) -> Dict[str, List[List[Any]]]:
+        response = self.batch_get(
+            sheet_url, [absolute_range_name(name) for name in sheet_names]
+        )
+        value_ranges = response.get("valueRanges", [])
+        return {
+            name: value_range.get("values", [])
+            for name, value_range in zip(sheet_names, value_ranges)
+        }
+
+
+_session: Optional[SheetsSession] = None
+
+
+def get_sheets_session() -> SheetsSession:
+    global _session
+
+    if _session is None:
+        _session = SheetsSession()
+    return _session
+
+
+def get_sheet_url() -> str:
+    load_gcp_settings()
+    sheet_url = os.getenv("SHEET_URL")
+    if not sheet_url:
+        raise ValueError("SHEET_URL is not set in the environment.")
+    return sheet_url
+
+
+def get_processed_companies_sheet_name() -> str:
+    return os.getenv("PROCESSED_COMPANIES_SHEET_NAME", "Processed Companies")
+
+
+def get_company_research_sheet_name() -> str:
+    return os.getenv("COMPANY_RESEARCH_SHEET_NAME", "Company Research")
+
+
 def get_sheet_data(
     sheet_url: str, sheet_name: str
 ) -> List[Dict[str, int | float | str]]:
-    client: gspread.Client = get_gsheet_client()
-    worksheet: gspread.Worksheet = client.open_by_url(sheet_url).worksheet(sheet_name)
-    return worksheet.get_all_records()
+    values = get_sheets_session().fetch_values(sheet_url, [sheet_name])
+    return values_to_records(values[sheet_name])
 
 
 def get_processed_companies() -> List[Dict[str, int | float | str]]:
-    sheet_url = os.getenv("SHEET_URL")
-    sheet_name = os.getenv("PROCESSED_COMPANIES_SHEET_NAME", "Processed Companies")
-    if not sheet_url:
-        raise ValueError("SHEET_URL is not set in the environment.")
-    return get_sheet_data(sheet_url, sheet_name)
+    return get_sheet_data(get_sheet_url(), get_processed_companies_sheet_name())
 
 
 def get_company_research() -> List[Dict[str, int | float | str]]:
-    sheet_url = os.getenv("SHEET_URL")
-    sheet_name = os.getenv("COMPANY_RESEARCH_SHEET_NAME", "Company Research")
-    if not sheet_url:
-        raise ValueError("SHEET_URL is not set in the environment.")
-    return get_sheet_data(sheet_url, sheet_name)
+    return get_sheet_data(get_sheet_url(), get_company_research_sheet_name())
@@ -0,0 +1,362 @@
+# src/clients/inbox.py
+#
+# Step 8 reply import: reads a local mbox file or Maildir export, classifies
+# each message and hands them in batches to src.db.replies, which matches
+# them to the drafts they answer and writes replies_log.
+#
+# Both formats are streamed: an mbox is read in large blocks and split on
+# its "From " lines, a Maildir one file at a time, so memory stays flat
+# however big the archive is. An mbox re-import starts from the byte offset
+# after the last message written instead of the top; a Maildir re-import
+# skips the files already imported by name, without opening them.
+import base64
+import binascii
+import hashlib
+import os
+import quopri
+import re
+from datetime import datetime
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesParser
+from email.policy import compat32
+from email.utils import getaddresses, parseaddr, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union, cast
+
+from src.common.models import IncomingReply
+from src.db.connection import get_cursor, transaction
+from src.db.replies import (
+    REPLY_IMPORT_BATCH_SIZE,
+    add_imported_files,
+    get_imported_files,
+    get_import_state,
+    insert_replies,
+    reply_counts,
+    set_import_state,
+)
+from src.db.telemetry import stage_timer
+from src.log import get_logger
+
+logger = get_logger("inbox")
+
+MBOX_READ_SIZE = 1 << 20
+# An mbox whose first bytes (up to the saved offset) change was replaced
+# rather than appended to
+FINGERPRINT_BYTES = 4096
+REPLY_TEXT_MAX_CHARS = int(os.getenv("REPLY_TEXT_MAX_CHARS", 4000))
+
+PARSER = BytesParser(policy=compat32)
+
+HEADER_END = re.compile(rb"\r?\n\r?\n")
+FOLDED_LINE = re.compile(r"\r?\n[ \t]+")
+MBOXRD_ESCAPE = re.compile(rb"^>(>*From )", re.M)
+MESSAGE_ID = re.compile(rb"^Message-ID:[ \t]*(<[^>\r\n]+>)", re.M | re.I)
+ANGLE_ADDR = re.compile(r"<[^>]+>")
+HTML_TAG = re.compile(r"<[^>]+>")
+# Where the quoted message starts in a reply
+QUOTE_START = re.compile(
+    r"^(>|On .+ wrote:\s*$|-+ ?Original Message ?-+|From: .+@)", re.M | re.I
+)
+
+BOUNCE_SENDERS = ("mailer-daemon", "postmaster")
+AUTO_REPLY_SUBJECT = re.compile(
+    r"^(auto(matic)?[ -]?reply|out of (the )?office|abwesenheit|absence)", re.I
+)
+DECLINE = re.compile(
+    r"not interested|no,? thanks|no thank you|unsubscribe|remove me|take me off|"
+    r"stop (emailing|contacting)|do not contact|don'?t contact|not a (good )?fit|"
+    r"not the right time|we'?ll pass|going to pass",
+    re.I,
+)
+POSITIVE = re.compile(
+    r"interested|let'?s (talk|chat|connect|meet)|happy to (chat|talk|connect|meet)|"
+    r"sounds (good|great)|would love to|set up a (call|meeting|time)|schedule|"
+    r"calendly|book a (call|time|slot)|when are you (free|available)",
+    re.I,
+)
+
+
+def mailbox_format(path: Path) -> str:
+    return "maildir" if (path / "cur").is_dir() or (path / "new").is_dir() else "mbox"
+
+
+def iter_mbox(path: Path, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    # Yields (offset just past the message, raw message); a message is
+    # everything from one "From " line up to the next
+    with open(path, "rb") as f:
+        f.seek(start)
+        buffer, base = b"", start
+        while True:
+            chunk = f.read(MBOX_READ_SIZE)
+            buffer += chunk
+            last = 0
+            # Searching from 1 skips the separator the buffer starts with
+            separator = buffer.find(b"\nFrom ", 1)
+            while separator != -1:
+                yield base + separator + 1, buffer[last : separator + 1]
+                last = separator + 1
+                separator = buffer.find(b"\nFrom ", last)
+            buffer, base = buffer[last:], base + last
+            if not chunk:
+                if buffer.strip():
+                    yield base + len(buffer), buffer
+                return
+
+
+def maildir_name(file_name: str) -> str:
+    # The unique part; the ":2,<flags>" info changes when a message moves
+    # from new/ to cur/ or is flagged
+    return file_name.split(":", 1)[0]
+
+
+def iter_maildir(path: Path, skip: Set[str]) -> Iterator[Tuple[str, bytes]]:
+    # Yields (unique name, raw message) for every file not in `skip`, oldest
+    # first. Names rather than mtimes mark what was imported: a file synced
+    # in late may carry an mtime older than ones imported before it.
+    entries = []
+    for folder in ("new", "cur"):
+        if not (path / folder).is_dir():
+            continue
+        with os.scandir(path / folder) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                name = maildir_name(entry.name)
+                if name not in skip:
+                    entries.append((entry.stat().st_mtime_ns, name, entry.path))
+    for _, name, file_path in sorted(entries):
+        try:
+            with open(file_path, "rb") as f:
+                yield name, f.read()
+        except FileNotFoundError:
+            # Deleted or moved by a mail client since the scan
+            continue
+
+
+def mbox_fingerprint(path: Path, length: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(min(length, FINGERPRINT_BYTES))).hexdigest()
+
+
+def parse_headers(head: bytes) -> Dict[str, str]:
+    # Names lower-cased; the first of a repeated header wins, as with
+    # Message.get()
+    headers: Dict[str, str] = {}
+    text = FOLDED_LINE.sub(" ", head.decode("utf-8", errors="replace"))
+    for line in text.splitlines():
+        name, colon, value = line.partition(":")
+        if colon:
+            headers.setdefault(name.strip().lower(), value.strip())
+    return headers
+
+
+def header_param(value: str, name: str) -> Optional[str]:
+    match = re.search(rf';\s*{name}\s*=\s*"?([^";]+)"?', value, re.I)
+    return match.group(1).strip() if match else None
+
+
+def decode_words(value: str) -> str:
+    # Encoded words ("=?utf-8?q?...?=") decoded
+    if "=?" not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except (LookupError, UnicodeDecodeError, ValueError):
+        return value
+
+
+def decode_body(payload: bytes, encoding: str, charset: Optional[str]) -> str:
+    encoding = encoding.strip().lower()
+    try:
+        if encoding == "base64":
+            payload = base64.b64decode(payload)
+        elif encoding == "quoted-printable":
+            payload = quopri.decodestring(payload)
+    except (binascii.Error, ValueError):
+        pass
+    try:
+        return payload.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def multipart_text(message: Message) -> str:
+    # The first text/plain part that isn't an attachment, else HTML as text
+    html = None
+    for part in message.walk():
+        if part.is_multipart() or part.get_filename():
+            continue
+        content_type = part.get_content_type()
+        if content_type not in ("text/plain", "text/html"):
+            continue
+        payload = part.get_payload(decode=True) or b""
+        text = decode_body(payload, "", part.get_content_charset())
+        if content_type == "text/plain":
+            return text
+        if html is None:
+            html = HTML_TAG.sub(" ", text)
+    return html or ""
+
+
+def body_text(raw: bytes, headers: Dict[str, str], body: bytes) -> str:
+    # Single-part mail, nearly every reply, is decoded here directly; only
+    # multipart mail goes through the email package, whose line-by-line
+    # parse would otherwise be most of the import time
+    content_type = headers.get("content-type", "text/plain").lower()
+    if content_type.startswith("multipart/"):
+        return multipart_text(PARSER.parsebytes(raw))
+    if not content_type.startswith("text/"):
+        return ""
+    text = decode_body(
+        body,
+        headers.get("content-transfer-encoding", ""),
+        header_param(content_type, "charset"),
+    )
+    return HTML_TAG.sub(" ", text) if content_type.startswith("text/html") else text
+
+
+def new_text(text: str) -> str:
+    # The reply itself, without the quoted message below it
+    match = QUOTE_START.search(text)
+    if match:
+        text = text[: match.start()]
+    return text.strip()[:REPLY_TEXT_MAX_CHARS]
+
+
+def classify_reply(headers: Dict[str, str], from_email: str, subject: str, text: str) -> str:
+    content_type = headers.get("content-type", "")
+    if from_email.split("@")[0] in BOUNCE_SENDERS or (
+        content_type.lower().startswith("multipart/report")
+        and header_param(content_type, "report-type") == "delivery-status"
+    ):
+        return "bounce"
+    if (
+        headers.get("auto-submitted", "no").lower() != "no"
+        or "x-autoreply" in headers
+        or "x-autorespond" in headers
+        or headers.get("precedence", "").lower() == "auto_reply"
+        or AUTO_REPLY_SUBJECT.match(subject)
+    ):
+        return "auto_reply"
+    # "not interested" contains "interested", so declines are checked first
+    if DECLINE.search(text):
+        return "decline"
+    if POSITIVE.search(text):
+        return "positive"
+    return "neutral"
+
+
+def sender_address(value: str) -> str:
+    match = ANGLE_ADDR.search(value)
+    address = match.group(0)[1:-1] if match else parseaddr(value)[1]
+    return address.strip().lower()
+
+
+def received_at(value: str) -> Optional[datetime]:
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    # Local naive time, like every other timestamp in the database
+    return date.astimezone().replace(tzinfo=None) if date.tzinfo else date
+
+
+def parse_reply(raw: bytes) -> IncomingReply:
+    if raw.startswith(b"From "):
+        raw = raw.split(b"\n", 1)[1] if b"\n" in raw else b""
+        if b">From " in raw:
+            raw = MBOXRD_ESCAPE.sub(rb"\1", raw)
+    separator = HEADER_END.search(raw)
+    head, body = (raw[: separator.start()], raw[separator.end() :]) if separator else (raw, b"")
+    headers = parse_headers(head)
+    message_id = headers.get("message-id", "")
+    if not message_id:
+        message_id = f"<{hashlib.sha1(raw).hexdigest()}@scout.invalid>"
+    references = ANGLE_ADDR.findall(
+        f"{headers.get('in-reply-to', '')} {headers.get('references', '')}"
+    )
+    from_email = sender_address(headers.get("from", ""))
+    subject = decode_words(headers.get("subject", ""))
+    text = new_text(body_text(raw, headers, body))
+    reply_type = classify_reply(headers, from_email, subject, text)
+    if reply_type == "bounce":
+        # The bounced message's own Message-ID is quoted in the report
+        references += [
+            m.decode("ascii", errors="replace")
+            for m in MESSAGE_ID.findall(body)
+        ]
+        recipients = getaddresses([headers.get("x-failed-recipients", "")])
+        text = text or ", ".join(address for _, address in recipients if address)
+    return IncomingReply(
+        message_id=message_id,
+        in_reply_to=list(dict.fromkeys(references)),
+        from_email=from_email,
+        subject=subject,
+        received_at=received_at(headers.get("date", "")),
+        reply_type=reply_type,
+        reply_text=text,
+    )
+
+
+def run_reply_import(
+    path: str,
+    batch_size: int = REPLY_IMPORT_BATCH_SIZE,
+    full: bool = False,
+) -> Dict[str, int]:
+    mailbox = Path(path).expanduser().resolve()
+    source = str(mailbox)
+    kind = mailbox_format(mailbox)
+    messages: Iterator[Tuple[Union[int, str], bytes]]
+    if kind == "mbox":
+        position, fingerprint = (
+            (0, None) if full else get_import_state(get_cursor(), source)
+        )
+        if position and (
+            position > mailbox.stat().st_size
+            or mbox_fingerprint(mailbox, position) != fingerprint
+        ):
+            logger.warning("[REPLIES] %s was replaced; importing it from the top", source)
+            position = 0
+        messages = iter_mbox(mailbox, position)
+        logger.info("[REPLIES] Importing mbox %s from offset %s", source, position)
+    else:
+        imported = set() if full else get_imported_files(get_cursor(), source)
+        messages = iter_maildir(mailbox, imported)
+        logger.info(
+            "[REPLIES] Importing Maildir %s, %s files already imported", source, len(imported)
+        )
+
+    totals = {"read": 0, "imported": 0, "duplicates": 0, "unmatched": 0}
+    batch: List[IncomingReply] = []
+    # The mbox offset after each message, or each Maildir file's name
+    markers: List[Union[int, str]] = []
+
+    def flush() -> None:
+        with stage_timer("replies", "write") as timing, transaction() as con:
+            counts = insert_replies(con, batch)
+            if kind == "mbox":
+                offset = cast(int, markers[-1])
+                set_import_state(con, source, offset, mbox_fingerprint(mailbox, offset))
+            else:
+                add_imported_files(con, source, cast(List[str], markers))
+            timing["rows"] = len(batch)
+        totals["read"] += len(batch)
+        for key, value in counts.items():
+            totals[key] += value
+        logger.info("[REPLIES] %s messages read: %s", totals["read"], totals)
+        batch.clear()
+        markers.clear()
+
+    for marker, raw in messages:
+        batch.append(parse_reply(raw))
+        markers.append(marker)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if not totals["read"]:
+        logger.info("[REPLIES] No new messages in %s", source)
+    logger.info("[REPLIES] Done: %s; replies_log: %s", totals, reply_counts(get_cursor()))
+    return totals
@@ -0,0 +1,164 @@
+# src/clients/llm_cache.py
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import duckdb
+
+from src.db.connection import SCOUT_DIR
+from src.log import get_logger
+
+logger = get_logger("llm_cache")
+
+# The cache lives in its own DuckDB file next to scout.db so lookups never
+# contend with pipeline writes on the main database.
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", str(SCOUT_DIR / "llm_cache.db")))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 30 * 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 50_000))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() in ("1", "true", "yes")
+
+# How many writes happen between size-based eviction passes
+EVICTION_INTERVAL = 500
+
+
+def make_cache_key(
+    model: str, messages: List[Dict[str, str]], temperature: float, **params: Any
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        bypass: bool = LLM_CACHE_BYPASS,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Bypass skips lookups but still stores fresh responses, so a forced
+        # re-run also refreshes the cache.
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.con: duckdb.DuckDBPyConnection = duckdb.connect(str(self.path))  # type: ignore
+        self.con.execute(
+            """
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+          cache_key TEXT PRIMARY KEY,
+          model TEXT,
+          response TEXT,
+          hit_count INTEGER DEFAULT 0,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+        )
+        self.evict()
+
+    def get(self, key: str, max_age: Optional[int] = None) -> Optional[str]:
+        # max_age (seconds) narrows the TTL for callers that need a newer
+        # answer than the cache would otherwise return
+        if self.bypass:
+            return None
+        ttl = self.ttl_seconds if max_age is None else min(max_age, self.ttl_seconds)
+        with self._lock:
+            row = self.con.execute(
+                """
+                SELECT response FROM llm_response_cache
+                WHERE cache_key = ?
+                  AND created_at > CURRENT_TIMESTAMP - to_seconds(?)
+                """,
+                [key, ttl],
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.con.execute(
+                """
+                UPDATE llm_response_cache
+                SET hit_count = hit_count + 1, last_accessed = CURRENT_TIMESTAMP
+                WHERE cache_key = ?
+                """,
+                [key],
+            )
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        # A replaced answer is a new one: OR REPLACE keeps columns not listed,
+        # so its age and hit count are reset explicitly
+        with self._lock:
+            self.con.execute(
+                """
+                INSERT OR REPLACE INTO llm_response_cache
+                  (cache_key, model, response, hit_count, created_at, last_accessed)
+                VALUES (?, ?, ?, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                """,
+                [key, model, response],
+            )
+            self._writes += 1
+        if self._writes % EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            self.con.execute(
+                """
+                DELETE FROM llm_response_cache
+                WHERE created_at <= CURRENT_TIMESTAMP - to_seconds(?)
+                """,
+                [self.ttl_seconds],
+            )
+            # Least recently used entries go first once the cache is full
+            self.con.execute(
+                """
+                DELETE FROM llm_response_cache WHERE cache_key IN (
+                  SELECT cache_key FROM llm_response_cache
+                  ORDER BY last_accessed DESC
+                  OFFSET ?
+                )
+                """,
+                [self.max_entries],
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (entries,) = self.con.execute(
+                "SELECT COUNT(*) FROM llm_response_cache"
+            ).fetchone()  # type: ignore
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        logger.info("[CACHE] LLM cache stats: %s", self.stats())
+        self.con.close()
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
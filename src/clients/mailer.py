@@ -0,0 +1,369 @@
+# src/clients/mailer.py
+#
+# Step 7: sends approved drafts over SMTP. Due drafts are claimed in batches
+# from the send queue (src.db.sends), interleaved by recipient domain and
+# sent by a few threads sharing a pool of logged-in SMTP connections, so a
+# queue of thousands pays for a handful of connects. Sends are paced per
+# recipient domain and overall, and each batch's outcomes are written back
+# in one transaction.
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.clients.ratelimit import TokenBucket
+from src.common.models import OutgoingEmail, SendResult, SMTPSettings
+from src.db.connection import get_cursor
+from src.db.errors import log_api_error
+from src.db.sends import (
+    SEND_BATCH_SIZE,
+    SendJournal,
+    apply_send_results,
+    claim_due_drafts,
+    recover_sends,
+    requeue_unconfirmed,
+    send_counts,
+)
+from src.db.telemetry import api_call_timer, stage_timer
+from src.log import SAMPLED, get_logger
+
+logger = get_logger("mailer")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SMTP_SECRETS_FILE = PROJECT_ROOT / "secrets" / "smtp" / ".env"
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+# Providers cap messages per session; reconnect a little before that
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", 100))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+# A connection idle longer than this is checked with NOOP before reuse
+SMTP_IDLE_CHECK = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", 30))
+# 0 disables a limit
+SEND_RATE_PER_MINUTE = float(os.getenv("SEND_RATE_PER_MINUTE", 30))
+SEND_DOMAIN_RATE_PER_MINUTE = float(os.getenv("SEND_DOMAIN_RATE_PER_MINUTE", 5))
+SEND_DEFAULT_SUBJECT = os.getenv("SEND_DEFAULT_SUBJECT", "Quick question about {company}")
+
+
+# Credentials are loaded on first use, like the Google secrets, so other
+# commands never need them.
+@lru_cache(maxsize=None)
+def load_smtp_settings() -> SMTPSettings:
+    if SMTP_SECRETS_FILE.is_file():
+        load_dotenv(SMTP_SECRETS_FILE)
+    host = os.getenv("SMTP_HOST")
+    username = os.getenv("SMTP_USERNAME")
+    sender = os.getenv("SMTP_FROM") or username
+    if not host or not sender:
+        raise ValueError(
+            f"SMTP_HOST and SMTP_FROM (or SMTP_USERNAME) must be set, e.g. in {SMTP_SECRETS_FILE}"
+        )
+    return SMTPSettings(
+        host=host,
+        port=int(os.getenv("SMTP_PORT", 587)),
+        username=username,
+        password=os.getenv("SMTP_PASSWORD"),
+        security=os.getenv("SMTP_SECURITY", "starttls").lower(),
+        sender=sender,
+        sender_name=os.getenv("SMTP_FROM_NAME"),
+    )
+
+
+class PooledSMTP:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    # At most `size` connections are open; each thread checks one out per
+    # message. A connection that fails mid-conversation is dropped, one that
+    # only got a rejection for its recipient goes back to the pool.
+    def __init__(
+        self,
+        settings: SMTPSettings,
+        size: int = SMTP_POOL_SIZE,
+        max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+        timeout: float = SMTP_TIMEOUT,
+        idle_check: float = SMTP_IDLE_CHECK,
+    ):
+        self.settings = settings
+        self.size = size
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self.connects = 0
+        self._idle: "queue.LifoQueue[PooledSMTP]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> PooledSMTP:
+        settings = self.settings
+        with api_call_timer("smtp", "connect"):
+            if settings["security"] == "ssl":
+                smtp: smtplib.SMTP = smtplib.SMTP_SSL(
+                    settings["host"],
+                    settings["port"],
+                    timeout=self.timeout,
+                    context=ssl.create_default_context(),
+                )
+            else:
+                smtp = smtplib.SMTP(settings["host"], settings["port"], timeout=self.timeout)
+                if settings["security"] == "starttls":
+                    smtp.starttls(context=ssl.create_default_context())
+            if settings["username"]:
+                smtp.login(settings["username"], settings["password"] or "")
+        with self._lock:
+            self.connects += 1
+        return PooledSMTP(smtp)
+
+    def _checkout(self) -> PooledSMTP:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+        if time.monotonic() - conn.last_used < self.idle_check:
+            return conn
+        # The server may have timed out an idle session
+        try:
+            if conn.smtp.noop()[0] == 250:
+                return conn
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._discard(conn)
+        return self._connect()
+
+    def _checkin(self, conn: PooledSMTP) -> None:
+        conn.messages += 1
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages:
+            self._quit(conn)
+        else:
+            self._idle.put(conn)
+
+    def _quit(self, conn: PooledSMTP) -> None:
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._discard(conn)
+
+    def _discard(self, conn: PooledSMTP) -> None:
+        try:
+            conn.smtp.close()
+        except OSError:
+            pass
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn.smtp
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # smtplib has already reset the transaction
+                self._checkin(conn)
+                raise
+            except BaseException:
+                self._discard(conn)
+                raise
+            self._checkin(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class SendPacer:
+    # One bucket for everything and one per recipient domain, so a batch
+    # full of one company's addresses doesn't look like a burst to its MX
+    def __init__(
+        self,
+        per_minute: float = SEND_RATE_PER_MINUTE,
+        domain_per_minute: float = SEND_DOMAIN_RATE_PER_MINUTE,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.overall = TokenBucket(per_minute) if per_minute > 0 else None
+        self.domain_per_minute = domain_per_minute
+        self.domains: Dict[str, TokenBucket] = {}
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    def wait(self, domain: str) -> None:
+        if self.domain_per_minute > 0:
+            with self._lock:
+                bucket = self.domains.get(domain)
+                if bucket is None:
+                    bucket = self.domains[domain] = TokenBucket(self.domain_per_minute)
+            self.sleep(bucket.reserve(1))
+        if self.overall is not None:
+            self.sleep(self.overall.reserve(1))
+
+
+def recipient_domain(email: OutgoingEmail) -> str:
+    return email["contact_email"].rsplit("@", 1)[-1].lower()
+
+
+def interleave_domains(emails: List[OutgoingEmail]) -> List[OutgoingEmail]:
+    # Round-robin over domains so threads waiting on one domain's pace don't
+    # hold up the rest of the batch
+    by_domain: Dict[str, List[OutgoingEmail]] = {}
+    for email in emails:
+        by_domain.setdefault(recipient_domain(email), []).append(email)
+    queues = list(by_domain.values())
+    ordered: List[OutgoingEmail] = []
+    for i in range(max((len(q) for q in queues), default=0)):
+        ordered.extend(q[i] for q in queues if i < len(q))
+    return ordered
+
+
+def split_subject(email: OutgoingEmail) -> Tuple[str, str]:
+    # Drafts may start with a "Subject:" line; otherwise use the default
+    content = email["draft_content"].strip()
+    first, _, rest = content.partition("\n")
+    if first.lower().startswith("subject:"):
+        return first[len("subject:"):].strip(), rest.strip()
+    return SEND_DEFAULT_SUBJECT.format(company=email["company"]), content
+
+
+def build_message(email: OutgoingEmail, settings: SMTPSettings) -> EmailMessage:
+    subject, body = split_subject(email)
+    message = EmailMessage()
+    message["From"] = formataddr((settings["sender_name"] or "", settings["sender"]))
+    message["To"] = formataddr((email["contact_name"] or "", email["contact_email"]))
+    message["Subject"] = subject
+    message["Date"] = formatdate(localtime=True)
+    # Fixed when the draft was claimed, so a retry carries the same one
+    message["Message-ID"] = email["message_id"]
+    message.set_content(body)
+    return message
+
+
+def classify_send_error(error: Exception) -> str:
+    # Permanent (5xx) rejections fail the draft; anything else is retried
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return "failed" if codes and min(codes) >= 500 else "deferred"
+    if isinstance(error, smtplib.SMTPResponseException):
+        return "failed" if error.smtp_code >= 500 else "deferred"
+    return "deferred"
+
+
+def send_email(
+    email: OutgoingEmail,
+    pool: SMTPPool,
+    pacer: SendPacer,
+    journal: SendJournal,
+) -> SendResult:
+    draft_id = email["id"]
+    try:
+        message = build_message(email, pool.settings)
+    except Exception as e:
+        return SendResult(
+            draft_id=draft_id, outcome="failed", error=str(e), finished_at=datetime.now()
+        )
+
+    pacer.wait(recipient_domain(email))
+    journal.record(draft_id, "start")
+    try:
+        with pool.connection() as smtp, api_call_timer("smtp", "send"):
+            smtp.send_message(message)
+    except Exception as e:
+        outcome = classify_send_error(e)
+        at = journal.record(draft_id, outcome, str(e))
+        result = SendResult(draft_id=draft_id, outcome=outcome, error=str(e), finished_at=at)
+        if outcome == "failed":
+            log_api_error("send", e, email["company"], email["contact_email"])
+        else:
+            logger.warning("[SEND] Deferred %s: %s", email["contact_email"], e)
+        return result
+    at = journal.record(draft_id, "sent")
+    logger.info("📤 Sent: %s (%s)", email["contact_email"], email["company"], extra=SAMPLED)
+    return SendResult(draft_id=draft_id, outcome="sent", error=None, finished_at=at)
+
+
+def run_email_sending(
+    settings: Optional[SMTPSettings] = None,
+    limit: Optional[int] = None,
+    batch_size: int = SEND_BATCH_SIZE,
+    pool_size: int = SMTP_POOL_SIZE,
+    pacer: Optional[SendPacer] = None,
+    journal: Optional[SendJournal] = None,
+    resend_unconfirmed: bool = False,
+) -> Dict[str, int]:
+    con = get_cursor()
+    journal = journal or SendJournal()
+    recovered = recover_sends(con, journal)
+    if any(recovered.values()):
+        logger.warning("[SEND] Recovered drafts from an interrupted run: %s", recovered)
+    if resend_unconfirmed:
+        logger.info("[SEND] Re-queued %s unconfirmed drafts", requeue_unconfirmed(con))
+    if recovered["unconfirmed"]:
+        logger.warning(
+            "[SEND] Drafts marked 'unconfirmed' may already have been delivered; "
+            "check the Sent folder, then run with --resend-unconfirmed"
+        )
+
+    settings = settings or load_smtp_settings()
+    pool = SMTPPool(settings, size=pool_size)
+    pacer = pacer or SendPacer()
+    sender_domain = settings["sender"].rsplit("@", 1)[-1]
+    executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="smtp")
+    totals = {"sent": 0, "deferred": 0, "failed": 0}
+    claimed = 0
+
+    try:
+        while limit is None or claimed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - claimed)
+            emails = claim_due_drafts(con, size, sender_domain)
+            if not emails:
+                break
+            claimed += len(emails)
+            results = list(
+                executor.map(
+                    lambda email: send_email(email, pool, pacer, journal),
+                    interleave_domains(emails),
+                )
+            )
+            with stage_timer("send", "write") as timing:
+                apply_send_results(con, results)
+                timing["rows"] = len(results)
+            # Written to the database, so the journal has nothing left to add
+            journal.clear()
+            for result in results:
+                totals[result["outcome"]] += 1
+            logger.info(
+                "[SEND] Batch of %s: %s so far (%s connections opened)",
+                len(results),
+                totals,
+                pool.connects,
+            )
+    except BaseException:
+        # Settle what this run already sent before handing the error back
+        executor.shutdown(wait=True, cancel_futures=True)
+        recover_sends(con, journal)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        pool.close()
+        journal.close()
+
+    if not claimed:
+        logger.info("No approved drafts due for sending")
+    counts = send_counts(con)
+    logger.info("[SEND] Done: %s; drafts: %s", totals, counts)
+    return {**totals, "connections": pool.connects}
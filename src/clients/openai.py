@@ -1,14 +1,29 @@
-from openai import OpenAI
-import duckdb
+from openai import OpenAI, AsyncOpenAI
+import asyncio
 import json
-from typing import List, cast
-from src.db.init import DB_PATH
-from src.log import get_logger
-from src.common.models import EnrichedCompany, get_empty_enriched_company
+import os
+import time
+from typing import Any, Dict, List, Optional, Union, cast
+from src.db.canonical import PENDING_COMPANIES_SQL
+from src.db.connection import get_cursor
+from src.clients.llm_cache import get_llm_cache, make_cache_key
+from src.clients.ratelimit import AdaptiveConcurrency, estimate_tokens, get_rate_limiter
+from src.db.errors import log_api_error
+from src.db.telemetry import get_telemetry
+from src.db.writer import MetadataWriter, apply_metadata_batch, run_pipeline
+from src.log import SAMPLED, get_logger
+from src.common.models import EnrichedCompany, enriched_company_json_schema
+from src.common.utils import strip_code_fence
 
 logger = get_logger("enrichment")
 
-con: duckdb.DuckDBPyConnection = duckdb.connect(str(DB_PATH))  # type: ignore
+MODEL = "gpt-4o"
+QUESTION_TEMPERATURE = 0.3
+SYNTHESIS_TEMPERATURE = 0.7
+
+# Concurrency limits for the async enrichment mode
+MAX_CONCURRENT_COMPANIES = int(os.getenv("ENRICHMENT_MAX_CONCURRENT_COMPANIES", 8))
+MAX_INFLIGHT_REQUESTS = int(os.getenv("ENRICHMENT_MAX_INFLIGHT_REQUESTS", 24))
 
 PROMPT_TEMPLATE = """
 You are helping a professional researcher enrich information about the company **{company}**. Here are the available raw details:
@@ -40,32 +55,46 @@ Return a JSON object like:
 }}
 """
 
-client = OpenAI()
+# Single-call alternative to the six questions + synthesis flow: the model
+# fills the EnrichedCompany schema directly under strict JSON-schema output.
+STRUCTURED_PROMPT_TEMPLATE = """
+You are helping a professional researcher enrich information about the company **{company}**.
 
+Research and cover:
+- What they do and their primary product
+- Recent news
+- Investors and funding stage
+- Technology stack
+- Which roles are best for outreach, and the tone to use
+- Industry and website
 
-def ask_openai(prompt: str) -> EnrichedCompany:
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful researcher."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.7,
-            timeout=30,
-        )
-        content = response.choices[0].message.content  # type: ignore
-        if not isinstance(content, str):
-            logger.error("OpenAI response content is not a string")
-            return get_empty_enriched_company()
-        return cast(EnrichedCompany, json.loads(content.strip()))
-    except Exception as e:
-        logger.error(f"OpenAI API error: {e}")
-        return get_empty_enriched_company()
+Fill every field. Use an empty string or an empty list when something is unknown.
+"""
 
+_client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
 
-def get_questions(company: str) -> List[str]:
-    questions = [
+
+# Clients are built on first use so importing this module needs no API key.
+# Retries are left to the shared rate limiter rather than the SDK.
+def get_client() -> OpenAI:
+    global _client
+
+    if _client is None:
+        _client = OpenAI(max_retries=0)
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+
+    if _async_client is None:
+        _async_client = AsyncOpenAI(max_retries=0)
+    return _async_client
+
+
+def build_questions(company: str) -> List[str]:
+    return [
         f"What does the company {company} do?",
         f"Any recent news about {company}?",
         f"Who are the investors in {company}?",
@@ -73,88 +102,325 @@ def get_questions(company: str) -> List[str]:
         f"Which roles at {company} are best for outreach?",
         f"What industry is {company} in? Does it have a website?",
     ]
-    results: List[str] = []
-    for i, q in enumerate(questions):
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": q}],
-                temperature=0.3,
-                timeout=30,
+
+
+def build_enrichment_prompt(company: str, question_data: List[str]) -> str:
+    # Map the list of answers to the expected prompt keys
+    prompt_keys = ["q1", "q2", "q3", "q4", "q5", "q6"]
+    prompt_kwargs = {
+        k: question_data[i] if i < len(question_data) else ""
+        for i, k in enumerate(prompt_keys)
+    }
+    return PROMPT_TEMPLATE.format(company=company, **prompt_kwargs)
+
+
+def build_structured_prompt(company: str) -> str:
+    return STRUCTURED_PROMPT_TEMPLATE.format(company=company)
+
+
+def structured_response_format() -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "enriched_company",
+            "strict": True,
+            "schema": enriched_company_json_schema(),
+        },
+    }
+
+
+def parse_enriched_company(content: object) -> EnrichedCompany:
+    # Raises instead of returning blanks, so a bad answer never marks a
+    # company as processed
+    if not isinstance(content, str):
+        raise ValueError("OpenAI response content is not a string")
+    return cast(EnrichedCompany, json.loads(strip_code_fence(content)))
+
+
+def question_messages(question: str) -> List[Dict[str, str]]:
+    return [{"role": "user", "content": question}]
+
+
+def synthesis_messages(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "You are a helpful researcher."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _cacheable(content: object, expect_json: bool) -> bool:
+    if not isinstance(content, str):
+        return False
+    if not expect_json:
+        return True
+    # Never cache a synthesis answer that would fail to parse on every re-run
+    try:
+        json.loads(strip_code_fence(content))
+        return True
+    except ValueError:
+        return False
+
+
+def _completion_params(response_format: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"response_format": response_format} if response_format else {}
+
+
+def chat_completion(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    expect_json: bool = False,
+    response_format: Optional[Dict[str, Any]] = None,
+    operation: str = "chat",
+) -> object:
+    params = _completion_params(response_format)
+    cache = get_llm_cache()
+    key = make_cache_key(MODEL, messages, temperature, **params)
+    started = time.perf_counter()
+    cached = cache.get(key)
+    if cached is not None:
+        get_telemetry().record_api_call(
+            "openai",
+            operation,
+            time.perf_counter() - started,
+            outcome="cache_hit",
+            model=MODEL,
+        )
+        return cached
+    response = get_rate_limiter().call(
+        lambda: get_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,  # type: ignore
+            temperature=temperature,
+            timeout=30,
+            **params,
+        ),
+        estimate_tokens(messages),
+        operation=operation,
+        model=MODEL,
+    )
+    content = response.choices[0].message.content  # type: ignore
+    if _cacheable(content, expect_json):
+        cache.put(key, MODEL, cast(str, content))
+    return content
+
+
+async def chat_completion_async(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    request_slots: AdaptiveConcurrency,
+    expect_json: bool = False,
+    response_format: Optional[Dict[str, Any]] = None,
+    operation: str = "chat",
+    cache_max_age: Optional[int] = None,
+) -> object:
+    params = _completion_params(response_format)
+    cache = get_llm_cache()
+    key = make_cache_key(MODEL, messages, temperature, **params)
+    started = time.perf_counter()
+    cached = cache.get(key, cache_max_age)
+    if cached is not None:
+        get_telemetry().record_api_call(
+            "openai",
+            operation,
+            time.perf_counter() - started,
+            outcome="cache_hit",
+            model=MODEL,
+        )
+        return cached
+    response = await get_rate_limiter().call_async(
+        lambda: get_async_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,  # type: ignore
+            temperature=temperature,
+            timeout=30,
+            **params,
+        ),
+        estimate_tokens(messages),
+        request_slots,
+        operation=operation,
+        model=MODEL,
+    )
+    content = response.choices[0].message.content  # type: ignore
+    if _cacheable(content, expect_json):
+        cache.put(key, MODEL, cast(str, content))
+    return content
+
+
+def ask_openai(prompt: str) -> EnrichedCompany:
+    content = chat_completion(
+        synthesis_messages(prompt),
+        SYNTHESIS_TEMPERATURE,
+        expect_json=True,
+        operation="synthesis",
+    )
+    return parse_enriched_company(content)
+
+
+def clean_answer(content: object) -> str:
+    if not isinstance(content, str):
+        logger.error("OpenAI response content is not a string")
+        return ""
+    return content.strip()
+
+
+def get_questions(company: str) -> List[str]:
+    return [
+        clean_answer(
+            chat_completion(
+                question_messages(q), QUESTION_TEMPERATURE, operation="question"
             )
-            content = response.choices[0].message.content  # type: ignore
-            if not isinstance(content, str):
-                logger.error("OpenAI response content is not a string")
-                results.append("")
-                continue
-            results.append(content.strip())
-        except Exception as e:
-            logger.error(f"Error fetching Q{i+1} for {company}: {e}")
-            results.append("")
-    return results
+        )
+        for q in build_questions(company)
+    ]
+
+
+def ask_openai_structured(company: str) -> EnrichedCompany:
+    content = chat_completion(
+        synthesis_messages(build_structured_prompt(company)),
+        SYNTHESIS_TEMPERATURE,
+        expect_json=True,
+        response_format=structured_response_format(),
+        operation="structured",
+    )
+    return parse_enriched_company(content)
+
+
+def enrich_company(company: str, structured: bool = False) -> EnrichedCompany:
+    if structured:
+        return ask_openai_structured(company)
+    question_data: List[str] = get_questions(company)
+    full_prompt: str = build_enrichment_prompt(company, question_data)
+    return ask_openai(full_prompt)
 
 
 def update_company_metadata(company: str, enriched: EnrichedCompany):
-    con.execute(
-        """
-        UPDATE processed_companies SET
-            summary = ?,
-            product = ?,
-            tags = ?,
-            investors = ?,
-            ideal_roles = ?,
-            recent_news = ?,
-            tone_advice = ?,
-            alignment_reason = ?,
-            suggested_opener = ?,
-            funding_stage = ?,
-            technologies_used = ?,
-            website_url = ?,
-            industry = ?,
-            linkedin_company_url = ?,
-            linkedin_search_links = ?,
-            company_processed = TRUE,
-            last_updated = CURRENT_TIMESTAMP
-        WHERE company = ?;
-        """,
-        [
-            enriched.get("summary"),
-            enriched.get("product"),
-            ", ".join(enriched.get("tags", [])),
-            ", ".join(enriched.get("investors", [])),
-            enriched.get("ideal_roles"),
-            enriched.get("recent_news"),
-            enriched.get("tone_advice"),
-            enriched.get("alignment_reason"),
-            enriched.get("suggested_opener"),
-            enriched.get("funding_stage"),
-            enriched.get("technologies_used"),
-            enriched.get("website_url"),
-            enriched.get("industry"),
-            enriched.get("linkedin_company_url"),
-            ", ".join(enriched.get("linkedin_search_links", [])),
-            company,
-        ],
+    apply_metadata_batch(get_cursor(), [(company, enriched)])
+    logger.info("✅ Enriched and updated: %s", company, extra=SAMPLED)
+
+
+def run_enrichment_pipeline(structured: bool = False):
+    rows = get_cursor().execute(PENDING_COMPANIES_SQL).fetchall()
+    with MetadataWriter() as writer:
+        for (company,) in rows:
+            logger.info("🔍 Processing: %s", company, extra=SAMPLED)
+            try:
+                enriched = enrich_company(company, structured)
+            except Exception as e:
+                # The row stays unprocessed so the next run retries it
+                log_api_error("enrichment", e, company=company)
+                continue
+            writer.add(company, enriched)
+            logger.info("✅ Enriched: %s", company, extra=SAMPLED)
+    logger.info("[CACHE] LLM cache stats: %s", get_llm_cache().stats())
+
+
+async def ask_openai_async(
+    prompt: str, request_slots: AdaptiveConcurrency
+) -> EnrichedCompany:
+    content = await chat_completion_async(
+        synthesis_messages(prompt),
+        SYNTHESIS_TEMPERATURE,
+        request_slots,
+        expect_json=True,
+        operation="synthesis",
+    )
+    return parse_enriched_company(content)
+
+
+async def get_questions_async(
+    company: str, request_slots: AdaptiveConcurrency
+) -> List[str]:
+    # All six questions are independent, so they fan out together and only
+    # the shared request limit bounds how many are in flight.
+    answers = await asyncio.gather(
+        *(
+            chat_completion_async(
+                question_messages(q),
+                QUESTION_TEMPERATURE,
+                request_slots,
+                operation="question",
+            )
+            for q in build_questions(company)
+        )
+    )
+    return [clean_answer(answer) for answer in answers]
+
+
+async def ask_openai_structured_async(
+    company: str, request_slots: AdaptiveConcurrency
+) -> EnrichedCompany:
+    content = await chat_completion_async(
+        synthesis_messages(build_structured_prompt(company)),
+        SYNTHESIS_TEMPERATURE,
+        request_slots,
+        expect_json=True,
+        response_format=structured_response_format(),
+        operation="structured",
+    )
+    return parse_enriched_company(content)
+
+
+async def enrich_company_async(
+    company: str, request_slots: AdaptiveConcurrency, structured: bool = False
+) -> EnrichedCompany:
+    if structured:
+        return await ask_openai_structured_async(company, request_slots)
+    question_data = await get_questions_async(company, request_slots)
+    return await ask_openai_async(
+        build_enrichment_prompt(company, question_data), request_slots
+    )
+
+
+async def run_enrichment_pipeline_async(
+    max_concurrent_companies: int = MAX_CONCURRENT_COMPANIES,
+    max_inflight_requests: int = MAX_INFLIGHT_REQUESTS,
+    structured: bool = False,
+) -> None:
+    rows = get_cursor().execute(PENDING_COMPANIES_SQL).fetchall()
+    companies = [company for (company,) in rows]
+    if not companies:
+        logger.info("No companies pending enrichment")
+        return
+
+    # Starts at the configured cap and shrinks automatically on 429s
+    request_slots = AdaptiveConcurrency(max_inflight_requests)
+    writer = MetadataWriter()
+
+    async def enrich(company: str) -> EnrichedCompany:
+        logger.info("🔍 Processing: %s", company, extra=SAMPLED)
+        return await enrich_company_async(company, request_slots, structured)
+
+    def handle(company: str, enriched: Union[EnrichedCompany, Exception]) -> None:
+        if isinstance(enriched, Exception):
+            # The row stays unprocessed so the next run retries it
+            log_api_error("enrichment", enriched, company=company)
+            return
+        writer.add(company, enriched)
+        logger.info("✅ Enriched: %s", company, extra=SAMPLED)
+
+    workers = min(max_concurrent_companies, len(companies))
+    logger.info(
+        "Enriching %s companies with %s workers and up to %s requests in flight",
+        len(companies),
+        workers,
+        max_inflight_requests,
+    )
+    await run_pipeline(companies, enrich, handle, writer, workers)
+    logger.info("[CACHE] LLM cache stats: %s", get_llm_cache().stats())
+    logger.info(
+        "[RATE] %s throttled requests, final concurrency %s",
+        get_rate_limiter().throttled,
+        request_slots.limit,
+    )
+
+
+def run_concurrent_enrichment_pipeline(
+    max_concurrent_companies: int = MAX_CONCURRENT_COMPANIES,
+    max_inflight_requests: int = MAX_INFLIGHT_REQUESTS,
+    structured: bool = False,
+) -> None:
+    asyncio.run(
+        run_enrichment_pipeline_async(
+            max_concurrent_companies, max_inflight_requests, structured
+        )
     )
-    logger.info(f"✅ Enriched and updated: {company}")
-
-
-def run_enrichment_pipeline():
-    rows = con.execute(
-        "SELECT company FROM processed_companies WHERE company_processed = FALSE"
-    ).fetchall()
-    for (company,) in rows:
-        logger.info(f"🔍 Processing: {company}")
-        question_data: List[str] = get_questions(company)
-        # Map the list of answers to the expected prompt keys
-        prompt_keys = ["q1", "q2", "q3", "q4", "q5", "q6"]
-        prompt_kwargs = {
-            k: question_data[i] if i < len(question_data) else ""
-            for i, k in enumerate(prompt_keys)
-        }
-        full_prompt: str = PROMPT_TEMPLATE.format(company=company, **prompt_kwargs)
-        enriched = ask_openai(full_prompt)
-        if enriched:
-            update_company_metadata(company, enriched)
-        else:
-            logger.warning(f"⚠️ No enrichment data for {company}")
@@ -0,0 +1,358 @@
+# src/clients/openai_batch.py
+#
+# Offline enrichment through the OpenAI Batch API. The flow has two phases
+# because the synthesis prompt needs all six research answers:
+#
+#   1. pending companies -> questions-NNN.jsonl -> batches -> questions-NNN.out.jsonl
+#   2. questions outputs -> synthesis-NNN.jsonl -> batches -> synthesis-NNN.out.jsonl
+#   3. synthesis outputs -> processed_companies (bulk, via MetadataWriter)
+#
+# Each stage is split into as many input files as the Batch API limits per
+# batch require (BATCH_MAX_REQUESTS, BATCH_MAX_BYTES). Failed requests come
+# back in a separate errors file, which is downloaded next to the output; a
+# company with no result in either is logged and left pending.
+# Files are written under ~/.scout/batches/<run_id>/ and every request carries
+# a stable custom_id, so each step can be inspected or re-run on its own.
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, cast
+
+from src.clients import openai as enrichment
+from src.db.canonical import PENDING_COMPANIES_SQL
+from src.db.connection import SCOUT_DIR, get_cursor
+from src.db.errors import log_api_error
+from src.db.writer import MetadataWriter
+from src.log import get_logger
+
+logger = get_logger("enrichment_batch")
+
+BATCH_DIR = Path(os.getenv("ENRICHMENT_BATCH_DIR", str(SCOUT_DIR / "batches")))
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_POLL_INTERVAL = float(os.getenv("ENRICHMENT_BATCH_POLL_INTERVAL", 60))
+FETCH_SIZE = 1000
+# Batch API limits per input file
+BATCH_MAX_REQUESTS = int(os.getenv("ENRICHMENT_BATCH_MAX_REQUESTS", 50_000))
+BATCH_MAX_BYTES = int(os.getenv("ENRICHMENT_BATCH_MAX_BYTES", 200 * 1024 * 1024))
+QUESTION_COUNT = 6
+
+QUESTIONS_STAGE = "questions"
+SYNTHESIS_STAGE = "synthesis"
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def make_custom_id(stage: str, company: str, index: int = 0) -> str:
+    # Company goes last so names containing the separator still round-trip
+    return f"{stage}|{index}|{company}"
+
+
+def parse_custom_id(custom_id: str) -> Tuple[str, int, str]:
+    stage, index, company = custom_id.split("|", 2)
+    return stage, int(index), company
+
+
+def batch_request(
+    custom_id: str, messages: List[Dict[str, str]], temperature: float
+) -> Dict[str, Any]:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": enrichment.MODEL,
+            "messages": messages,
+            "temperature": temperature,
+        },
+    }
+
+
+def iter_pending_companies() -> Iterator[str]:
+    cursor = get_cursor().execute(f"{PENDING_COMPANIES_SQL} ORDER BY company")
+    while rows := cursor.fetchmany(FETCH_SIZE):
+        for (company,) in rows:
+            yield company
+
+
+def write_batch_files(
+    run_dir: Path, stage: str, groups: Iterator[List[Dict[str, Any]]]
+) -> List[Path]:
+    # A group (one company's requests) never straddles two files
+    paths: List[Path] = []
+    out = None
+    requests = size = 0
+    try:
+        for group in groups:
+            data = "".join(
+                json.dumps(request, ensure_ascii=False) + "\n" for request in group
+            ).encode("utf-8")
+            if (
+                out is None
+                or requests + len(group) > BATCH_MAX_REQUESTS
+                or size + len(data) > BATCH_MAX_BYTES
+            ):
+                if out is not None:
+                    out.close()
+                paths.append(run_dir / f"{stage}-{len(paths) + 1:03d}.jsonl")
+                out = paths[-1].open("wb")
+                requests = size = 0
+            out.write(data)
+            requests += len(group)
+            size += len(data)
+    finally:
+        if out is not None:
+            out.close()
+    return paths
+
+
+def write_questions_batch(run_dir: Path) -> List[Path]:
+    companies = 0
+
+    def groups() -> Iterator[List[Dict[str, Any]]]:
+        nonlocal companies
+        for company in iter_pending_companies():
+            companies += 1
+            yield [
+                batch_request(
+                    make_custom_id(QUESTIONS_STAGE, company, i),
+                    enrichment.question_messages(question),
+                    enrichment.QUESTION_TEMPERATURE,
+                )
+                for i, question in enumerate(enrichment.build_questions(company))
+            ]
+
+    paths = write_batch_files(run_dir, QUESTIONS_STAGE, groups())
+    logger.info(
+        "[BATCH] Wrote questions for %s companies to %s files", companies, len(paths)
+    )
+    return paths
+
+
+def iter_batch_results(path: Path) -> Iterator[Tuple[str, Optional[str]]]:
+    with path.open(encoding="utf-8") as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            custom_id = result["custom_id"]
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                logger.error(
+                    "[BATCH] Request %s failed: %s",
+                    custom_id,
+                    result.get("error") or response,
+                )
+                yield custom_id, None
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            yield custom_id, content if isinstance(content, str) else None
+
+
+def read_custom_ids(path: Path) -> Set[str]:
+    with path.open(encoding="utf-8") as lines:
+        return {json.loads(line)["custom_id"] for line in lines if line.strip()}
+
+
+def log_missing_results(input_paths: List[Path], output_paths: List[Path]) -> List[str]:
+    # A company none of whose requests came back, in either the output or
+    # the errors file, would otherwise vanish silently. It stays unprocessed,
+    # so the next run submits it again.
+    returned = {
+        parse_custom_id(custom_id)[2]
+        for path in output_paths
+        for custom_id in read_custom_ids(path)
+    }
+    missing = sorted(
+        {
+            parse_custom_id(custom_id)[2]
+            for path in input_paths
+            for custom_id in read_custom_ids(path)
+        }
+        - returned
+    )
+    for company in missing:
+        log_api_error("enrichment_batch", "No batch result returned", company=company)
+    if missing:
+        logger.error("[BATCH] No results returned for %s companies", len(missing))
+    return missing
+
+
+def write_synthesis_batch(questions_outputs: List[Path], run_dir: Path) -> List[Path]:
+    answers: Dict[str, List[Optional[str]]] = defaultdict(
+        lambda: [None] * QUESTION_COUNT
+    )
+    for path in questions_outputs:
+        for custom_id, content in iter_batch_results(path):
+            _, index, company = parse_custom_id(custom_id)
+            answers[company][index] = None if content is None else content.strip()
+
+    complete: List[str] = []
+    for company, question_data in answers.items():
+        failed = sum(1 for answer in question_data if answer is None)
+        if failed:
+            # Left unprocessed, so the next run asks all six again
+            log_api_error(
+                "enrichment_batch",
+                f"{failed} of {QUESTION_COUNT} question requests failed",
+                company=company,
+            )
+        else:
+            complete.append(company)
+
+    paths = write_batch_files(
+        run_dir,
+        SYNTHESIS_STAGE,
+        (
+            [
+                batch_request(
+                    make_custom_id(SYNTHESIS_STAGE, company),
+                    enrichment.synthesis_messages(
+                        enrichment.build_enrichment_prompt(
+                            company, cast(List[str], answers[company])
+                        )
+                    ),
+                    enrichment.SYNTHESIS_TEMPERATURE,
+                )
+            ]
+            for company in complete
+        ),
+    )
+    logger.info(
+        "[BATCH] Wrote synthesis prompts for %s of %s companies to %s files",
+        len(complete),
+        len(answers),
+        len(paths),
+    )
+    return paths
+
+
+def apply_synthesis_results(synthesis_outputs: List[Path]) -> int:
+    with MetadataWriter() as writer:
+        results = (r for path in synthesis_outputs for r in iter_batch_results(path))
+        for custom_id, content in results:
+            _, _, company = parse_custom_id(custom_id)
+            # Failed companies stay unprocessed and are picked up by the next run
+            if content is None:
+                log_api_error("enrichment_batch", "Synthesis request failed", company=company)
+                continue
+            try:
+                enriched = enrichment.parse_enriched_company(content)
+            except ValueError as e:
+                log_api_error("enrichment_batch", e, company=company)
+                continue
+            writer.add(company, enriched)
+    logger.info("[BATCH] Applied %s enrichment results", writer.written)
+    return writer.written
+
+
+def submit_batch(input_path: Path) -> str:
+    client = enrichment.get_client()
+    with input_path.open("rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    logger.info("[BATCH] Submitted %s as batch %s", input_path.name, batch.id)
+    return batch.id
+
+
+def wait_for_batch(
+    batch_id: str, output_path: Path, poll_interval: float = BATCH_POLL_INTERVAL
+) -> List[Path]:
+    # Returns the output file and, if any request failed, the errors file;
+    # both are in the same result format
+    client = enrichment.get_client()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            break
+        logger.info(
+            "[BATCH] %s is %s, checking again in %ss",
+            batch_id,
+            batch.status,
+            poll_interval,
+        )
+        time.sleep(poll_interval)
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+    paths: List[Path] = []
+    if batch.output_file_id:
+        client.files.content(batch.output_file_id).write_to_file(output_path)
+        paths.append(output_path)
+    if batch.error_file_id:
+        errors_path = output_path.with_name(
+            output_path.name.replace(".out.jsonl", ".errors.jsonl")
+        )
+        client.files.content(batch.error_file_id).write_to_file(errors_path)
+        with errors_path.open(encoding="utf-8") as f:
+            failed = sum(1 for line in f if line.strip())
+        logger.error(
+            "[BATCH] %s: %s requests failed, see %s", batch_id, failed, errors_path
+        )
+        paths.append(errors_path)
+    return paths
+
+
+def run_local_batch(input_path: Path, output_path: Path) -> Path:
+    # Stand-in for the Batch API: runs each request through the regular (cached)
+    # chat completion path and writes results in the Batch API output format.
+    with input_path.open(encoding="utf-8") as requests, output_path.open(
+        "w", encoding="utf-8"
+    ) as out:
+        for line in requests:
+            request = json.loads(line)
+            body = request["body"]
+            result: Dict[str, Any] = {"custom_id": request["custom_id"], "error": None}
+            try:
+                content = enrichment.chat_completion(
+                    body["messages"], body["temperature"], operation="batch_local"
+                )
+                result["response"] = {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"content": content}}]},
+                }
+            except Exception as e:
+                result["error"] = {"message": str(e)}
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return output_path
+
+
+def _run_stage(input_paths: List[Path], local: bool, poll_interval: float) -> List[Path]:
+    output_paths = [path.with_suffix(".out.jsonl") for path in input_paths]
+    if local:
+        return [run_local_batch(i, o) for i, o in zip(input_paths, output_paths)]
+    # All parts are submitted before waiting, so they run side by side
+    batch_ids = [submit_batch(path) for path in input_paths]
+    return [
+        result
+        for batch_id, output_path in zip(batch_ids, output_paths)
+        for result in wait_for_batch(batch_id, output_path, poll_interval)
+    ]
+
+
+def run_batch_enrichment_pipeline(
+    local: bool = False, poll_interval: float = BATCH_POLL_INTERVAL
+) -> int:
+    run_dir = BATCH_DIR / datetime.now().strftime("%Y%m%dT%H%M%S")
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    questions_paths = write_questions_batch(run_dir)
+    if not questions_paths:
+        logger.info("No companies pending enrichment")
+        return 0
+    questions_outputs = _run_stage(questions_paths, local, poll_interval)
+    log_missing_results(questions_paths, questions_outputs)
+
+    synthesis_paths = write_synthesis_batch(questions_outputs, run_dir)
+    if not synthesis_paths:
+        return 0
+    synthesis_outputs = _run_stage(synthesis_paths, local, poll_interval)
+    log_missing_results(synthesis_paths, synthesis_outputs)
+
+    return apply_synthesis_results(synthesis_outputs)
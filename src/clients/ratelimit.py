@@ -0,0 +1,319 @@
+# src/clients/ratelimit.py
+#
+# Client-side rate limiting shared by every OpenAI call: token buckets for
+# requests and tokens per minute, jittered exponential backoff that honors
+# Retry-After, and an AIMD concurrency limit for the async engine that backs
+# off when 429s show up and creeps back up while calls succeed.
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import openai
+
+from src.db.telemetry import get_telemetry
+from src.log import get_logger
+
+logger = get_logger("ratelimit")
+
+OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", 500))
+OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", 30_000))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 5))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", 1.0))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", 60.0))
+# Completion tokens reserved per request until the real usage is known
+COMPLETION_TOKEN_ESTIMATE = int(os.getenv("OPENAI_COMPLETION_TOKEN_ESTIMATE", 600))
+
+# Minimum seconds between two concurrency decreases, so one burst of 429s
+# from requests that were already in flight only halves the limit once.
+THROTTLE_COOLDOWN = 1.0
+
+T = TypeVar("T")
+
+
+class RetriesExhausted(Exception):
+    def __init__(self, attempts: int, last_error: BaseException):
+        super().__init__(f"Gave up after {attempts} attempts: {last_error}")
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    # ~4 characters per token is close enough for budgeting
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + COMPLETION_TOKEN_ESTIMATE
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def is_throttle(error: BaseException) -> bool:
+    return isinstance(error, openai.APIStatusError) and error.status_code == 429
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def response_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.refill_per_second = per_minute / 60.0
+        self.available = per_minute
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.available = min(
+            self.capacity,
+            self.available + (now - self.updated) * self.refill_per_second,
+        )
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        # Takes the amount immediately (the balance may go negative) and
+        # returns how long the caller must wait until it is covered. Callers
+        # are served in reservation order without polling.
+        with self._lock:
+            self._refill()
+            self.available -= min(amount, self.capacity)
+            if self.available >= 0:
+                return 0.0
+            return -self.available / self.refill_per_second
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self.available = min(self.capacity, self.available + amount)
+
+
+class AdaptiveConcurrency:
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveConcurrency":
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < THROTTLE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self._successes = 0
+        new_limit = max(self.min_limit, self.limit // 2)
+        if new_limit != self.limit:
+            logger.warning(
+                "[RATE] 429 received, concurrency %s -> %s", self.limit, new_limit
+            )
+            self.limit = new_limit
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: float = OPENAI_RPM_LIMIT,
+        tokens_per_minute: float = OPENAI_TPM_LIMIT,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        backoff_base: float = OPENAI_BACKOFF_BASE,
+        backoff_max: float = OPENAI_BACKOFF_MAX,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttled = 0
+        # Requests actually sent, retries included (cache hits never get here)
+        self.attempts = 0
+        # Usage totals reported by the API, for run summaries and comparisons
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def reserve(self, estimated_tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def settle(self, estimated_tokens: int, response: Any) -> None:
+        self.calls += 1
+        usage = getattr(response, "usage", None)
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        actual = response_tokens(response)
+        if actual is None:
+            return
+        if actual < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual)
+        else:
+            self.tokens.reserve(actual - estimated_tokens)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _on_error(self, attempt: int, error: BaseException) -> float:
+        if not is_retryable(error):
+            raise error
+        if is_throttle(error):
+            self.throttled += 1
+        if attempt >= self.max_retries:
+            raise RetriesExhausted(attempt + 1, error) from error
+        delay = self.backoff(attempt, error)
+        logger.warning(
+            "[RATE] Attempt %s failed (%s), retrying in %.1fs",
+            attempt + 1,
+            error,
+            delay,
+        )
+        return delay
+
+    def _record(
+        self,
+        operation: str,
+        model: Optional[str],
+        started: float,
+        attempt: int,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        # One telemetry row per logical call: wall time includes pacing and
+        # backoff, retries counts the attempts that failed before the last.
+        usage = getattr(response, "usage", None)
+        get_telemetry().record_api_call(
+            "openai",
+            operation,
+            time.perf_counter() - started,
+            outcome="ok" if error is None else "error",
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            retries=attempt,
+            error=error,
+        )
+
+    def _retry_delay(
+        self,
+        attempt: int,
+        error: BaseException,
+        operation: str,
+        model: Optional[str],
+        started: float,
+    ) -> float:
+        try:
+            return self._on_error(attempt, error)
+        except Exception as final:
+            self._record(operation, model, started, attempt, error=final)
+            raise
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        estimated_tokens: int,
+        operation: str = "chat",
+        model: Optional[str] = None,
+    ) -> T:
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            time.sleep(self.reserve(estimated_tokens))
+            self.attempts += 1
+            try:
+                result = fn()
+            except Exception as e:
+                time.sleep(self._retry_delay(attempt, e, operation, model, started))
+                attempt += 1
+                continue
+            self.settle(estimated_tokens, result)
+            self._record(operation, model, started, attempt, response=result)
+            return result
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        operation: str = "chat",
+        model: Optional[str] = None,
+    ) -> T:
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.reserve(estimated_tokens))
+            self.attempts += 1
+            try:
+                if concurrency is None:
+                    result = await fn()
+                else:
+                    async with concurrency:
+                        result = await fn()
+            except Exception as e:
+                if concurrency is not None and is_throttle(e):
+                    concurrency.on_throttle()
+                await asyncio.sleep(
+                    self._retry_delay(attempt, e, operation, model, started)
+                )
+                attempt += 1
+                continue
+            if concurrency is not None:
+                concurrency.on_success()
+            self.settle(estimated_tokens, result)
+            self._record(operation, model, started, attempt, response=result)
+            return result
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
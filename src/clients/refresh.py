@@ -0,0 +1,152 @@
+# src/clients/refresh.py
+#
+# Incremental re-enrichment of companies whose fields have gone stale (see
+# src.db.freshness). Only the stale topics' questions are asked again, and
+# cached answers are only reused while younger than the topic's TTL. The
+# synthesis sees the stored fields of the fresh topics in place of their
+# answers, and only the stale topics' fields are merged back into the row.
+# Each run spends at most what is left of REFRESH_DAILY_CALL_BUDGET.
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+from src.clients import openai as enrichment
+from src.clients.llm_cache import get_llm_cache
+from src.clients.ratelimit import AdaptiveConcurrency, get_rate_limiter
+from src.common.models import EnrichedCompany
+from src.db import freshness
+from src.db.connection import get_cursor
+from src.db.errors import log_api_error
+from src.db.writer import MetadataWriter, run_pipeline
+from src.log import SAMPLED, get_logger
+
+logger = get_logger("refresh")
+
+
+def known_answer(existing: EnrichedCompany, topic: str) -> str:
+    parts = []
+    for field in freshness.TOPIC_FIELDS[topic]:
+        value = existing.get(field)
+        if isinstance(value, list):
+            value = ", ".join(value)
+        if value:
+            parts.append(f"{field}: {value}")
+    return ("Already known. " + "; ".join(parts)) if parts else ""
+
+
+def merge_topics(enriched: EnrichedCompany, topics: List[str]) -> EnrichedCompany:
+    # Fields the synthesis left out keep their stored value and stay stale
+    return EnrichedCompany(  # type: ignore
+        **{
+            field: enriched[field]  # type: ignore
+            for topic in topics
+            for field in freshness.TOPIC_FIELDS[topic]
+            if field in enriched
+        }
+    )
+
+
+async def refresh_company_async(
+    company: str,
+    topics: List[str],
+    existing: EnrichedCompany,
+    request_slots: AdaptiveConcurrency,
+) -> EnrichedCompany:
+    questions = dict(zip(freshness.TOPICS, enrichment.build_questions(company)))
+    answers = await asyncio.gather(
+        *(
+            enrichment.chat_completion_async(
+                enrichment.question_messages(questions[topic]),
+                enrichment.QUESTION_TEMPERATURE,
+                request_slots,
+                operation="question",
+                cache_max_age=freshness.topic_ttl_seconds(topic),
+            )
+            for topic in topics
+        )
+    )
+    fresh = dict(zip(topics, (enrichment.clean_answer(a) for a in answers)))
+    question_data = [
+        fresh[topic] if topic in fresh else known_answer(existing, topic)
+        for topic in freshness.TOPICS
+    ]
+    enriched = await enrichment.ask_openai_async(
+        enrichment.build_enrichment_prompt(company, question_data), request_slots
+    )
+    return merge_topics(enriched, topics)
+
+
+async def run_refresh_pipeline_async(
+    budget: Optional[int] = None,
+    max_concurrent_companies: int = enrichment.MAX_CONCURRENT_COMPANIES,
+    max_inflight_requests: int = enrichment.MAX_INFLIGHT_REQUESTS,
+) -> Dict[str, int]:
+    con = get_cursor()
+    daily = freshness.REFRESH_DAILY_CALL_BUDGET if budget is None else budget
+    remaining = daily - freshness.refresh_calls_spent(con)
+    counts = {"planned": 0, "refreshed": 0, "failed": 0, "calls": 0}
+    if remaining <= 0:
+        logger.info("[REFRESH] Daily budget of %s calls already spent", daily)
+        return counts
+    plan = freshness.plan_refresh(con, remaining)
+    counts["planned"] = len(plan)
+    if not plan:
+        logger.info("[REFRESH] Nothing stale within the remaining %s calls", remaining)
+        return counts
+    existing = freshness.enriched_rows(con, [item["company"] for item in plan])
+
+    request_slots = AdaptiveConcurrency(max_inflight_requests)
+    writer = MetadataWriter()
+
+    async def refresh(item: Dict[str, Any]) -> EnrichedCompany:
+        company, topics = item["company"], item["topics"]
+        logger.info("🔁 Refreshing %s: %s", company, ", ".join(topics), extra=SAMPLED)
+        return await refresh_company_async(
+            company, topics, existing[company], request_slots
+        )
+
+    def handle(
+        item: Dict[str, Any], refreshed: Union[EnrichedCompany, Exception]
+    ) -> None:
+        if isinstance(refreshed, Exception):
+            counts["failed"] += 1
+            log_api_error("refresh", refreshed, company=item["company"])
+            return
+        writer.add(item["company"], refreshed)
+        counts["refreshed"] += 1
+
+    logger.info(
+        "[REFRESH] Refreshing %s companies for up to %s of %s remaining calls",
+        len(plan),
+        sum(item["calls"] for item in plan),
+        remaining,
+    )
+    # Only requests that reached the API count against the budget: cache hits
+    # and companies that failed before asking anything cost nothing
+    limiter = get_rate_limiter()
+    attempts = limiter.attempts
+    try:
+        await run_pipeline(
+            plan, refresh, handle, writer, min(max_concurrent_companies, len(plan))
+        )
+    finally:
+        counts["calls"] = limiter.attempts - attempts
+        freshness.record_refresh_calls(con, counts["calls"])
+    logger.info(
+        "[REFRESH] %s refreshed, %s failed, %s calls; cache %s, %s throttled requests",
+        counts["refreshed"],
+        counts["failed"],
+        counts["calls"],
+        get_llm_cache().stats(),
+        limiter.throttled,
+    )
+    return counts
+
+
+def run_refresh_pipeline(
+    budget: Optional[int] = None,
+    max_concurrent_companies: int = enrichment.MAX_CONCURRENT_COMPANIES,
+    max_inflight_requests: int = enrichment.MAX_INFLIGHT_REQUESTS,
+) -> Dict[str, int]:
+    return asyncio.run(
+        run_refresh_pipeline_async(budget, max_concurrent_companies, max_inflight_requests)
+    )
@@ -0,0 +1,278 @@
+# src/clients/workers.py
+#
+# Multi-process enrichment over the enrichment_jobs queue. The coordinator
+# (the calling process) is the only one that opens DuckDB: it leases jobs,
+# answers LLM cache lookups, collects telemetry and writes results. Worker
+# processes only talk to OpenAI, and to the coordinator over queues:
+#
+#   worker -> coordinator (shared):  ("lease", wid)
+#                                    ("cache_get", wid, key, max_age)
+#                                    ("cache_put", wid, key, model, response)
+#                                    ("telemetry", wid, calls, stages)
+#                                    ("done", wid, company, enriched)
+#                                    ("error", wid, company, message)
+#                                    ("exit", wid)
+#   coordinator -> worker (one each): leased company or None, cache responses
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.clients import llm_cache, ratelimit
+from src.clients.llm_cache import get_llm_cache
+from src.common.models import EnrichedCompany
+from src.db import telemetry
+from src.db.connection import get_cursor, transaction
+from src.db.errors import log_api_error
+from src.db.jobs import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    apply_job_results,
+    enqueue_pending_companies,
+    expire_leases,
+    fail_job,
+    job_counts,
+    lease_job,
+    release_leases,
+)
+from src.db.writer import METADATA_FLUSH_INTERVAL, METADATA_FLUSH_SIZE
+from src.log import SAMPLED, get_logger
+
+logger = get_logger("workers")
+
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", os.cpu_count() or 4))
+# How often the coordinator looks for expired leases and dead workers
+SUPERVISE_INTERVAL = 1.0
+SHUTDOWN_TIMEOUT = 10.0
+
+
+class RemoteLLMCache:
+    # Stands in for LLMCache inside a worker: lookups are a round trip to the
+    # coordinator, stores are fire-and-forget.
+    def __init__(
+        self, worker_id: int, messages: Any, replies: Any, bypass: bool = False
+    ):
+        self.worker_id = worker_id
+        self.messages = messages
+        self.replies = replies
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, max_age: Optional[int] = None) -> Optional[str]:
+        if self.bypass:
+            return None
+        self.messages.put(("cache_get", self.worker_id, key, max_age))
+        response = self.replies.get()
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, key: str, model: str, response: str) -> None:
+        self.messages.put(("cache_put", self.worker_id, key, model, response))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        pass
+
+
+def enrichment_worker(
+    worker_id: int,
+    messages: Any,
+    replies: Any,
+    structured: bool,
+    rate_share: float,
+    bypass_cache: bool,
+) -> None:
+    # Imported here so the coordinator doesn't need the OpenAI client loaded
+    from src.clients import openai as enrichment
+
+    llm_cache._cache = RemoteLLMCache(  # type: ignore
+        worker_id, messages, replies, bypass_cache
+    )
+    telemetry._telemetry = telemetry.Telemetry(
+        sink=lambda calls, stages: messages.put(
+            ("telemetry", worker_id, calls, stages)
+        )
+    )
+    # The API limits are per account, so each worker paces to its share
+    ratelimit._limiter = ratelimit.RateLimiter(
+        requests_per_minute=ratelimit.OPENAI_RPM_LIMIT * rate_share,
+        tokens_per_minute=ratelimit.OPENAI_TPM_LIMIT * rate_share,
+    )
+    try:
+        while True:
+            messages.put(("lease", worker_id))
+            company = replies.get()
+            if company is None:
+                return
+            try:
+                enriched = enrichment.enrich_company(company, structured)
+            except Exception as e:
+                messages.put(("error", worker_id, company, str(e)))
+                continue
+            messages.put(("done", worker_id, company, enriched))
+    finally:
+        telemetry._telemetry.close()
+        messages.put(("exit", worker_id))
+
+
+def lease_owner(worker_id: int) -> str:
+    return f"{os.getpid()}:{worker_id}"
+
+
+def run_enrichment_workers(
+    workers: int = ENRICHMENT_WORKERS,
+    structured: bool = False,
+    lease_seconds: int = JOB_LEASE_SECONDS,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    retry_failed: bool = False,
+) -> Dict[str, int]:
+    con = get_cursor()
+    with transaction():
+        # Only one process can hold the database, so any lease still open
+        # belongs to a coordinator that died
+        orphaned = release_leases(con, None, "coordinator restarted", max_attempts)
+        queued = enqueue_pending_companies(con, retry_failed)
+    if orphaned:
+        logger.warning(
+            "[JOBS] Released %s leases left by a previous run", len(orphaned)
+        )
+    pending = job_counts(con)["pending"]
+    logger.info("[JOBS] %s jobs queued, %s pending", queued, pending)
+    if not pending:
+        logger.info("No companies pending enrichment")
+        return job_counts(con)
+
+    workers = max(1, min(workers, pending))
+    cache = get_llm_cache()
+    context = multiprocessing.get_context("spawn")
+    messages = context.Queue()
+    replies = {wid: context.Queue() for wid in range(workers)}
+    processes = {
+        wid: context.Process(
+            target=enrichment_worker,
+            args=(wid, messages, replies[wid], structured, 1 / workers, cache.bypass),
+            name=f"enrichment-worker-{wid}",
+            daemon=True,
+        )
+        for wid in range(workers)
+    }
+    for process in processes.values():
+        process.start()
+    logger.info("Enriching %s companies with %s worker processes", pending, workers)
+
+    leases: Dict[int, str] = {}
+    results: List[Tuple[str, EnrichedCompany]] = []
+    running = set(processes)
+    last_flush = last_supervise = time.monotonic()
+    written = 0
+
+    def flush() -> None:
+        nonlocal written, last_flush
+        last_flush = time.monotonic()
+        if not results:
+            return
+        with telemetry.stage_timer("enrichment", "write") as timing:
+            apply_job_results(con, results)
+            timing["rows"] = len(results)
+        written += len(results)
+        results.clear()
+
+    def supervise() -> None:
+        nonlocal last_supervise
+        last_supervise = time.monotonic()
+        for company, status in expire_leases(con, max_attempts):
+            logger.warning("[JOBS] Lease on %s expired, now %s", company, status)
+            for wid, leased in list(leases.items()):
+                if leased == company:
+                    del leases[wid]
+        for wid in list(running):
+            if processes[wid].is_alive():
+                continue
+            # Died without saying goodbye: its lease goes back to the queue
+            running.discard(wid)
+            leases.pop(wid, None)
+            for company, status in release_leases(
+                con, lease_owner(wid), "worker died", max_attempts
+            ):
+                logger.warning(
+                    "[JOBS] Worker %s died holding %s, now %s", wid, company, status
+                )
+
+    try:
+        while running:
+            try:
+                message = messages.get(timeout=SUPERVISE_INTERVAL)
+            except queue.Empty:
+                message = None
+            if message is not None:
+                kind, wid = message[0], message[1]
+                if kind == "lease":
+                    company = lease_job(con, lease_owner(wid), lease_seconds)
+                    if company is not None:
+                        leases[wid] = company
+                        logger.info(
+                            "🔍 Processing: %s (worker %s)",
+                            company,
+                            wid,
+                            extra=SAMPLED,
+                        )
+                    replies[wid].put(company)
+                elif kind == "cache_get":
+                    replies[wid].put(cache.get(message[2], message[3]))
+                elif kind == "cache_put":
+                    cache.put(*message[2:])
+                elif kind == "telemetry":
+                    telemetry.get_telemetry().merge(message[2], message[3])
+                elif kind == "done":
+                    company = message[2]
+                    # A result for a lease that already expired is dropped;
+                    # the job has gone back to the queue
+                    if leases.get(wid) == company:
+                        del leases[wid]
+                        results.append((company, message[3]))
+                        logger.info("✅ Enriched: %s", company, extra=SAMPLED)
+                elif kind == "error":
+                    company = message[2]
+                    if leases.get(wid) == company:
+                        del leases[wid]
+                        status = fail_job(
+                            con, company, lease_owner(wid), message[3], max_attempts
+                        )
+                        log_api_error("enrichment", message[3], company=company)
+                        if status == "failed":
+                            logger.warning(
+                                "[JOBS] %s failed after %s attempts",
+                                company,
+                                max_attempts,
+                            )
+                elif kind == "exit":
+                    running.discard(wid)
+            now = time.monotonic()
+            if (
+                len(results) >= METADATA_FLUSH_SIZE
+                or now - last_flush >= METADATA_FLUSH_INTERVAL
+            ):
+                flush()
+            if now - last_supervise >= SUPERVISE_INTERVAL:
+                supervise()
+    finally:
+        for process in processes.values():
+            # Workers still running here means the coordinator was interrupted
+            if running:
+                process.terminate()
+            process.join(timeout=SHUTDOWN_TIMEOUT)
+        flush()
+        # Leases still open (interrupted run) go back to the queue right away
+        release_leases(con, None, "coordinator stopped", max_attempts)
+
+    counts = job_counts(con)
+    logger.info("[JOBS] %s companies enriched; queue: %s", written, counts)
+    logger.info("[CACHE] LLM cache stats: %s", cache.stats())
+    return counts
@@ -1,4 +1,5 @@
-from typing import List, TypedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, TypedDict, get_origin, get_type_hints
 
 
 class EnrichedCompany(TypedDict):
@@ -19,6 +20,65 @@ class EnrichedCompany(TypedDict):
     linkedin_search_links: List[str]
 
 
+class Contact(TypedDict):
+    company: str
+    contact_name: str
+    contact_email: str
+    contact_linkedin_url: Optional[str]
+    title: str
+    note: str
+
+
+class Draft(TypedDict):
+    company: str
+    contact_name: str
+    contact_email: str
+    tone: str
+    draft_content: str
+    intent: str
+
+
+class OutgoingEmail(TypedDict):
+    id: int
+    company: str
+    contact_name: str
+    contact_email: str
+    draft_content: str
+    message_id: str
+
+
+class SMTPSettings(TypedDict):
+    host: str
+    port: int
+    username: Optional[str]
+    password: Optional[str]
+    # "starttls", "ssl" or "none"
+    security: str
+    sender: str
+    sender_name: Optional[str]
+
+
+class SendResult(TypedDict):
+    draft_id: int
+    # "sent", "deferred" (temporary failure, retried later) or "failed"
+    outcome: str
+    error: Optional[str]
+    # When the outcome was journaled; becomes send_log.sent_at
+    finished_at: datetime
+
+
+class IncomingReply(TypedDict):
+    message_id: str
+    # In-Reply-To and References, plus the Message-ID a bounce reports on
+    in_reply_to: List[str]
+    from_email: str
+    subject: str
+    received_at: Optional[datetime]
+    # "positive", "neutral", "decline", "auto_reply" or "bounce"
+    reply_type: str
+    reply_text: str
+
+
 def get_empty_enriched_company() -> EnrichedCompany:
     return EnrichedCompany(
         summary="",
@@ -37,3 +97,20 @@ def get_empty_enriched_company() -> EnrichedCompany:
         linkedin_company_url="",
         linkedin_search_links=[],
     )
+
+
+def enriched_company_json_schema() -> Dict[str, Any]:
+    # Strict JSON-schema mode requires every property to be listed as required
+    # and no additional properties.
+    properties: Dict[str, Any] = {}
+    for field, hint in get_type_hints(EnrichedCompany).items():
+        if get_origin(hint) is list:
+            properties[field] = {"type": "array", "items": {"type": "string"}}
+        else:
+            properties[field] = {"type": "string"}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
@@ -1,2 +1,29 @@
 def prettify_column_names(columns: list[str]) -> list[str]:
     return [col.replace("_", " ").title() for col in columns]
+
+
+def strip_code_fence(content: str) -> str:
+    # Models sometimes wrap JSON in ```json ... ``` even when asked not to
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def split_list_sql(expr: str) -> str:
+    # SQL turning comma-separated text into VARCHAR[]: items are trimmed,
+    # empty items dropped, and NULL or blank text stays NULL
+    return (
+        f"list_filter(list_transform(string_split(NULLIF(trim({expr}), ''), ','), "
+        "x -> trim(x)), x -> x <> '')"
+    )
+
+
+def normalize_list_text(value: object) -> object:
+    # Canonical form of a list cell for hashing, so 'a,b' and 'a, b' match
+    if value is None:
+        return None
+    items = value if isinstance(value, list) else str(value).split(",")
+    return "\x1e".join(item for item in (str(i).strip() for i in items) if item)
@@ -1,2 +1,5 @@
 TABLE_PROCESSED_COMPANIES = "processed_companies"
 TABLE_COMPANY_RESEARCH = "company_research"
+
+# processed_companies columns stored as VARCHAR[] (comma-separated in the sheet)
+LIST_COLUMNS = ["tags", "investors", "linkedin_search_links"]
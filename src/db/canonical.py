@@ -0,0 +1,455 @@
+# src/db/canonical.py
+#
+# Company-name canonicalization. Sheet names are reduced to a key (case,
+# accents, punctuation, legal suffixes and domains stripped), so "Acme",
+# "Acme Inc." and "acme.io" share one. Keys that differ only slightly are
+# matched through a trigram index (company_keys / company_key_trigrams) and
+# grouped under one canonical company in company_aliases.
+#
+# Enrichment only runs for canonical companies; its results are copied to
+# the aliases. Groups formed by similarity rather than an identical key are
+# listed by `python -m src.cli aliases` for review, and can be split or
+# merged by hand (method 'manual'). A sync only groups names it hasn't seen,
+# so earlier decisions stand until a name or its canonical leaves the sheet.
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import duckdb
+import pyarrow as pa
+
+from src.common.models import EnrichedCompany
+from src.log import get_logger
+
+logger = get_logger("canonical")
+
+# Jaccard similarity of two keys' trigrams needed to group them
+COMPANY_SIMILARITY_THRESHOLD = float(os.getenv("COMPANY_SIMILARITY_THRESHOLD", 0.8))
+# Trigrams shared by more keys than this are too common to find candidates
+COMPANY_TRIGRAM_MAX_KEYS = int(os.getenv("COMPANY_TRIGRAM_MAX_KEYS", 500))
+
+LEGAL_SUFFIXES = [
+    "inc", "incorporated", "llc", "l l c", "ltd", "limited", "corp",
+    "corporation", "co", "company", "gmbh", "ag", "sa", "s a", "sas", "bv",
+    "b v", "nv", "n v", "plc", "pte", "pty", "srl", "spa", "oy", "ab", "kk",
+    "lp", "llp", "group", "holding", "holdings",
+]
+
+ENRICHED_COLUMNS: List[str] = list(EnrichedCompany.__annotations__)
+
+# Unprocessed companies enrichment should run for: every company except the
+# aliases of another one
+
+
+def not_alias_sql(company: str) -> str:
+    # True unless `company` is grouped under another canonical company
+    return f"""NOT EXISTS (
+  SELECT 1 FROM company_aliases a
+  WHERE a.alias = {company} AND a.canonical <> a.alias
+)"""
+
+
+PENDING_COMPANIES_SQL = f"""
+SELECT company FROM processed_companies p
+WHERE NOT company_processed AND {not_alias_sql("p.company")}
+"""
+
+ALIAS_SCHEMA = pa.schema(
+    [
+        ("alias", pa.string()),
+        ("alias_key", pa.string()),
+        ("canonical", pa.string()),
+        ("method", pa.string()),
+        ("similarity", pa.float64()),
+    ]
+)
+
+
+def canonical_key_sql(expr: str) -> str:
+    # SQL for the key of a company name:
+    #   "https://www.Acme.io/about" -> "acme"
+    #   "The Acme Company, Inc."    -> "acme"
+    #   "Société Générale S.A."     -> "societegenerale"
+    # A name that is nothing but a suffix ("Inc.") keeps it as its key.
+    name = f"lower(strip_accents(trim({expr})))"
+    name = f"regexp_replace(regexp_replace({name}, '^[a-z]+://', ''), '^www\\.', '')"
+    # Domains keep their registered label: "app.acme.co.uk/x" -> "acme"
+    domain = (
+        f"regexp_extract(regexp_replace(regexp_replace({name}, '/.*$', ''), "
+        "'(\\.[a-z]{2,3})?\\.[a-z]{2,}$', ''), '([a-z0-9-]+)$', 1)"
+    )
+    name = (
+        f"CASE WHEN regexp_matches({name}, '^[a-z0-9-]+(\\.[a-z0-9-]+)+(/.*)?$') "
+        f"THEN {domain} ELSE {name} END"
+    )
+    name = f"trim(regexp_replace(replace({name}, '&', ' and '), '[^a-z0-9]+', ' ', 'g'))"
+    suffixes = "|".join(LEGAL_SUFFIXES)
+    name = f"regexp_replace(regexp_replace({name}, '^the ', ''), '( ({suffixes}))+$', '')"
+    return f"replace({name}, ' ', '')"
+
+
+def trigrams_sql(expr: str) -> str:
+    return (
+        f"list_distinct(list_transform(range(1, length({expr}) + 2), "
+        f"i -> substr('  ' || {expr} || ' ', i, 3)))"
+    )
+
+
+def digits_sql(expr: str) -> str:
+    # "Acme 2" and "Acme 3" are different companies however similar they look
+    return f"regexp_replace({expr}, '[^0-9]', '', 'g')"
+
+
+def _forget_removed(con: duckdb.DuckDBPyConnection) -> None:
+    # Names gone from the sheet, and groups whose canonical is gone (their
+    # other members are regrouped as new names)
+    con.execute(
+        """
+        DELETE FROM company_aliases
+        WHERE alias NOT IN (SELECT company FROM processed_companies)
+           OR canonical NOT IN (SELECT company FROM processed_companies)
+        """
+    )
+    con.execute(
+        """
+        DELETE FROM company_key_trigrams
+        WHERE alias_key NOT IN (SELECT alias_key FROM company_aliases)
+        """
+    )
+    con.execute(
+        """
+        DELETE FROM company_keys
+        WHERE alias_key NOT IN (SELECT alias_key FROM company_aliases)
+        """
+    )
+
+
+def _index_new_keys(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute(
+        f"""
+        INSERT INTO company_keys (alias_key, digits, trigrams)
+        SELECT alias_key, {digits_sql("alias_key")}, {trigrams_sql("alias_key")}
+        FROM (SELECT DISTINCT alias_key FROM new_aliases)
+        WHERE alias_key NOT IN (SELECT alias_key FROM company_keys)
+        """
+    )
+    con.execute(
+        """
+        INSERT INTO company_key_trigrams (trigram, digits, alias_key)
+        SELECT unnest(trigrams), digits, alias_key FROM company_keys
+        WHERE alias_key IN (SELECT alias_key FROM new_aliases)
+        """
+    )
+
+
+def _similar_keys(
+    con: duckdb.DuckDBPyConnection, threshold: float, max_keys: int
+) -> List[Tuple[str, str, float]]:
+    # Candidates share an uncommon trigram and the same digits; the length
+    # check drops pairs that could never reach the threshold
+    return con.execute(
+        """
+        WITH probe AS (
+          SELECT * FROM company_key_trigrams
+          WHERE alias_key IN (SELECT alias_key FROM new_aliases)
+        ),
+        common AS (
+          SELECT trigram FROM company_key_trigrams
+          WHERE trigram IN (SELECT trigram FROM probe)
+          GROUP BY trigram HAVING COUNT(*) > ?
+        ),
+        candidates AS (
+          SELECT DISTINCT p.alias_key AS key_a, t.alias_key AS key_b
+          FROM probe p
+          JOIN company_key_trigrams t
+            ON t.trigram = p.trigram AND t.digits = p.digits
+           AND t.alias_key <> p.alias_key
+          WHERE p.trigram NOT IN (SELECT trigram FROM common)
+        )
+        SELECT key_a, key_b, similarity FROM (
+          SELECT c.key_a, c.key_b,
+                 len(list_intersect(a.trigrams, b.trigrams))
+                   / (len(a.trigrams) + len(b.trigrams)
+                      - len(list_intersect(a.trigrams, b.trigrams))) AS similarity
+          FROM candidates c
+          JOIN company_keys a ON a.alias_key = c.key_a
+          JOIN company_keys b ON b.alias_key = c.key_b
+          WHERE least(len(a.trigrams), len(b.trigrams))
+                >= ? * greatest(len(a.trigrams), len(b.trigrams))
+        )
+        WHERE similarity >= ?
+        ORDER BY key_a, key_b
+        """,
+        [max_keys, threshold, threshold],
+    ).fetchall()
+
+
+def _preferred_canonical(members: List[Tuple[str, bool]]) -> str:
+    # An already enriched name, then one that isn't a domain, then the shortest
+    return min(members, key=lambda m: (not m[1], "." in m[0], len(m[0]), m[0]))[0]
+
+
+def _group_new_names(
+    con: duckdb.DuckDBPyConnection, pairs: List[Tuple[str, str, float]]
+) -> List[Dict[str, Any]]:
+    # Only new names with a partner (a similar key, or another new name with
+    # the same key) are grouped here; the rest are their own canonical
+    linked = sorted({key for pair in pairs for key in pair[:2]})
+    names: Dict[str, List[Tuple[str, bool]]] = {}
+    for alias, key, processed in con.execute(
+        """
+        SELECT alias, alias_key, processed FROM new_aliases
+        WHERE list_contains(?, alias_key) OR alias_key IN (
+          SELECT alias_key FROM new_aliases GROUP BY alias_key HAVING COUNT(*) > 1
+        )
+        ORDER BY alias
+        """,
+        [linked],
+    ).fetchall():
+        names.setdefault(key, []).append((alias, bool(processed)))
+    existing = dict(
+        con.execute(
+            """
+            SELECT alias_key, min(canonical) FROM company_aliases
+            WHERE list_contains(?, alias_key)
+            GROUP BY alias_key
+            """,
+            [linked],
+        ).fetchall()
+    )
+
+    # Union-find over the new keys; links to existing groups are kept aside
+    parent = {key: key for key in names}
+
+    def find(key: str) -> str:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    best_link: Dict[str, float] = {}
+    joins: Dict[str, Tuple[float, str]] = {}
+    for key_a, key_b, similarity in pairs:
+        best_link[key_a] = max(best_link.get(key_a, 0.0), similarity)
+        if key_b in names:
+            parent[find(key_a)] = find(key_b)
+        elif key_b in existing:
+            joins[key_a] = max(joins.get(key_a, (0.0, "")), (similarity, existing[key_b]))
+
+    components: Dict[str, List[str]] = {}
+    for key in names:
+        components.setdefault(find(key), []).append(key)
+
+    rows: List[Dict[str, Any]] = []
+    for keys in components.values():
+        links = [joins[key] for key in keys if key in joins]
+        if links:
+            canonical = max(links)[1]
+            canonical_key: Optional[str] = None
+        else:
+            members = [member for key in keys for member in names[key]]
+            canonical = _preferred_canonical(members)
+            canonical_key = next(k for k in keys if canonical in dict(names[k]))
+        for key in keys:
+            for alias, _ in names[key]:
+                if alias == canonical:
+                    method, similarity = "canonical", 1.0
+                elif key == canonical_key:
+                    method, similarity = "exact", 1.0
+                else:
+                    method, similarity = "similar", best_link.get(key, 0.0)
+                rows.append(
+                    {
+                        "alias": alias,
+                        "alias_key": key,
+                        "canonical": canonical,
+                        "method": method,
+                        "similarity": similarity,
+                    }
+                )
+    return rows
+
+
+def refresh_company_aliases(
+    con: duckdb.DuckDBPyConnection,
+    threshold: float = COMPANY_SIMILARITY_THRESHOLD,
+    max_keys: int = COMPANY_TRIGRAM_MAX_KEYS,
+) -> Dict[str, int]:
+    # Runs inside the sync transaction, after processed_companies changed.
+    # Only names not grouped yet are looked at, so the cost follows the
+    # sheet delta rather than the sheet size.
+    _forget_removed(con)
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE new_aliases AS
+        SELECT company AS alias, {canonical_key_sql("company")} AS alias_key,
+               company_processed AS processed
+        FROM processed_companies p
+        WHERE NOT EXISTS (SELECT 1 FROM company_aliases a WHERE a.alias = p.company)
+        """
+    )
+    try:
+        # A new spelling of a key that already has a group joins it directly
+        (exact,) = con.execute(
+            """
+            INSERT INTO company_aliases (alias, alias_key, canonical, method, similarity)
+            SELECT n.alias, n.alias_key, g.canonical, 'exact', 1.0
+            FROM new_aliases n
+            JOIN (
+              SELECT alias_key, min(canonical) AS canonical FROM company_aliases
+              GROUP BY alias_key
+            ) g ON g.alias_key = n.alias_key
+            """
+        ).fetchone()  # type: ignore
+        con.execute(
+            "DELETE FROM new_aliases WHERE alias IN (SELECT alias FROM company_aliases)"
+        )
+        _index_new_keys(con)
+        rows = _group_new_names(con, _similar_keys(con, threshold, max_keys))
+        if rows:
+            con.register("alias_batch", pa.Table.from_pylist(rows, schema=ALIAS_SCHEMA))
+            try:
+                con.execute(
+                    """
+                    INSERT INTO company_aliases (alias, alias_key, canonical, method, similarity)
+                    SELECT alias, alias_key, canonical, method, similarity FROM alias_batch
+                    """
+                )
+            finally:
+                con.unregister("alias_batch")
+        (single,) = con.execute(
+            """
+            INSERT INTO company_aliases (alias, alias_key, canonical, method, similarity)
+            SELECT alias, alias_key, alias, 'canonical', 1.0 FROM new_aliases
+            WHERE alias NOT IN (SELECT alias FROM company_aliases)
+            """
+        ).fetchone()  # type: ignore
+    finally:
+        con.execute("DROP TABLE IF EXISTS new_aliases")
+    fanned_out = fan_out_enrichment(con)
+
+    counts = {
+        "new": exact + len(rows) + single,
+        "exact": exact + sum(row["method"] == "exact" for row in rows),
+        "similar": sum(row["method"] == "similar" for row in rows),
+        "fanned_out": fanned_out,
+    }
+    if counts["new"]:
+        logger.info(
+            "[ALIASES] %s new names: %s share a key with another name, %s grouped by similarity",
+            counts["new"],
+            counts["exact"],
+            counts["similar"],
+        )
+    if counts["similar"]:
+        logger.info("[ALIASES] Review similarity groups with `python -m src.cli aliases`")
+    return counts
+
+
+def fan_out_enrichment(
+    con: duckdb.DuckDBPyConnection, canonicals: Optional[List[str]] = None
+) -> int:
+    # Copies a canonical company's enrichment onto its aliases: those of the
+    # given canonicals (just enriched), or else every alias still unprocessed
+    # whose canonical has been enriched
+    assignments = ",\n          ".join(f"{c} = c.{c}" for c in ENRICHED_COLUMNS)
+    if canonicals is None:
+        where, params = "NOT processed_companies.company_processed", []
+    else:
+        where, params = "list_contains(?, a.canonical)", [canonicals]
+    (updated,) = con.execute(
+        f"""
+        UPDATE processed_companies SET
+          {assignments},
+          company_processed = TRUE,
+          last_updated = CURRENT_TIMESTAMP
+        FROM company_aliases a
+        JOIN processed_companies c ON c.company = a.canonical
+        WHERE processed_companies.company = a.alias
+          AND a.alias <> a.canonical
+          AND c.company_processed
+          AND {where}
+        """,
+        params,
+    ).fetchone()  # type: ignore
+    return updated
+
+
+def merged_groups(
+    con: duckdb.DuckDBPyConnection, include_exact: bool = False
+) -> List[Dict[str, Any]]:
+    # Groups with more than one name, least certain first
+    having = "COUNT(*) > 1"
+    if not include_exact:
+        having += " AND bool_or(method IN ('similar', 'manual'))"
+    rows = con.execute(
+        f"""
+        SELECT canonical,
+               list({{'alias': alias, 'method': method, 'similarity': similarity}}
+                    ORDER BY similarity, alias),
+               min(similarity)
+        FROM company_aliases
+        GROUP BY canonical
+        HAVING {having}
+        ORDER BY min(similarity), canonical
+        """
+    ).fetchall()
+    return [
+        {
+            "canonical": canonical,
+            "aliases": [m for m in members if m["alias"] != canonical],
+            "min_similarity": similarity,
+        }
+        for canonical, members, similarity in rows
+    ]
+
+
+def format_groups(groups: List[Dict[str, Any]]) -> str:
+    if not groups:
+        return "No merged company names to review"
+    lines = []
+    for group in groups:
+        lines.append(group["canonical"])
+        for alias in group["aliases"]:
+            lines.append(
+                f"  <- {alias['alias']} ({alias['method']}, {alias['similarity']:.2f})"
+            )
+    return "\n".join(lines)
+
+
+def split_alias(con: duckdb.DuckDBPyConnection, alias: str) -> bool:
+    # The name becomes its own company and is enriched separately
+    (updated,) = con.execute(
+        """
+        UPDATE company_aliases SET canonical = alias, method = 'manual', similarity = 1.0
+        WHERE alias = ?
+        """,
+        [alias],
+    ).fetchone()  # type: ignore
+    if updated:
+        con.execute(
+            "UPDATE processed_companies SET company_processed = FALSE WHERE company = ?",
+            [alias],
+        )
+    return bool(updated)
+
+
+def merge_alias(con: duckdb.DuckDBPyConnection, alias: str, canonical: str) -> bool:
+    # Groups can't nest: merging into an alias merges into its canonical
+    row = con.execute(
+        "SELECT canonical FROM company_aliases WHERE alias = ?", [canonical]
+    ).fetchone()
+    if row is None or row[0] is None:
+        return False
+    (updated,) = con.execute(
+        """
+        UPDATE company_aliases SET
+          canonical = ?,
+          method = CASE WHEN alias = ? THEN 'manual' ELSE method END,
+          similarity = CASE WHEN alias = ? THEN 1.0 ELSE similarity END
+        WHERE alias = ? OR canonical = ?
+        """,
+        [row[0], alias, alias, alias, alias],
+    ).fetchone()  # type: ignore
+    if updated:
+        fan_out_enrichment(con, [row[0]])
+    return bool(updated)
@@ -0,0 +1,88 @@
+# src/db/connection.py
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import duckdb
+
+# ~/.scout holds the database and every other local artifact
+SCOUT_DIR = Path(os.getenv("SCOUT_DIR", str(Path.home() / ".scout")))
+
+# Path to the DuckDB database file
+DB_PATH = Path(os.getenv("SCOUT_DB_PATH", str(SCOUT_DIR / "scout.db")))
+
+MEMORY_DB = ":memory:"
+
+_db_path: Union[Path, str] = DB_PATH
+_read_only = False
+_parent: Optional[duckdb.DuckDBPyConnection] = None
+_generation = 0
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# Point the manager at another database (e.g. ":memory:" or a temp file for
+# tests). Any open connection is closed and the next cursor reopens lazily.
+def configure(path: Union[Path, str] = DB_PATH, read_only: bool = False) -> None:
+    global _db_path, _read_only
+
+    close()
+    with _lock:
+        _db_path = path
+        _read_only = read_only
+
+
+def get_db_path() -> Union[Path, str]:
+    return _db_path
+
+
+def get_connection() -> duckdb.DuckDBPyConnection:
+    global _parent
+
+    with _lock:
+        if _parent is None:
+            if _db_path != MEMORY_DB:
+                Path(_db_path).parent.mkdir(parents=True, exist_ok=True)
+            _parent = duckdb.connect(str(_db_path), read_only=_read_only)  # type: ignore
+        return _parent
+
+
+def get_cursor() -> duckdb.DuckDBPyConnection:
+    # DuckDB connections are not safe to share across threads, so each
+    # thread gets its own cursor on the single parent connection.
+    cursor = getattr(_local, "cursor", None)
+    if cursor is None or getattr(_local, "generation", None) != _generation:
+        cursor = get_connection().cursor()
+        _local.cursor = cursor
+        _local.generation = _generation
+    return cursor
+
+
+@contextmanager
+def transaction(
+    con: Optional[duckdb.DuckDBPyConnection] = None,
+) -> Iterator[duckdb.DuckDBPyConnection]:
+    # On the given connection, else this thread's cursor
+    cursor = con if con is not None else get_cursor()
+    cursor.begin()
+    try:
+        yield cursor
+    except BaseException:
+        cursor.rollback()
+        raise
+    else:
+        cursor.commit()
+
+
+def close() -> None:
+    global _parent, _generation
+
+    with _lock:
+        if _parent is not None:
+            _parent.close()
+            _parent = None
+        # Invalidate per-thread cursors opened on the old connection
+        _generation += 1
+        _local.__dict__.clear()
@@ -0,0 +1,95 @@
+# src/db/contacts.py
+import os
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+import pyarrow as pa
+
+from src.common.models import Contact
+from src.db.connection import get_cursor, transaction
+from src.db.writer import BatchWriter
+
+# Companies per flush; each brings a handful of contacts
+CONTACTS_FLUSH_SIZE = int(os.getenv("CONTACTS_FLUSH_SIZE", 100))
+CONTACTS_FLUSH_INTERVAL = float(os.getenv("CONTACTS_FLUSH_INTERVAL", 5.0))
+
+CONTACT_COLUMNS: List[str] = list(Contact.__annotations__)
+
+
+def load_known_linkedin_urls() -> Dict[str, str]:
+    # One query up front instead of a lookup per discovered person
+    rows = get_cursor().execute(
+        """
+        SELECT contact_linkedin_url, contact_email FROM company_contacts
+        WHERE contact_linkedin_url IS NOT NULL
+        """
+    ).fetchall()
+    return dict(rows)
+
+
+def apply_contacts_batch(
+    con: duckdb.DuckDBPyConnection, contacts: List[Contact], companies: List[str]
+) -> int:
+    if not contacts and not companies:
+        return 0
+
+    batch = pa.table(
+        {col: [c.get(col) for c in contacts] for col in CONTACT_COLUMNS},
+        schema=pa.schema([(col, pa.string()) for col in CONTACT_COLUMNS]),
+    )
+    column_names = ", ".join(CONTACT_COLUMNS)
+    con.register("contacts_batch", batch)
+    try:
+        with transaction(con):
+            # A person found again keeps their company and fills in whatever
+            # details were missing before; a blank title or note (parse_contacts
+            # stores "" for missing ones) never replaces a stored one.
+            con.execute(
+                f"""
+                INSERT INTO company_contacts ({column_names})
+                SELECT {column_names} FROM contacts_batch
+                ON CONFLICT (contact_email) DO UPDATE SET
+                  contact_name = COALESCE(company_contacts.contact_name, excluded.contact_name),
+                  contact_linkedin_url = COALESCE(company_contacts.contact_linkedin_url, excluded.contact_linkedin_url),
+                  title = COALESCE(NULLIF(excluded.title, ''), company_contacts.title),
+                  note = COALESCE(NULLIF(excluded.note, ''), company_contacts.note)
+                """
+            )
+            if companies:
+                con.execute(
+                    """
+                    UPDATE processed_companies SET contacts_discovered_at = CURRENT_TIMESTAMP
+                    WHERE list_contains(?, company)
+                    """,
+                    [companies],
+                )
+    finally:
+        con.unregister("contacts_batch")
+    return len(contacts)
+
+
+def apply_contact_results(
+    con: duckdb.DuckDBPyConnection, results: List[Tuple[str, List[Contact]]]
+) -> int:
+    # Keyed by email, so the batch never carries the same primary key twice
+    contacts: Dict[str, Contact] = {}
+    for _, found in results:
+        for contact in found:
+            contacts.setdefault(contact["contact_email"], contact)
+    return apply_contacts_batch(
+        con, list(contacts.values()), [company for company, _ in results]
+    )
+
+
+class ContactWriter(BatchWriter[Tuple[str, List[Contact]]]):
+    # Buffers one (company, contacts) result per discovered company
+    def __init__(
+        self,
+        con: Optional[duckdb.DuckDBPyConnection] = None,
+        flush_size: int = CONTACTS_FLUSH_SIZE,
+        flush_interval: float = CONTACTS_FLUSH_INTERVAL,
+    ):
+        super().__init__(apply_contact_results, "contacts", con, flush_size, flush_interval)
+
+    def add(self, company: str, contacts: List[Contact]) -> None:
+        self.put((company, contacts))
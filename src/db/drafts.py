@@ -0,0 +1,67 @@
+# src/db/drafts.py
+import os
+from typing import List, Optional
+
+import duckdb
+import pyarrow as pa
+
+from src.common.models import Draft
+from src.db.connection import transaction
+from src.db.writer import BatchWriter
+
+DRAFTS_FLUSH_SIZE = int(os.getenv("DRAFTS_FLUSH_SIZE", 500))
+DRAFTS_FLUSH_INTERVAL = float(os.getenv("DRAFTS_FLUSH_INTERVAL", 5.0))
+
+DRAFT_COLUMNS: List[str] = list(Draft.__annotations__)
+
+
+def apply_drafts_batch(con: duckdb.DuckDBPyConnection, drafts: List[Draft]) -> int:
+    if not drafts:
+        return 0
+
+    columns = {col: [d[col] for d in drafts] for col in DRAFT_COLUMNS}  # type: ignore
+    columns["_seq"] = list(range(len(drafts)))
+    batch = pa.table(
+        columns,
+        schema=pa.schema([(col, pa.string()) for col in DRAFT_COLUMNS] + [("_seq", pa.int64())]),
+    )
+    column_names = ", ".join(DRAFT_COLUMNS)
+    con.register("drafts_batch", batch)
+    try:
+        with transaction(con):
+            # Versions continue from each contact's current maximum; the window
+            # numbers several drafts for one contact within the batch, so
+            # idx_drafts_contact_version never sees a collision.
+            con.execute(
+                f"""
+                INSERT INTO email_drafts ({column_names}, draft_version, status)
+                SELECT {", ".join(f"b.{c}" for c in DRAFT_COLUMNS)},
+                       COALESCE(v.max_version, 0)
+                         + row_number() OVER (PARTITION BY b.contact_email ORDER BY b._seq),
+                       'pending_review'
+                FROM drafts_batch b
+                LEFT JOIN (
+                  SELECT contact_email, MAX(draft_version) AS max_version
+                  FROM email_drafts
+                  WHERE contact_email IN (SELECT contact_email FROM drafts_batch)
+                  GROUP BY contact_email
+                ) v ON v.contact_email = b.contact_email
+                """
+            )
+    finally:
+        con.unregister("drafts_batch")
+    return len(drafts)
+
+
+class DraftWriter(BatchWriter[Draft]):
+    # Unkeyed, so several drafts for one contact keep their order and versions
+    def __init__(
+        self,
+        con: Optional[duckdb.DuckDBPyConnection] = None,
+        flush_size: int = DRAFTS_FLUSH_SIZE,
+        flush_interval: float = DRAFTS_FLUSH_INTERVAL,
+    ):
+        super().__init__(apply_drafts_batch, "drafts", con, flush_size, flush_interval)
+
+    def add(self, draft: Draft) -> None:
+        self.put(draft)
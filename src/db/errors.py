@@ -0,0 +1,28 @@
+# src/db/errors.py
+from typing import Optional
+
+from src.db.connection import get_cursor
+from src.log import get_logger
+
+logger = get_logger("api_errors")
+
+
+def log_api_error(
+    stage: str,
+    error: object,
+    company: Optional[str] = None,
+    contact_email: Optional[str] = None,
+) -> None:
+    logger.error(
+        "[%s] %s: %s", stage.upper(), company or contact_email or "-", error
+    )
+    try:
+        get_cursor().execute(
+            """
+            INSERT INTO api_errors_log (stage, company, contact_email, error_message)
+            VALUES (?, ?, ?, ?)
+            """,
+            [stage, company, contact_email, str(error)],
+        )
+    except Exception as e:
+        logger.error("[ERRORS] Could not record error in api_errors_log: %s", e)
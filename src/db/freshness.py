@@ -0,0 +1,161 @@
+# src/db/freshness.py
+#
+# Field-level freshness of enriched companies. Every enrichment write stamps
+# the fields it set in processed_companies.field_refreshed_at (src.db.writer).
+# Each of the six enrichment questions is a topic with its own TTL, and a
+# topic is stale once its oldest field is older than that. Fields without a
+# timestamp (enriched before there were any) count from last_updated.
+#
+# The refresh plan ranks canonical companies by how overdue their stale
+# topics are, weighted up while drafts to them wait to be reviewed or sent,
+# and takes them in that order while the calls they cost (one per stale
+# question plus the synthesis) fit in what is left of the day's budget.
+import os
+from typing import Any, Dict, List, Optional
+
+import duckdb
+
+from src.common.models import EnrichedCompany
+
+DAY_SECONDS = 24 * 60 * 60
+
+# The six enrichment questions, in build_questions order, and the
+# EnrichedCompany fields each one feeds
+TOPIC_FIELDS: Dict[str, List[str]] = {
+    "product": ["summary", "product", "tags", "alignment_reason"],
+    "news": ["recent_news", "suggested_opener"],
+    "funding": ["investors", "funding_stage"],
+    "tech": ["technologies_used"],
+    "outreach": ["ideal_roles", "tone_advice"],
+    "industry": ["industry", "website_url", "linkedin_company_url", "linkedin_search_links"],
+}
+TOPICS: List[str] = list(TOPIC_FIELDS)
+
+# Overridden per topic with FRESHNESS_TTL_<TOPIC>_DAYS, e.g. FRESHNESS_TTL_NEWS_DAYS=3
+DEFAULT_TTL_DAYS = {
+    "product": 180,
+    "news": 7,
+    "funding": 30,
+    "tech": 90,
+    "outreach": 90,
+    "industry": 365,
+}
+TOPIC_TTL_DAYS: Dict[str, float] = {
+    topic: float(os.getenv(f"FRESHNESS_TTL_{topic.upper()}_DAYS", days))
+    for topic, days in DEFAULT_TTL_DAYS.items()
+}
+
+# API calls (questions + syntheses) refresh runs may spend per day
+REFRESH_DAILY_CALL_BUDGET = int(os.getenv("REFRESH_DAILY_CALL_BUDGET", 500))
+# Staleness multiplier for companies with drafts waiting to be reviewed or sent
+REFRESH_OUTREACH_WEIGHT = float(os.getenv("REFRESH_OUTREACH_WEIGHT", 3.0))
+
+
+def topic_ttl_seconds(topic: str) -> int:
+    return int(TOPIC_TTL_DAYS[topic] * DAY_SECONDS)
+
+
+def topic_overdue_sql() -> str:
+    # One column per topic: the age of its oldest field over its TTL (all
+    # values are our own constants). `now` is naive like the stored
+    # timestamps, so rows need no time zone conversion
+    columns = []
+    for topic, fields in TOPIC_FIELDS.items():
+        refreshed = ", ".join(
+            f"COALESCE(p.field_refreshed_at.{field}, p.last_updated)" for field in fields
+        )
+        columns.append(
+            f"epoch(now - least({refreshed})) / {topic_ttl_seconds(topic)} AS {topic}"
+        )
+    return ",\n                   ".join(columns)
+
+
+def plan_refresh(
+    con: duckdb.DuckDBPyConnection, budget: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    # Most overdue first; with a budget, the longest prefix whose calls fit
+    within_budget = ""
+    params: List[Any] = [REFRESH_OUTREACH_WEIGHT]
+    if budget is not None:
+        within_budget = """
+        QUALIFY sum(calls) OVER (
+          ORDER BY priority DESC, company ROWS UNBOUNDED PRECEDING
+        ) <= ?"""
+        params.append(budget)
+    stale_topics = ", ".join(f"CASE WHEN {t} >= 1 THEN '{t}' END" for t in TOPICS)
+    overdue = " + ".join(f"CASE WHEN {t} >= 1 THEN {t} ELSE 0 END" for t in TOPICS)
+    rows = con.execute(
+        f"""
+        WITH stale AS (
+          SELECT company,
+                 string_split(concat_ws(',', {stale_topics}), ',') AS topics,
+                 {overdue} AS overdue
+          FROM (
+            SELECT p.company,
+                   {topic_overdue_sql()}
+            FROM processed_companies p,
+                 (SELECT CAST(CURRENT_TIMESTAMP AS TIMESTAMP) AS now)
+            WHERE p.company_processed AND NOT EXISTS (
+              SELECT 1 FROM company_aliases a
+              WHERE a.alias = p.company AND a.canonical <> a.alias
+            )
+          )
+          WHERE greatest({", ".join(TOPICS)}) >= 1
+        ),
+        outreach AS (
+          SELECT DISTINCT COALESCE(a.canonical, d.company) AS company
+          FROM email_drafts d
+          LEFT JOIN company_aliases a ON a.alias = d.company
+          WHERE d.status IN ('pending_review', 'approved')
+        ),
+        ranked AS (
+          SELECT s.company, s.topics, len(s.topics) + 1 AS calls,
+                 s.overdue * CASE WHEN o.company IS NULL THEN 1 ELSE ? END AS priority
+          FROM stale s
+          LEFT JOIN outreach o ON o.company = s.company
+        )
+        SELECT company, topics, calls, priority
+        FROM ranked
+        {within_budget}
+        ORDER BY priority DESC, company
+        """,
+        params,
+    ).fetchall()
+    return [
+        {"company": company, "topics": topics, "calls": calls, "priority": round(priority, 3)}
+        for company, topics, calls, priority in rows
+    ]
+
+
+def enriched_rows(
+    con: duckdb.DuckDBPyConnection, companies: List[str]
+) -> Dict[str, EnrichedCompany]:
+    columns = list(EnrichedCompany.__annotations__)
+    rows = con.execute(
+        f"""
+        SELECT company, {", ".join(columns)} FROM processed_companies
+        WHERE list_contains(?, company)
+        """,
+        [companies],
+    ).fetchall()
+    return {
+        row[0]: EnrichedCompany(**dict(zip(columns, row[1:])))  # type: ignore
+        for row in rows
+    }
+
+
+def refresh_calls_spent(con: duckdb.DuckDBPyConnection) -> int:
+    row = con.execute(
+        "SELECT calls FROM refresh_budget WHERE day = CURRENT_DATE"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def record_refresh_calls(con: duckdb.DuckDBPyConnection, calls: int) -> None:
+    con.execute(
+        """
+        INSERT INTO refresh_budget (day, calls) VALUES (CURRENT_DATE, ?)
+        ON CONFLICT (day) DO UPDATE SET calls = refresh_budget.calls + excluded.calls
+        """,
+        [calls],
+    )
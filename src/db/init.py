@@ -1,27 +1,42 @@
 # init.py
 
 import duckdb
-from pathlib import Path
 
-# Create the ~/.scout directory
-SCOUT_DIR = Path.home() / ".scout"
-SCOUT_DIR.mkdir(parents=True, exist_ok=True)
+from src.common.models import EnrichedCompany
+from src.common.utils import split_list_sql
+from src.constants.tables import LIST_COLUMNS, TABLE_PROCESSED_COMPANIES
+from src.db.connection import DB_PATH, SCOUT_DIR, get_cursor, get_db_path  # noqa: F401
 
-# Path to the DuckDB database file
-DB_PATH = SCOUT_DIR / "scout.db"
 
-# Connect to the DuckDB database
-con: duckdb.DuckDBPyConnection = duckdb.connect(str(DB_PATH))  # type: ignore
+def migrate_list_columns(con: duckdb.DuckDBPyConnection) -> None:
+    # Databases created before the LIST columns kept these as comma-joined
+    # TEXT; convert them in place.
+    types = dict(
+        con.execute(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?",
+            [TABLE_PROCESSED_COMPANIES],
+        ).fetchall()
+    )
+    for col in LIST_COLUMNS:
+        if types.get(col) == "VARCHAR":
+            con.execute(
+                f"ALTER TABLE {TABLE_PROCESSED_COMPANIES} ALTER {col} "
+                f"TYPE VARCHAR[] USING ({split_list_sql(col)})"
+            )
+            print(f"🔁 Migrated {TABLE_PROCESSED_COMPANIES}.{col} to VARCHAR[]")
 
 
 def init_tables():
+    con = get_cursor()
+
     con.execute(
         """
     CREATE TABLE IF NOT EXISTS company_research (
       company TEXT PRIMARY KEY,
       company_info TEXT,
       contact_info TEXT,
-      last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+      last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      row_hash TEXT
     );
     """
     )
@@ -32,8 +47,8 @@ def init_tables():
       company TEXT PRIMARY KEY,
       summary TEXT,
       product TEXT,
-      tags TEXT,
-      investors TEXT,
+      tags VARCHAR[],
+      investors VARCHAR[],
       ideal_roles TEXT,
       recent_news TEXT,
       tone_advice TEXT,
@@ -44,14 +59,36 @@ def init_tables():
       website_url TEXT,
       industry TEXT,
       linkedin_company_url TEXT,
-      linkedin_search_links TEXT,
+      linkedin_search_links VARCHAR[],
       company_processed BOOLEAN DEFAULT FALSE,
       last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-      email_generated BOOLEAN DEFAULT FALSE
+      email_generated BOOLEAN DEFAULT FALSE,
+      row_hash TEXT
     );
     """
     )
 
+    migrate_list_columns(con)
+
+    # Fingerprint of the last synced sheet content, added to older databases
+    for table_name in ["company_research", "processed_companies"]:
+        con.execute(
+            f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS row_hash TEXT;"
+        )
+
+    # When each enriched field was last written (src.db.freshness); NULL for
+    # fields set before per-field timestamps existed
+    stamps = ", ".join(f"{field} TIMESTAMP" for field in EnrichedCompany.__annotations__)
+    con.execute(
+        "ALTER TABLE processed_companies ADD COLUMN IF NOT EXISTS "
+        f"field_refreshed_at STRUCT({stamps});"
+    )
+
+    # When contact discovery last ran for the company, even if it found nobody
+    con.execute(
+        "ALTER TABLE processed_companies ADD COLUMN IF NOT EXISTS contacts_discovered_at TIMESTAMP;"
+    )
+
     con.execute(
         """
     CREATE TABLE IF NOT EXISTS company_contacts (
@@ -114,6 +151,24 @@ def init_tables():
     """
     )
 
+    # Send queue (src.db.sends): approved drafts go out once send_date has
+    # passed; message_id is fixed when a draft is first claimed for sending
+    for column in [
+        "send_date TIMESTAMP",
+        "sent_at TIMESTAMP",
+        "message_id TEXT",
+        "send_attempts INTEGER DEFAULT 0",
+        "last_error TEXT",
+    ]:
+        con.execute(f"ALTER TABLE email_drafts ADD COLUMN IF NOT EXISTS {column};")
+
+    con.execute(
+        """
+    CREATE INDEX IF NOT EXISTS idx_drafts_status_send_date
+    ON email_drafts(status, send_date);
+    """
+    )
+
     con.execute(
         """
     CREATE TABLE IF NOT EXISTS replies_log (
@@ -126,6 +181,40 @@ def init_tables():
     """
     )
 
+    # Imported replies (src.db.replies): timestamp is when the row was logged,
+    # received_at the Date of the message itself
+    for column in [
+        "message_id TEXT",
+        "in_reply_to VARCHAR[]",
+        "draft_id BIGINT",
+        "received_at TIMESTAMP",
+    ]:
+        con.execute(f"ALTER TABLE replies_log ADD COLUMN IF NOT EXISTS {column};")
+
+    # How far each mbox has been imported (byte offset)
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS reply_import_state (
+      source TEXT PRIMARY KEY,
+      position BIGINT,
+      fingerprint TEXT,
+      imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    )
+
+    # Maildir files already imported, by the unique part of the file name
+    # (the ":2,<flags>" suffix changes as a mail client reads or flags them)
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS maildir_imported_files (
+      source TEXT,
+      name TEXT,
+      PRIMARY KEY (source, name)
+    );
+    """
+    )
+
     con.execute(
         """
     CREATE TABLE IF NOT EXISTS api_errors_log (
@@ -150,7 +239,176 @@ def init_tables():
     """
     )
 
-    print("✅ All DuckDB tables initialized in:", DB_PATH)
+    # sent_at is when the message went out, logged_at when the row was written
+    for column in [
+        "message_id TEXT",
+        "error TEXT",
+        "logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+    ]:
+        con.execute(f"ALTER TABLE send_log ADD COLUMN IF NOT EXISTS {column};")
+
+    # Last synced revision/checksum per worksheet, so unchanged sheets skip sync
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS sheet_sync_state (
+      sheet_name TEXT PRIMARY KEY,
+      revision TEXT,
+      checksum TEXT,
+      synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    )
+
+    # Summary tables behind `scout report`, refreshed incrementally from the
+    # last_updated / logged_at / timestamp watermarks in report_state
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS report_state (
+      source TEXT PRIMARY KEY,
+      watermark TIMESTAMP,
+      refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    )
+
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS report_companies (
+      company TEXT PRIMARY KEY,
+      industry TEXT,
+      enriched BOOLEAN,
+      tags VARCHAR[]
+    );
+    """
+    )
+
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS report_daily_sends (
+      day DATE,
+      delivery_status TEXT,
+      emails INTEGER,
+      PRIMARY KEY (day, delivery_status)
+    );
+    """
+    )
+
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS report_daily_replies (
+      day DATE,
+      reply_type TEXT,
+      replies INTEGER,
+      PRIMARY KEY (day, reply_type)
+    );
+    """
+    )
+
+    # Contacts who answered (src.db.replies.REPLIED_TYPES), for the response rate
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS report_responded_contacts (
+      contact_email TEXT PRIMARY KEY,
+      first_replied_at TIMESTAMP
+    );
+    """
+    )
+
+    # Durable enrichment queue (src.db.jobs): status is pending, leased,
+    # done or failed; a lease past lease_expires_at goes back to pending
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS enrichment_jobs (
+      company TEXT PRIMARY KEY,
+      status TEXT DEFAULT 'pending',
+      attempts INTEGER DEFAULT 0,
+      lease_owner TEXT,
+      lease_expires_at TIMESTAMP,
+      last_error TEXT,
+      enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    )
+
+    # Company-name canonicalization (src.db.canonical): every sheet name maps
+    # to the canonical company it is enriched as; the key and trigram tables
+    # are the similarity index used to group new names
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS company_aliases (
+      alias TEXT PRIMARY KEY,
+      alias_key TEXT,
+      canonical TEXT,
+      method TEXT,
+      similarity DOUBLE,
+      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    )
+
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS company_keys (
+      alias_key TEXT PRIMARY KEY,
+      digits TEXT,
+      trigrams VARCHAR[]
+    );
+    """
+    )
+
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS company_key_trigrams (
+      trigram TEXT,
+      digits TEXT,
+      alias_key TEXT
+    );
+    """
+    )
+
+    # API calls spent by refresh runs (src.db.freshness) per day
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS refresh_budget (
+      day DATE PRIMARY KEY,
+      calls INTEGER
+    );
+    """
+    )
+
+    # Telemetry written by src.db.telemetry: one row per external API call
+    # and one per timed pipeline step
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS api_calls_log (
+      service TEXT,
+      operation TEXT,
+      model TEXT,
+      started_at TIMESTAMP,
+      duration_ms DOUBLE,
+      prompt_tokens BIGINT,
+      completion_tokens BIGINT,
+      retries BIGINT,
+      outcome TEXT,
+      error TEXT
+    );
+    """
+    )
+
+    con.execute(
+        """
+    CREATE TABLE IF NOT EXISTS stage_timings (
+      stage TEXT,
+      step TEXT,
+      started_at TIMESTAMP,
+      duration_ms DOUBLE,
+      rows BIGINT
+    );
+    """
+    )
+
+    print("✅ All DuckDB tables initialized in:", get_db_path())
 
 
 if __name__ == "__main__":
@@ -1,13 +1,15 @@
-import duckdb
-from typing import List, Dict, Any, Tuple
-from src.db.init import DB_PATH
+import hashlib
+import pyarrow as pa
+from typing import List, Dict, Any, Optional, Tuple
+from src.db.canonical import refresh_company_aliases
+from src.db.connection import get_cursor, transaction
+from src.db.telemetry import stage_timer
 from src.log import get_logger
-from src.common.utils import prettify_column_names
+from src.common.utils import normalize_list_text, prettify_column_names, split_list_sql
+from src.constants.tables import LIST_COLUMNS, TABLE_PROCESSED_COMPANIES
 
 logger = get_logger("insert_ops")
 
-con: duckdb.DuckDBPyConnection = duckdb.connect(str(DB_PATH))  # type: ignore
-
 
 def get_columns_for_table(table_name: str) -> List[str]:
     if table_name == "processed_companies":
@@ -34,7 +36,7 @@ def get_columns_for_table(table_name: str) -> List[str]:
     elif table_name == "company_research":
         return ["company", "company_info", "contact_info"]
     else:
-        logger.error(f"Unknown table name: {table_name}")
+        logger.error("Unknown table name: %s", table_name)
         raise ValueError(f"Unknown table name: {table_name}")
 
 
@@ -62,7 +64,7 @@ def get_comparison_fields_for_table(table_name: str) -> List[str]:
     elif table_name == "company_research":
         return ["company_info", "contact_info"]
     else:
-        logger.error(f"Unknown table name: {table_name}")
+        logger.error("Unknown table name: %s", table_name)
         raise ValueError(f"Unknown table name: {table_name}")
 
 
@@ -72,7 +74,7 @@ def get_primary_key_for_table(table_name: str) -> str:
     elif table_name == "company_research":
         return "Company"
     else:
-        logger.error(f"Unknown table name: {table_name}")
+        logger.error("Unknown table name: %s", table_name)
         raise ValueError(f"Unknown table name: {table_name}")
 
 
@@ -82,75 +84,202 @@ def get_primary_db_key_for_table(table_name: str) -> str:
     elif table_name == "company_research":
         return "company"
     else:
-        logger.error(f"Unknown table name: {table_name}")
+        logger.error("Unknown table name: %s", table_name)
         raise ValueError(f"Unknown table name: {table_name}")
 
 
-def insert_into_table(table_name: str, data: List[Dict[str, Any]]) -> None:
-    if not data:
-        logger.warning(f"[INSERT] No data provided to insert into table: {table_name}")
-        return
+def _to_text(value: Any) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
 
+
+LIST_TITLES = set(prettify_column_names(LIST_COLUMNS))
+
+
+def compute_row_hash(row: Dict[str, Any], field_titles: List[str]) -> str:
+    # Fingerprint of the sheet content for the comparison fields; NULL and ''
+    # hash differently so clearing a cell is still detected. List cells are
+    # hashed item by item, so spacing around commas is not a change.
+    content = "\x1f".join(
+        "\x00" if value is None else value
+        for value in (
+            _to_text(
+                normalize_list_text(row.get(title))
+                if title in LIST_TITLES
+                else row.get(title)
+            )
+            for title in field_titles
+        )
+    )
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+def incoming_to_arrow(
+    table_name: str, data: List[Dict[str, Any]], offset: int = 0
+) -> pa.Table:
     columns = get_columns_for_table(table_name)
-    placeholders = ", ".join(["?"] * len(columns))
-    column_names = ", ".join(columns)
-    query = (
-        f"INSERT OR REPLACE INTO {table_name} ({column_names}) VALUES ({placeholders})"
+    # Sheet rows are keyed by the prettified titles; resolve them once
+    titles = prettify_column_names(columns)
+    hash_titles = prettify_column_names(get_comparison_fields_for_table(table_name))
+    arrays: Dict[str, List[Any]] = {
+        col: [_to_text(row.get(title)) for row in data]
+        for col, title in zip(columns, titles)
+    }
+    arrays["row_hash"] = [compute_row_hash(row, hash_titles) for row in data]
+    arrays["_row_index"] = list(range(offset, offset + len(data)))
+    schema = pa.schema(
+        [(col, pa.string()) for col in columns]
+        + [("row_hash", pa.string()), ("_row_index", pa.int64())]
+    )
+    return pa.table(arrays, schema=schema)
+
+
+def get_column_types(table_name: str) -> Dict[str, str]:
+    con = get_cursor()
+    rows = con.execute(
+        "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?",
+        [table_name],
+    ).fetchall()
+    return {name: data_type for name, data_type in rows}
+
+
+def begin_stage(table_name: str) -> str:
+    # Raw text rows land here chunk by chunk; finish_stage types and dedupes
+    # them once the whole sheet has been read.
+    raw_name = f"{table_name}_raw"
+    columns = ", ".join(
+        f"{col} VARCHAR" for col in get_columns_for_table(table_name) + ["row_hash"]
+    )
+    get_cursor().execute(
+        f"CREATE OR REPLACE TEMP TABLE {raw_name} ({columns}, _row_index BIGINT)"
     )
+    return raw_name
 
-    logger.info(f"[INSERT] Inserting {len(data)} rows into '{table_name}'...")
 
-    for row in data:
+def append_stage_chunk(
+    table_name: str, data: List[Dict[str, Any]], offset: int = 0
+) -> int:
+    if not data:
+        return 0
+    con = get_cursor()
+    with stage_timer(f"sync.{table_name}", "stage_append") as timing:
+        con.register("incoming_rows", incoming_to_arrow(table_name, data, offset))
         try:
-            values = [
-                row.get(col_title) for col_title in prettify_column_names(columns)
-            ]
-            con.execute(query, values)
-        except Exception as e:
-            logger.error(
-                f"[INSERT] Failed to insert row with key '{row.get('Company')}' into '{table_name}': {e}"
-            )
+            con.execute(f"INSERT INTO {table_name}_raw SELECT * FROM incoming_rows")
+        finally:
+            con.unregister("incoming_rows")
+        timing["rows"] = len(data)
+    return len(data)
 
 
-def fetch_existing_rows(table_name: str, primary_key: str) -> Dict[str, Dict[str, Any]]:
+def finish_stage(table_name: str) -> str:
+    con = get_cursor()
+    columns = get_columns_for_table(table_name)
+    db_primary_key = get_primary_db_key_for_table(table_name)
+    column_types = get_column_types(table_name)
+    raw_name = f"{table_name}_raw"
+    stage_name = f"{table_name}_stage"
+
+    def typed(col: str) -> str:
+        column_type = column_types.get(col, "VARCHAR")
+        if column_type == "VARCHAR":
+            return col
+        if column_type == "VARCHAR[]":
+            return f"{split_list_sql(col)} AS {col}"
+        if column_type == "BOOLEAN":
+            # A blank checkbox cell is unchecked, not unknown
+            return f"COALESCE(TRY_CAST(NULLIF({col}, '') AS BOOLEAN), FALSE) AS {col}"
+        return f"TRY_CAST(NULLIF({col}, '') AS {column_type}) AS {col}"
+
+    select_list = ", ".join(typed(col) for col in columns + ["row_hash"])
+    # Later sheet rows win when a key appears more than once
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE {stage_name} AS
+        SELECT {select_list}
+        FROM {raw_name}
+        WHERE {db_primary_key} IS NOT NULL AND {db_primary_key} <> ''
+        QUALIFY row_number() OVER (
+          PARTITION BY {db_primary_key} ORDER BY _row_index DESC
+        ) = 1
+        """
+    )
+    con.execute(f"DROP TABLE IF EXISTS {raw_name}")
+    return stage_name
+
+
+def drop_stage(table_name: str) -> None:
+    con = get_cursor()
+    con.execute(f"DROP TABLE IF EXISTS {table_name}_raw")
+    con.execute(f"DROP TABLE IF EXISTS {table_name}_stage")
+
+
+def stage_incoming(table_name: str, data: List[Dict[str, Any]]) -> str:
+    begin_stage(table_name)
+    append_stage_chunk(table_name, data)
+    return finish_stage(table_name)
+
+
+def insert_into_table(table_name: str, data: List[Dict[str, Any]]) -> None:
+    con = get_cursor()
+    if not data:
+        logger.warning("[INSERT] No data provided to insert into table: %s", table_name)
+        return
+
+    column_names = ", ".join(get_columns_for_table(table_name) + ["row_hash"])
+
+    logger.info("[INSERT] Inserting %s rows into '%s'...", len(data), table_name)
+
     try:
-        cursor = con.execute(f"SELECT * FROM {table_name}")
-        result = cursor.fetchall()
-        if cursor.description is None:
-            logger.warning(f"[FETCH] No columns found in table '{table_name}'")
-            return {}
-        columns = [desc[0] for desc in cursor.description]
+        stage_name = stage_incoming(table_name, data)
+        con.execute(
+            f"INSERT OR REPLACE INTO {table_name} ({column_names}) "
+            f"SELECT {column_names} FROM {stage_name}"
+        )
+    except Exception as e:
+        logger.error("[INSERT] Failed to insert rows into '%s': %s", table_name, e)
+
+
+def fetch_existing_rows(table_name: str, primary_key: str) -> Dict[str, Optional[str]]:
+    con = get_cursor()
+    try:
+        result = con.execute(f"SELECT {primary_key}, row_hash FROM {table_name}").fetchall()
         logger.info(
-            f"[FETCH] Retrieved {len(result)} existing rows from '{table_name}'"
+            "[FETCH] Retrieved %s existing row hashes from '%s'",
+            len(result),
+            table_name,
         )
-        return {
-            row[columns.index(primary_key)]: dict(zip(columns, row)) for row in result
-        }
+        return dict(result)
     except Exception as e:
-        logger.error(f"[FETCH] Error fetching rows from table '{table_name}': {e}")
+        logger.error("[FETCH] Error fetching rows from table '%s': %s", table_name, e)
         return {}
 
 
 def compute_delta_rows(
-    existing: Dict[str, Dict[str, Any]],
+    existing: Dict[str, Optional[str]],
     incoming: List[Dict[str, Any]],
     primary_key: str,
     comparison_fields: List[str],
 ) -> Tuple[List[Dict[str, Any]], List[str]]:
     incoming_dict = {row[primary_key]: row for row in incoming}
-
-    to_insert: List[Dict[str, Any]] = []
-    for key, row in incoming_dict.items():
-        if key not in existing:
-            to_insert.append(row)
-        else:
-            if any(row.get(f) != existing[key].get(f) for f in comparison_fields):
-                to_insert.append(row)
-
+    # Incoming sheet rows use prettified titles, existing rows store a hash
+    field_titles = prettify_column_names(comparison_fields)
+
+    to_insert: List[Dict[str, Any]] = [
+        row
+        for key, row in incoming_dict.items()
+        if existing.get(key) != compute_row_hash(row, field_titles)
+    ]
     to_delete = [k for k in existing if k not in incoming_dict]
 
     logger.info(
-        f"[DELTA] Delta computed for {primary_key}: {len(to_insert)} to insert/update, {len(to_delete)} to delete"
+        "[DELTA] Delta computed for %s: %s to insert/update, %s to delete",
+        primary_key,
+        len(to_insert),
+        len(to_delete),
     )
     return to_insert, to_delete
 
@@ -165,38 +294,88 @@ def get_incoming_for_table(table_name: str) -> List[Dict[str, Any]]:
 
         return get_company_research()
     else:
-        logger.error(f"Unknown table name: {table_name}")
+        logger.error("Unknown table name: %s", table_name)
         raise ValueError(f"Unknown table name: {table_name}")
 
 
-def sync_table(table_name: str):
-    logger.info(f"[SYNC] Syncing table: {table_name}")
-    try:
-        incoming = get_incoming_for_table(table_name)
-        primary_key = get_primary_key_for_table(table_name)
-        comparison_fields = get_comparison_fields_for_table(table_name)
-        db_primary_key = get_primary_db_key_for_table(table_name)
-        existing = fetch_existing_rows(table_name, db_primary_key)
-
-        to_insert, to_delete = compute_delta_rows(
-            existing, incoming, primary_key, comparison_fields
-        )
+def apply_staged_delta(table_name: str, stage_name: str) -> Dict[str, int]:
+    con = get_cursor()
+    columns = get_columns_for_table(table_name) + ["row_hash"]
+    comparison_fields = get_comparison_fields_for_table(table_name)
+    db_primary_key = get_primary_db_key_for_table(table_name)
+    column_names = ", ".join(columns)
+    assignments = ", ".join(f"{f} = s.{f}" for f in comparison_fields + ["row_hash"])
 
-        logger.info(
-            f"[SYNC] {table_name}: {len(to_insert)} insert/update, {len(to_delete)} delete operations"
-        )
+    stage = f"sync.{table_name}"
+
+    with stage_timer(stage, "delete") as timing:
+        (deleted,) = con.execute(
+            f"""
+            DELETE FROM {table_name}
+            WHERE NOT EXISTS (
+              SELECT 1 FROM {stage_name} s
+              WHERE s.{db_primary_key} = {table_name}.{db_primary_key}
+            )
+            """
+        ).fetchone()  # type: ignore
+        timing["rows"] = deleted
+    # last_updated moves with every sheet change so report summaries can
+    # pick the row up incrementally
+    with stage_timer(stage, "update") as timing:
+        (updated,) = con.execute(
+            f"""
+            UPDATE {table_name} SET {assignments}, last_updated = CURRENT_TIMESTAMP
+            FROM {stage_name} s
+            WHERE {table_name}.{db_primary_key} = s.{db_primary_key}
+              AND {table_name}.row_hash IS DISTINCT FROM s.row_hash
+            """
+        ).fetchone()  # type: ignore
+        timing["rows"] = updated
+    with stage_timer(stage, "insert") as timing:
+        (inserted,) = con.execute(
+            f"""
+            INSERT INTO {table_name} ({column_names})
+            SELECT {column_names} FROM {stage_name} s
+            WHERE NOT EXISTS (
+              SELECT 1 FROM {table_name} t
+              WHERE t.{db_primary_key} = s.{db_primary_key}
+            )
+            """
+        ).fetchone()  # type: ignore
+        timing["rows"] = inserted
+    return {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+
+def commit_stage(table_name: str, stage_name: str) -> Dict[str, int]:
+    # Nothing is applied unless the whole delta succeeds
+    with stage_timer(f"sync.{table_name}", "commit"), transaction() as con:
+        counts = apply_staged_delta(table_name, stage_name)
+        con.execute(f"DROP TABLE IF EXISTS {stage_name}")
+        if table_name == TABLE_PROCESSED_COMPANIES:
+            with stage_timer(f"sync.{table_name}", "canonicalize") as timing:
+                timing["rows"] = refresh_company_aliases(con)["new"]
 
-        insert_into_table(table_name, to_insert)
-
-        for key in to_delete:
-            try:
-                con.execute(
-                    f"DELETE FROM {table_name} WHERE {db_primary_key} = ?", [key]
-                )
-                logger.info(f"[DELETE] Removed '{key}' from '{table_name}'")
-            except Exception as e:
-                logger.error(
-                    f"[DELETE] Failed to delete '{key}' from '{table_name}': {e}"
-                )
+    logger.info(
+        "[SYNC] %s: %s inserted, %s updated, %s deleted",
+        table_name,
+        counts["inserted"],
+        counts["updated"],
+        counts["deleted"],
+    )
+    return counts
+
+
+def apply_incoming(table_name: str, incoming: List[Dict[str, Any]]) -> Dict[str, int]:
+    return commit_stage(table_name, stage_incoming(table_name, incoming))
+
+
+def sync_table(table_name: str) -> Dict[str, int]:
+    logger.info("[SYNC] Syncing table: %s", table_name)
+    try:
+        with stage_timer(f"sync.{table_name}", "fetch") as timing:
+            incoming = get_incoming_for_table(table_name)
+            timing["rows"] = len(incoming)
+        return apply_incoming(table_name, incoming)
     except Exception as e:
-        logger.exception(f"[SYNC] Failed syncing table '{table_name}': {e}")
+        logger.exception("[SYNC] Failed syncing table '%s': %s", table_name, e)
+        return {"inserted": 0, "updated": 0, "deleted": 0}
@@ -0,0 +1,166 @@
+# src/db/jobs.py
+#
+# Durable enrichment job queue. Worker processes never open DuckDB: the
+# coordinator in src.clients.workers leases jobs on their behalf. A lease
+# that isn't completed before it expires goes back to pending, so a crashed
+# worker or coordinator costs at most the companies it had in flight.
+import os
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+
+from src.common.models import EnrichedCompany
+from src.db.canonical import PENDING_COMPANIES_SQL
+from src.db.connection import transaction
+from src.db.writer import update_metadata
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 600))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+JOB_STATUSES = ["pending", "leased", "done", "failed"]
+
+
+def enqueue_pending_companies(
+    con: duckdb.DuckDBPyConnection, retry_failed: bool = False
+) -> int:
+    # Every unprocessed canonical company gets a job; a finished job is
+    # re-opened if its company was reset to unprocessed since.
+    requeue = "('done', 'failed')" if retry_failed else "('done')"
+    (queued,) = con.execute(
+        f"""
+        INSERT INTO enrichment_jobs (company)
+        {PENDING_COMPANIES_SQL}
+        ON CONFLICT (company) DO UPDATE SET
+          status = 'pending', attempts = 0, last_error = NULL,
+          updated_at = excluded.updated_at
+        WHERE enrichment_jobs.status IN {requeue}
+        """
+    ).fetchone()  # type: ignore
+    # Companies enriched some other way (or as an alias), or deleted, need
+    # no job
+    con.execute(
+        f"""
+        UPDATE enrichment_jobs SET status = 'done', updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'pending' AND company NOT IN ({PENDING_COMPANIES_SQL})
+        """
+    )
+    return queued
+
+
+def lease_job(
+    con: duckdb.DuckDBPyConnection, owner: str, lease_seconds: int = JOB_LEASE_SECONDS
+) -> Optional[str]:
+    row = con.execute(
+        """
+        UPDATE enrichment_jobs SET
+          status = 'leased',
+          lease_owner = ?,
+          lease_expires_at = CURRENT_TIMESTAMP + to_seconds(?),
+          attempts = attempts + 1,
+          updated_at = CURRENT_TIMESTAMP
+        WHERE company = (
+          SELECT company FROM enrichment_jobs
+          WHERE status = 'pending'
+          ORDER BY enqueued_at, company
+          LIMIT 1
+        )
+        RETURNING company
+        """,
+        [owner, lease_seconds],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _release(
+    con: duckdb.DuckDBPyConnection,
+    where: str,
+    params: List[object],
+    error: str,
+    max_attempts: int,
+) -> List[Tuple[str, str]]:
+    # Back to pending, or failed once the job has used up its attempts
+    return con.execute(
+        f"""
+        UPDATE enrichment_jobs SET
+          status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+          last_error = ?,
+          lease_owner = NULL,
+          lease_expires_at = NULL,
+          updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'leased' AND {where}
+        RETURNING company, status
+        """,
+        [max_attempts, error, *params],
+    ).fetchall()
+
+
+def expire_leases(
+    con: duckdb.DuckDBPyConnection, max_attempts: int = JOB_MAX_ATTEMPTS
+) -> List[Tuple[str, str]]:
+    return _release(
+        con, "lease_expires_at < CURRENT_TIMESTAMP", [], "lease expired", max_attempts
+    )
+
+
+def release_leases(
+    con: duckdb.DuckDBPyConnection,
+    owner: Optional[str] = None,
+    error: str = "lease released",
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+) -> List[Tuple[str, str]]:
+    # Without an owner every lease is released: only one coordinator can hold
+    # the database, so leases left at startup belong to a dead one.
+    if owner is None:
+        return _release(con, "TRUE", [], error, max_attempts)
+    return _release(con, "lease_owner = ?", [owner], error, max_attempts)
+
+
+def fail_job(
+    con: duckdb.DuckDBPyConnection,
+    company: str,
+    owner: str,
+    error: str,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+) -> Optional[str]:
+    released = _release(
+        con, "company = ? AND lease_owner = ?", [company, owner], error, max_attempts
+    )
+    return released[0][1] if released else None
+
+
+def complete_jobs(con: duckdb.DuckDBPyConnection, companies: List[str]) -> int:
+    if not companies:
+        return 0
+    (done,) = con.execute(
+        """
+        UPDATE enrichment_jobs SET
+          status = 'done',
+          last_error = NULL,
+          lease_owner = NULL,
+          lease_expires_at = NULL,
+          updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'leased' AND list_contains(?, company)
+        """,
+        [companies],
+    ).fetchone()  # type: ignore
+    return done
+
+
+def apply_job_results(
+    con: duckdb.DuckDBPyConnection, items: List[Tuple[str, EnrichedCompany]]
+) -> int:
+    # Metadata and job status move together: a crash in between can't leave
+    # a done job without its result or an enriched company still leased
+    if not items:
+        return 0
+    with transaction(con):
+        update_metadata(con, items)
+        complete_jobs(con, [company for company, _ in items])
+    return len(items)
+
+
+def job_counts(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    counts = dict(
+        con.execute("SELECT status, COUNT(*) FROM enrichment_jobs GROUP BY status").fetchall()
+    )
+    return {status: counts.get(status, 0) for status in JOB_STATUSES}
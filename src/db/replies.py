@@ -0,0 +1,152 @@
+# src/db/replies.py
+#
+# replies_log writer for the mailbox importer (src.clients.inbox). Parsed
+# messages arrive in batches and are matched to the drafts they answer in
+# one statement: by our Message-ID in their In-Reply-To / References first,
+# then by the sender being a contact we wrote to. Messages that match
+# neither (newsletters, our own sent copies) are dropped.
+#
+# Each mbox keeps a position in reply_import_state and each Maildir the
+# names of the files it has imported, written in the same transaction as the
+# batch, so an interrupted import resumes after the last batch it wrote and
+# a re-import only reads new mail.
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+import duckdb
+import pyarrow as pa
+
+from src.common.models import IncomingReply
+
+REPLY_IMPORT_BATCH_SIZE = int(os.getenv("REPLY_IMPORT_BATCH_SIZE", 5000))
+
+REPLY_TYPES = ["positive", "neutral", "decline", "auto_reply", "bounce"]
+# Answers from a person; auto-replies and bounces don't make a contact replied
+REPLIED_TYPES = ["positive", "neutral", "decline"]
+
+REPLY_SCHEMA = pa.schema(
+    [
+        ("message_id", pa.string()),
+        ("in_reply_to", pa.list_(pa.string())),
+        ("from_email", pa.string()),
+        ("subject", pa.string()),
+        ("received_at", pa.timestamp("us")),
+        ("reply_type", pa.string()),
+        ("reply_text", pa.string()),
+    ]
+)
+
+
+def get_import_state(
+    con: duckdb.DuckDBPyConnection, source: str
+) -> Tuple[int, Optional[str]]:
+    row = con.execute(
+        "SELECT position, fingerprint FROM reply_import_state WHERE source = ?", [source]
+    ).fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def set_import_state(
+    con: duckdb.DuckDBPyConnection, source: str, position: int, fingerprint: Optional[str]
+) -> None:
+    con.execute(
+        """
+        INSERT OR REPLACE INTO reply_import_state (source, position, fingerprint, imported_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """,
+        [source, position, fingerprint],
+    )
+
+
+def get_imported_files(con: duckdb.DuckDBPyConnection, source: str) -> Set[str]:
+    rows = con.execute(
+        "SELECT name FROM maildir_imported_files WHERE source = ?", [source]
+    ).fetchall()
+    return {name for (name,) in rows}
+
+
+def add_imported_files(
+    con: duckdb.DuckDBPyConnection, source: str, names: List[str]
+) -> None:
+    con.execute(
+        """
+        INSERT OR IGNORE INTO maildir_imported_files (source, name)
+        SELECT ?, unnest(?)
+        """,
+        [source, names],
+    )
+
+
+def insert_replies(
+    con: duckdb.DuckDBPyConnection, replies: List[IncomingReply]
+) -> Dict[str, int]:
+    # A reference match must come from the contact, a colleague on their
+    # domain, or a bounce; a message we sent ourselves is never a reply
+    con.register("reply_batch", pa.Table.from_pylist(replies, schema=REPLY_SCHEMA))
+    try:
+        # Repeats within the batch (one message under several labels in an
+        # export) are duplicates too
+        (new,) = con.execute(
+            """
+            SELECT COUNT(DISTINCT message_id) FROM reply_batch
+            WHERE message_id NOT IN (
+              SELECT message_id FROM replies_log WHERE message_id IS NOT NULL
+            )
+            """
+        ).fetchone()  # type: ignore
+        (inserted,) = con.execute(
+            """
+            INSERT INTO replies_log
+              (contact_email, company, reply_type, reply_text, message_id,
+               in_reply_to, draft_id, received_at)
+            WITH batch AS (
+              SELECT * FROM reply_batch
+              WHERE message_id NOT IN (
+                  SELECT message_id FROM replies_log WHERE message_id IS NOT NULL
+                )
+                AND message_id NOT IN (
+                  SELECT message_id FROM email_drafts WHERE message_id IS NOT NULL
+                )
+              QUALIFY row_number() OVER (PARTITION BY message_id) = 1
+            ),
+            by_reference AS (
+              SELECT r.message_id, max(d.id) AS draft_id
+              FROM (SELECT message_id, from_email, reply_type, unnest(in_reply_to) AS ref
+                    FROM batch) r
+              JOIN email_drafts d ON d.message_id = r.ref
+              WHERE r.from_email = lower(d.contact_email)
+                 OR split_part(r.from_email, '@', 2) = lower(split_part(d.contact_email, '@', 2))
+                 OR r.reply_type = 'bounce'
+              GROUP BY r.message_id
+            ),
+            by_sender AS (
+              SELECT b.message_id,
+                     arg_max(d.id, (d.sent_at IS NOT NULL, d.id)) AS draft_id
+              FROM batch b
+              JOIN email_drafts d ON lower(d.contact_email) = b.from_email
+              GROUP BY b.message_id
+            )
+            SELECT d.contact_email, d.company, b.reply_type, b.reply_text, b.message_id,
+                   b.in_reply_to, d.id, b.received_at
+            FROM batch b
+            LEFT JOIN by_reference r ON r.message_id = b.message_id
+            LEFT JOIN by_sender s ON s.message_id = b.message_id
+            JOIN email_drafts d ON d.id = COALESCE(r.draft_id, s.draft_id)
+            """
+        ).fetchone()  # type: ignore
+    finally:
+        con.unregister("reply_batch")
+    return {
+        "imported": inserted,
+        "duplicates": len(replies) - new,
+        "unmatched": new - inserted,
+    }
+
+
+def reply_counts(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    counts = dict(
+        con.execute(
+            "SELECT reply_type, COUNT(*) FROM replies_log GROUP BY reply_type"
+        ).fetchall()
+    )
+    return {reply_type: counts.get(reply_type, 0) for reply_type in REPLY_TYPES}
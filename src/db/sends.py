@@ -0,0 +1,281 @@
+# src/db/sends.py
+#
+# Step 7 send queue. Approved drafts are claimed in batches (status
+# 'sending', message_id fixed), handed to src.clients.mailer, and their
+# outcomes written back together with the send_log rows in one transaction.
+#
+# Between the SMTP server accepting a message and that batch being written,
+# the only record of the send is the local journal: every attempt is
+# appended there before and after it talks to the server. After a crash,
+# recover_sends() replays it, so a sent draft is never sent twice. A draft
+# whose attempt started but never finished may or may not have gone out;
+# it is parked as 'unconfirmed' instead of being retried.
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+import pyarrow as pa
+
+from src.common.models import OutgoingEmail, SendResult
+from src.db.connection import SCOUT_DIR, transaction
+
+SEND_BATCH_SIZE = int(os.getenv("SEND_BATCH_SIZE", 200))
+SEND_MAX_ATTEMPTS = int(os.getenv("SEND_MAX_ATTEMPTS", 3))
+# A temporary failure (4xx, dropped connection) is retried after this long
+SEND_RETRY_DELAY = int(os.getenv("SEND_RETRY_DELAY_SECONDS", 15 * 60))
+SEND_JOURNAL_PATH = Path(
+    os.getenv("SEND_JOURNAL_PATH", str(SCOUT_DIR / "send_journal.jsonl"))
+)
+
+SEND_STATUSES = ["approved", "sending", "sent", "failed", "unconfirmed"]
+SEND_OUTCOMES = ["sent", "deferred", "failed"]
+
+SEND_RESULT_SCHEMA = pa.schema(
+    [
+        ("draft_id", pa.int64()),
+        ("outcome", pa.string()),
+        ("error", pa.string()),
+        ("finished_at", pa.timestamp("us")),
+    ]
+)
+
+
+class SendJournal:
+    # Append-only JSON lines: {"id", "event": "start" | an outcome, "error", "at"}
+    def __init__(self, path: Path = SEND_JOURNAL_PATH):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def record(self, draft_id: int, event: str, error: Optional[str] = None) -> datetime:
+        at = datetime.now()
+        entry = {
+            "id": draft_id,
+            "event": event,
+            "error": error,
+            "at": at.isoformat(),
+        }
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(entry) + "\n")
+            # Out of Python's buffer before the next SMTP command, so it
+            # survives the process dying
+            self._file.flush()
+        return at
+
+    def entries(self) -> Dict[int, Tuple[str, Optional[str], datetime]]:
+        # Last event per draft; a torn final line from a crash is ignored
+        latest: Dict[int, Tuple[str, Optional[str], datetime]] = {}
+        if not self.path.exists():
+            return latest
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                latest[entry["id"]] = (
+                    entry["event"],
+                    entry.get("error"),
+                    datetime.fromisoformat(entry["at"]),
+                )
+        return latest
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def claim_due_drafts(
+    con: duckdb.DuckDBPyConnection, limit: int, sender_domain: str
+) -> List[OutgoingEmail]:
+    # One statement over idx_drafts_status_send_date: a draft without a
+    # send_date is due as soon as it is approved
+    rows = con.execute(
+        """
+        UPDATE email_drafts SET
+          status = 'sending',
+          send_attempts = send_attempts + 1,
+          message_id = COALESCE(message_id, '<scout-' || uuid() || '@' || ? || '>')
+        WHERE id IN (
+          SELECT id FROM email_drafts
+          WHERE status = 'approved'
+            AND (send_date IS NULL OR send_date <= CURRENT_TIMESTAMP)
+          ORDER BY send_date NULLS FIRST, id
+          LIMIT ?
+        )
+        RETURNING id, company, contact_name, contact_email, draft_content, message_id
+        """,
+        [sender_domain, limit],
+    ).fetchall()
+    return [
+        OutgoingEmail(
+            id=row[0],
+            company=row[1],
+            contact_name=row[2],
+            contact_email=row[3],
+            draft_content=row[4],
+            message_id=row[5],
+        )
+        for row in sorted(rows)
+    ]
+
+
+def _apply_results(
+    con: duckdb.DuckDBPyConnection,
+    results: List[SendResult],
+    max_attempts: int,
+    retry_delay: int,
+) -> None:
+    batch = pa.table(
+        {
+            "draft_id": [r["draft_id"] for r in results],
+            "outcome": [r["outcome"] for r in results],
+            "error": [r["error"] for r in results],
+            "finished_at": [r["finished_at"] for r in results],
+        },
+        schema=SEND_RESULT_SCHEMA,
+    )
+    con.register("send_batch", batch)
+    try:
+        # Only drafts still marked 'sending' are settled, so replaying a
+        # batch that was already written changes nothing
+        con.execute(
+            """
+            INSERT INTO send_log
+              (draft_id, contact_email, company, sent_at, delivery_status, message_id, error)
+            SELECT d.id, d.contact_email, d.company, r.finished_at, r.outcome,
+                   d.message_id, r.error
+            FROM send_batch r JOIN email_drafts d ON d.id = r.draft_id
+            WHERE d.status = 'sending'
+            """
+        )
+        con.execute(
+            """
+            UPDATE email_drafts SET
+              status = CASE
+                WHEN r.outcome = 'sent' THEN 'sent'
+                WHEN r.outcome = 'deferred' AND email_drafts.send_attempts < ? THEN 'approved'
+                ELSE 'failed'
+              END,
+              sent_at = CASE WHEN r.outcome = 'sent' THEN r.finished_at ELSE email_drafts.sent_at END,
+              send_date = CASE
+                WHEN r.outcome = 'deferred' THEN r.finished_at + to_seconds(?)
+                ELSE email_drafts.send_date
+              END,
+              last_error = r.error
+            FROM send_batch r
+            WHERE email_drafts.id = r.draft_id AND email_drafts.status = 'sending'
+            """,
+            [max_attempts, retry_delay],
+        )
+    finally:
+        con.unregister("send_batch")
+
+
+def apply_send_results(
+    con: duckdb.DuckDBPyConnection,
+    results: List[SendResult],
+    max_attempts: int = SEND_MAX_ATTEMPTS,
+    retry_delay: int = SEND_RETRY_DELAY,
+) -> int:
+    if not results:
+        return 0
+    with transaction(con):
+        _apply_results(con, results, max_attempts, retry_delay)
+    return len(results)
+
+
+def recover_sends(
+    con: duckdb.DuckDBPyConnection,
+    journal: SendJournal,
+    max_attempts: int = SEND_MAX_ATTEMPTS,
+    retry_delay: int = SEND_RETRY_DELAY,
+) -> Dict[str, int]:
+    # Settles drafts left in 'sending' by a run that stopped before writing
+    # its last batch: journaled outcomes are applied as if that batch had
+    # been written, unfinished attempts become 'unconfirmed' and drafts that
+    # were claimed but never attempted go back to the queue.
+    entries = journal.entries()
+    stuck = [
+        row[0]
+        for row in con.execute(
+            "SELECT id FROM email_drafts WHERE status = 'sending'"
+        ).fetchall()
+    ]
+    finished: List[SendResult] = []
+    started: List[int] = []
+    untouched: List[int] = []
+    for draft_id in stuck:
+        if draft_id not in entries:
+            untouched.append(draft_id)
+            continue
+        event, error, at = entries[draft_id]
+        if event in SEND_OUTCOMES:
+            finished.append(
+                SendResult(draft_id=draft_id, outcome=event, error=error, finished_at=at)
+            )
+        else:
+            started.append(draft_id)
+
+    if stuck:
+        with transaction(con):
+            if finished:
+                _apply_results(con, finished, max_attempts, retry_delay)
+            con.execute(
+                """
+                UPDATE email_drafts SET status = 'unconfirmed',
+                  last_error = 'interrupted while sending'
+                WHERE status = 'sending' AND list_contains(?, id)
+                """,
+                [started],
+            )
+            con.execute(
+                """
+                UPDATE email_drafts SET status = 'approved', send_attempts = send_attempts - 1
+                WHERE status = 'sending' AND list_contains(?, id)
+                """,
+                [untouched],
+            )
+    journal.clear()
+    return {
+        "replayed": len(finished),
+        "unconfirmed": len(started),
+        "requeued": len(untouched),
+    }
+
+
+def requeue_unconfirmed(con: duckdb.DuckDBPyConnection) -> int:
+    # For after checking the Sent folder: these may go out a second time
+    (count,) = con.execute(
+        """
+        UPDATE email_drafts SET status = 'approved', last_error = NULL
+        WHERE status = 'unconfirmed'
+        """
+    ).fetchone()  # type: ignore
+    return count
+
+
+def send_counts(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    counts = dict(
+        con.execute(
+            "SELECT status, COUNT(*) FROM email_drafts WHERE list_contains(?, status) GROUP BY status",
+            [SEND_STATUSES],
+        ).fetchall()
+    )
+    return {status: counts.get(status, 0) for status in SEND_STATUSES}
@@ -0,0 +1,145 @@
+# src/db/summary.py
+#
+# Incremental refresh of the report summary tables. Each source keeps a
+# watermark in report_state; a refresh only reads rows newer than it, so the
+# cost tracks what changed since the last report, not the size of the logs.
+from typing import Dict, Optional
+
+import duckdb
+
+from src.db.connection import transaction
+from src.db.replies import REPLIED_TYPES
+from src.log import get_logger
+
+logger = get_logger("report_summary")
+
+SUMMARY_TABLES = [
+    "report_companies",
+    "report_daily_sends",
+    "report_daily_replies",
+    "report_responded_contacts",
+]
+
+
+def get_watermark(con: duckdb.DuckDBPyConnection, source: str) -> Optional[object]:
+    row = con.execute(
+        "SELECT watermark FROM report_state WHERE source = ?", [source]
+    ).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(con: duckdb.DuckDBPyConnection, source: str, watermark: object) -> None:
+    if watermark is None:
+        return
+    con.execute(
+        """
+        INSERT OR REPLACE INTO report_state (source, watermark, refreshed_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        """,
+        [source, watermark],
+    )
+
+
+def refresh_companies(con: duckdb.DuckDBPyConnection) -> int:
+    watermark = get_watermark(con, "processed_companies")
+    (changed,) = con.execute(
+        """
+        INSERT OR REPLACE INTO report_companies (company, industry, enriched, tags)
+        SELECT company, industry, company_processed, tags
+        FROM processed_companies
+        WHERE ? IS NULL OR last_updated > ?
+        """,
+        [watermark, watermark],
+    ).fetchone()  # type: ignore
+    # Deleted companies leave no newer row behind; drop them by key
+    con.execute(
+        """
+        DELETE FROM report_companies
+        WHERE company NOT IN (SELECT company FROM processed_companies)
+        """
+    )
+    (new_watermark,) = con.execute(
+        "SELECT MAX(last_updated) FROM processed_companies"
+    ).fetchone()  # type: ignore
+    set_watermark(con, "processed_companies", new_watermark)
+    return changed
+
+
+def refresh_daily_sends(con: duckdb.DuckDBPyConnection) -> int:
+    # send_log and replies_log are append-only, so new rows are added onto
+    # the existing daily counts. Sends count on the day they went out; the
+    # watermark stays on logged_at, since a send can be logged well after it
+    # happened (a batch written late, a journal replayed after a crash)
+    watermark = get_watermark(con, "send_log.logged_at")
+    if watermark is None:
+        # First refresh on this watermark: count every send from scratch
+        con.execute("DELETE FROM report_daily_sends")
+    (changed,) = con.execute(
+        """
+        INSERT INTO report_daily_sends (day, delivery_status, emails)
+        SELECT CAST(sent_at AS DATE), COALESCE(delivery_status, 'unknown'), COUNT(*)
+        FROM send_log
+        WHERE ? IS NULL OR logged_at > ?
+        GROUP BY ALL
+        ON CONFLICT (day, delivery_status) DO UPDATE
+        SET emails = report_daily_sends.emails + excluded.emails
+        """,
+        [watermark, watermark],
+    ).fetchone()  # type: ignore
+    (new_watermark,) = con.execute("SELECT MAX(logged_at) FROM send_log").fetchone()  # type: ignore
+    set_watermark(con, "send_log.logged_at", new_watermark)
+    return changed
+
+
+def refresh_daily_replies(con: duckdb.DuckDBPyConnection) -> int:
+    # Imported replies count on the day they were received; the watermark
+    # stays on timestamp, the time they were logged
+    watermark = get_watermark(con, "replies_log")
+    (changed,) = con.execute(
+        """
+        INSERT INTO report_daily_replies (day, reply_type, replies)
+        SELECT CAST(COALESCE(received_at, timestamp) AS DATE),
+               COALESCE(reply_type, 'unknown'), COUNT(*)
+        FROM replies_log
+        WHERE ? IS NULL OR timestamp > ?
+        GROUP BY ALL
+        ON CONFLICT (day, reply_type) DO UPDATE
+        SET replies = report_daily_replies.replies + excluded.replies
+        """,
+        [watermark, watermark],
+    ).fetchone()  # type: ignore
+    # A contact who answers several times still counts once
+    con.execute(
+        """
+        INSERT OR IGNORE INTO report_responded_contacts (contact_email, first_replied_at)
+        SELECT contact_email, MIN(COALESCE(received_at, timestamp))
+        FROM replies_log
+        WHERE (? IS NULL OR timestamp > ?)
+          AND contact_email IS NOT NULL
+          AND list_contains(?, reply_type)
+        GROUP BY contact_email
+        """,
+        [watermark, watermark, REPLIED_TYPES],
+    )
+    (new_watermark,) = con.execute("SELECT MAX(timestamp) FROM replies_log").fetchone()  # type: ignore
+    set_watermark(con, "replies_log", new_watermark)
+    return changed
+
+
+def refresh_summaries(full_refresh: bool = False) -> Dict[str, int]:
+    with transaction() as con:
+        if full_refresh:
+            for table_name in SUMMARY_TABLES:
+                con.execute(f"DELETE FROM {table_name}")
+            con.execute("DELETE FROM report_state")
+        counts = {
+            "companies": refresh_companies(con),
+            "sends": refresh_daily_sends(con),
+            "replies": refresh_daily_replies(con),
+        }
+    logger.info(
+        "[REPORT] Summary refresh (%s): %s",
+        "full" if full_refresh else "incremental",
+        counts,
+    )
+    return counts
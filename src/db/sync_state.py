@@ -0,0 +1,21 @@
+# src/db/sync_state.py
+from typing import Dict, Optional, Tuple
+
+from src.db.connection import get_cursor
+
+
+def load_sync_states() -> Dict[str, Tuple[Optional[str], str]]:
+    rows = get_cursor().execute(
+        "SELECT sheet_name, revision, checksum FROM sheet_sync_state"
+    ).fetchall()
+    return {name: (revision, checksum) for name, revision, checksum in rows}
+
+
+def save_sync_state(sheet_name: str, revision: Optional[str], checksum: str) -> None:
+    get_cursor().execute(
+        """
+        INSERT OR REPLACE INTO sheet_sync_state (sheet_name, revision, checksum, synced_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """,
+        [sheet_name, revision, checksum],
+    )
@@ -0,0 +1,327 @@
+# src/db/telemetry.py
+#
+# Per-call and per-stage instrumentation. Records are buffered in memory and
+# written to api_calls_log / stage_timings in Arrow batches, so the hot path
+# only appends to a list; a batch that comes due is written on a background
+# thread, never on the caller's (often the event loop's). Telemetry never
+# fails the pipeline: a flush error is logged and the batch dropped.
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+
+from src.db.connection import get_connection, get_cursor
+from src.log import get_logger
+
+logger = get_logger("telemetry")
+
+TELEMETRY_ENABLED = os.getenv("SCOUT_TELEMETRY", "true").lower() not in ("0", "false", "no")
+TELEMETRY_FLUSH_SIZE = int(os.getenv("TELEMETRY_FLUSH_SIZE", 1000))
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", 10.0))
+
+# USD per 1M (prompt, completion) tokens
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+API_CALL_SCHEMA = pa.schema(
+    [
+        ("service", pa.string()),
+        ("operation", pa.string()),
+        ("model", pa.string()),
+        ("started_at", pa.timestamp("us")),
+        ("duration_ms", pa.float64()),
+        ("prompt_tokens", pa.int64()),
+        ("completion_tokens", pa.int64()),
+        ("retries", pa.int64()),
+        ("outcome", pa.string()),
+        ("error", pa.string()),
+    ]
+)
+
+STAGE_TIMING_SCHEMA = pa.schema(
+    [
+        ("stage", pa.string()),
+        ("step", pa.string()),
+        ("started_at", pa.timestamp("us")),
+        ("duration_ms", pa.float64()),
+        ("rows", pa.int64()),
+    ]
+)
+
+
+class Telemetry:
+    def __init__(
+        self,
+        enabled: bool = TELEMETRY_ENABLED,
+        flush_size: int = TELEMETRY_FLUSH_SIZE,
+        flush_interval: float = TELEMETRY_FLUSH_INTERVAL,
+        sink: Optional[Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], None]] = None,
+    ):
+        self.enabled = enabled
+        # Processes that must not open the database (enrichment workers) hand
+        # their batches to a sink instead
+        self.sink = sink
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._calls: List[Dict[str, Any]] = []
+        self._stages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def _add(self, buffer: List[Dict[str, Any]], record: Dict[str, Any]) -> None:
+        with self._lock:
+            buffer.append(record)
+            due = len(self._calls) + len(self._stages) >= self.flush_size or (
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            # One flush in flight at a time; records added meanwhile wait
+            # for the next one
+            if due and (self._flusher is None or not self._flusher.is_alive()):
+                self._flusher = threading.Thread(
+                    target=self.flush, name="telemetry-flush", daemon=True
+                )
+                self._flusher.start()
+
+    def _join_flusher(self) -> None:
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+
+    def record_api_call(
+        self,
+        service: str,
+        operation: str,
+        duration: float,
+        outcome: str = "ok",
+        model: Optional[str] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        retries: int = 0,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        self._add(
+            self._calls,
+            {
+                "service": service,
+                "operation": operation,
+                "model": model,
+                "started_at": datetime.now(),
+                "duration_ms": duration * 1000,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "retries": retries,
+                "outcome": outcome,
+                "error": str(error) if error is not None else None,
+            },
+        )
+
+    def record_stage(
+        self, stage: str, step: str, duration: float, rows: Optional[int] = None
+    ) -> None:
+        if not self.enabled:
+            return
+        self._add(
+            self._stages,
+            {
+                "stage": stage,
+                "step": step,
+                "started_at": datetime.now(),
+                "duration_ms": duration * 1000,
+                "rows": rows,
+            },
+        )
+
+    def merge(self, calls: List[Dict[str, Any]], stages: List[Dict[str, Any]]) -> None:
+        # Records shipped from another process
+        with self._lock:
+            self._calls.extend(calls)
+            self._stages.extend(stages)
+
+    def flush(self) -> int:
+        with self._lock:
+            calls, self._calls = self._calls, []
+            stages, self._stages = self._stages, []
+            self._last_flush = time.monotonic()
+        if not calls and not stages:
+            return 0
+        if self.sink is not None:
+            self.sink(calls, stages)
+            return len(calls) + len(stages)
+        # A cursor of its own keeps telemetry out of whatever transaction the
+        # caller has open: a failed flush must not abort a sync.
+        con = get_connection().cursor()
+        try:
+            for table_name, schema, records in [
+                ("api_calls_log", API_CALL_SCHEMA, calls),
+                ("stage_timings", STAGE_TIMING_SCHEMA, stages),
+            ]:
+                if not records:
+                    continue
+                batch = pa.Table.from_pylist(records, schema=schema)
+                con.register("telemetry_batch", batch)
+                try:
+                    con.execute(
+                        f"INSERT INTO {table_name} ({', '.join(schema.names)}) "
+                        f"SELECT * FROM telemetry_batch"
+                    )
+                finally:
+                    con.unregister("telemetry_batch")
+        except Exception as e:
+            logger.warning(
+                "[TELEMETRY] Dropped %s records: %s", len(calls) + len(stages), e
+            )
+            return 0
+        finally:
+            con.close()
+        return len(calls) + len(stages)
+
+    def close(self, flush: bool = True) -> None:
+        self._join_flusher()
+        if flush:
+            self.flush()
+        else:
+            with self._lock:
+                self._calls, self._stages = [], []
+        atexit.unregister(self.close)
+
+
+_telemetry: Optional[Telemetry] = None
+
+
+def get_telemetry() -> Telemetry:
+    global _telemetry
+
+    if _telemetry is None:
+        _telemetry = Telemetry()
+    return _telemetry
+
+
+@contextmanager
+def stage_timer(stage: str, step: str) -> Iterator[Dict[str, Any]]:
+    # Yields a dict; set "rows" on it to record how many rows the step touched
+    info: Dict[str, Any] = {"rows": None}
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        get_telemetry().record_stage(stage, step, time.perf_counter() - started, info["rows"])
+
+
+@contextmanager
+def api_call_timer(service: str, operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        get_telemetry().record_api_call(
+            service, operation, time.perf_counter() - started, outcome="error", error=e
+        )
+        raise
+    get_telemetry().record_api_call(service, operation, time.perf_counter() - started)
+
+
+def call_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICING.get(model or "", (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def summarize(since_hours: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+    con = get_cursor()
+    where = "WHERE started_at >= now()::TIMESTAMP - to_seconds(CAST(? AS DOUBLE) * 3600)" if since_hours else ""
+    params = [since_hours] if since_hours else []
+    calls = con.execute(
+        f"""
+        SELECT service, operation, model, COUNT(*),
+               COUNT(*) FILTER (WHERE outcome = 'error'),
+               COUNT(*) FILTER (WHERE outcome = 'cache_hit'),
+               SUM(retries),
+               -- Cache hits take microseconds; latency is the API's
+               quantile_cont(duration_ms, [0.5, 0.95, 0.99])
+                 FILTER (WHERE outcome <> 'cache_hit'),
+               SUM(prompt_tokens), SUM(completion_tokens)
+        FROM api_calls_log {where}
+        GROUP BY ALL ORDER BY service, operation, model
+        """,
+        params,
+    ).fetchall()
+    stages = con.execute(
+        f"""
+        SELECT stage, step, COUNT(*), quantile_cont(duration_ms, [0.5, 0.95, 0.99]),
+               SUM(duration_ms), SUM(rows)
+        FROM stage_timings {where}
+        GROUP BY ALL ORDER BY stage, step
+        """,
+        params,
+    ).fetchall()
+    return {
+        "api_calls": [
+            {
+                "service": service,
+                "operation": operation,
+                "model": model,
+                "calls": n,
+                "errors": errors,
+                "cache_hits": hits,
+                "retries": int(retries or 0),
+                "p50_ms": round(q[0], 1) if q else None,
+                "p95_ms": round(q[1], 1) if q else None,
+                "p99_ms": round(q[2], 1) if q else None,
+                "prompt_tokens": int(pt or 0),
+                "completion_tokens": int(ct or 0),
+                "cost_usd": round(call_cost(model, int(pt or 0), int(ct or 0)), 4),
+            }
+            for service, operation, model, n, errors, hits, retries, q, pt, ct in calls
+        ],
+        "stages": [
+            {
+                "stage": stage,
+                "step": step,
+                "runs": n,
+                "p50_ms": round(q[0], 1),
+                "p95_ms": round(q[1], 1),
+                "p99_ms": round(q[2], 1),
+                "total_ms": round(total, 1),
+                "rows": int(rows) if rows is not None else None,
+            }
+            for stage, step, n, q, total, rows in stages
+        ],
+    }
+
+
+def format_summary(summary: Dict[str, List[Dict[str, Any]]]) -> str:
+    lines = [
+        f"{'api call':<36} {'calls':>6} {'err':>4} {'retry':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'tokens':>9} {'cost $':>8}"
+    ]
+    for c in summary["api_calls"]:
+        name = f"{c['service']}.{c['operation']}"
+        # Only cache hits: no latency to report
+        p50, p95, p99 = (
+            "-" if c[k] is None else c[k] for k in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        lines.append(
+            f"{name:<36} {c['calls']:>6} {c['errors']:>4} {c['retries']:>5} "
+            f"{p50:>8} {p95:>8} {p99:>8} "
+            f"{c['prompt_tokens'] + c['completion_tokens']:>9} {c['cost_usd']:>8}"
+        )
+    lines.append("")
+    lines.append(
+        f"{'stage':<36} {'runs':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'total':>10} {'rows':>9}"
+    )
+    for s in summary["stages"]:
+        name = f"{s['stage']}.{s['step']}"
+        lines.append(
+            f"{name:<36} {s['runs']:>6} {s['p50_ms']:>8} {s['p95_ms']:>8} "
+            f"{s['p99_ms']:>8} {s['total_ms']:>10} {s['rows'] if s['rows'] is not None else '-':>9}"
+        )
+    return "\n".join(lines)
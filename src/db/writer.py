@@ -0,0 +1,270 @@
+# src/db/writer.py
+import asyncio
+import atexit
+import itertools
+import os
+import threading
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import duckdb
+import pyarrow as pa
+
+from src.common.models import EnrichedCompany
+from src.constants.tables import LIST_COLUMNS
+from src.db.canonical import fan_out_enrichment
+from src.db.connection import get_cursor, transaction
+from src.db.telemetry import stage_timer
+from src.log import get_logger
+
+logger = get_logger("writer")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+METADATA_FLUSH_SIZE = int(os.getenv("METADATA_FLUSH_SIZE", 200))
+METADATA_FLUSH_INTERVAL = float(os.getenv("METADATA_FLUSH_INTERVAL", 5.0))
+
+ENRICHED_COLUMNS: List[str] = list(EnrichedCompany.__annotations__)
+
+
+def to_string_list(value: object) -> Optional[List[str]]:
+    # Models occasionally answer a list field with a single string
+    if value is None:
+        return None
+    items = value if isinstance(value, list) else str(value).split(",")
+    return [item for item in (str(i).strip() for i in items) if item]
+
+
+def enriched_rows_to_arrow(items: List[Tuple[str, EnrichedCompany]]) -> pa.Table:
+    # "fields" lists the columns each result sets: every field for a full
+    # enrichment, only the stale topics' fields for a refresh
+    columns: Dict[str, List[object]] = {
+        "company": [company for company, _ in items],
+        "fields": [[c for c in ENRICHED_COLUMNS if c in e] for _, e in items],
+    }
+    fields = [("company", pa.string()), ("fields", pa.list_(pa.string()))]
+    for col in ENRICHED_COLUMNS:
+        if col in LIST_COLUMNS:
+            columns[col] = [to_string_list(e.get(col)) for _, e in items]
+            fields.append((col, pa.list_(pa.string())))
+        else:
+            columns[col] = [e.get(col) for _, e in items]
+            fields.append((col, pa.string()))
+    return pa.table(columns, schema=pa.schema(fields))
+
+
+def update_metadata(
+    con: duckdb.DuckDBPyConnection, items: List[Tuple[str, EnrichedCompany]]
+) -> int:
+    # Runs inside the caller's transaction
+    batch = enriched_rows_to_arrow(items)
+    # Columns every result sets are assigned directly; the others (a refresh
+    # only sets its stale topics' fields) keep the stored value where unset.
+    # field_refreshed_at stamps what was set, for src.db.freshness
+    assignments, stamps = [], []
+    for c in ENRICHED_COLUMNS:
+        if all(c in e for _, e in items):
+            assignments.append(f"{c} = b.{c}")
+            stamps.append(f"{c} := CURRENT_TIMESTAMP")
+        else:
+            is_set = f"list_contains(b.fields, '{c}')"
+            assignments.append(
+                f"{c} = CASE WHEN {is_set} THEN b.{c} ELSE processed_companies.{c} END"
+            )
+            stamps.append(
+                f"{c} := CASE WHEN {is_set} THEN CURRENT_TIMESTAMP "
+                f"ELSE processed_companies.field_refreshed_at.{c} END"
+            )
+    set_columns = ",\n            ".join(assignments)
+    set_stamps = ",\n              ".join(stamps)
+    con.register("metadata_batch", batch)
+    try:
+        con.execute(
+            f"""
+            UPDATE processed_companies SET
+            {set_columns},
+            field_refreshed_at = struct_pack(
+              {set_stamps}
+            ),
+            company_processed = TRUE,
+            last_updated = CURRENT_TIMESTAMP
+            FROM metadata_batch b
+            WHERE processed_companies.company = b.company;
+            """
+        )
+    finally:
+        con.unregister("metadata_batch")
+    # Aliases of these companies ("Acme Inc." for "Acme") get the same result
+    fan_out_enrichment(con, [company for company, _ in items])
+    return len(items)
+
+
+def apply_metadata_batch(
+    con: duckdb.DuckDBPyConnection, items: List[Tuple[str, EnrichedCompany]]
+) -> int:
+    if not items:
+        return 0
+
+    with transaction(con):
+        update_metadata(con, items)
+    return len(items)
+
+
+class BatchWriter(Generic[T]):
+    # Buffers results and writes them with one `apply(con, items)` call per
+    # flush: once flush_size items are waiting, when flush_interval has
+    # passed, and on close (or at exit). With a `key`, a newer item replaces
+    # a buffered one with the same key.
+    def __init__(
+        self,
+        apply: Callable[[duckdb.DuckDBPyConnection, List[T]], int],
+        stage: str,
+        con: Optional[duckdb.DuckDBPyConnection],
+        flush_size: int,
+        flush_interval: float,
+        key: Optional[Callable[[T], Hashable]] = None,
+    ):
+        self.apply = apply
+        self.stage = stage
+        self.con = con if con is not None else get_cursor()
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._key = key
+        self._seq = itertools.count()
+        self._buffer: Dict[Hashable, T] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.written = 0
+        atexit.register(self.flush)
+
+    def put(self, item: T) -> None:
+        key = self._key(item) if self._key else next(self._seq)
+        with self._lock:
+            self._buffer[key] = item
+            due = len(self._buffer) >= self.flush_size
+        if due or self.flush_due():
+            self.flush()
+
+    def flush_due(self) -> bool:
+        return bool(self._buffer) and (
+            time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def flush(self) -> int:
+        with self._lock:
+            buffered = self._buffer
+            self._buffer = {}
+            self._last_flush = time.monotonic()
+        if not buffered:
+            return 0
+        items = list(buffered.values())
+        try:
+            with stage_timer(self.stage, "write") as timing:
+                written = self.apply(self.con, items)
+                timing["rows"] = written
+        except Exception as e:
+            logger.error(
+                "[WRITER] %s: failed to flush %s results: %s", self.stage, len(items), e
+            )
+            # Keep everything so the next flush (or shutdown) retries it, in
+            # its original order; anything added since is newer and wins
+            with self._lock:
+                self._buffer = {**buffered, **self._buffer}
+            raise
+        self.written += written
+        logger.info("[WRITER] %s: flushed %s rows", self.stage, written)
+        return written
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def __enter__(self) -> "BatchWriter[T]":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class MetadataWriter(BatchWriter[Tuple[str, EnrichedCompany]]):
+    def __init__(
+        self,
+        con: Optional[duckdb.DuckDBPyConnection] = None,
+        flush_size: int = METADATA_FLUSH_SIZE,
+        flush_interval: float = METADATA_FLUSH_INTERVAL,
+    ):
+        # Keyed by company so a re-enriched company in the same batch keeps
+        # only its latest result.
+        super().__init__(
+            apply_metadata_batch,
+            "enrichment",
+            con,
+            flush_size,
+            flush_interval,
+            key=lambda item: item[0],
+        )
+
+    def add(self, company: str, enriched: EnrichedCompany) -> None:
+        self.put((company, enriched))
+
+
+async def run_pipeline(
+    items: List[T],
+    work: Callable[[T], Awaitable[R]],
+    handle: Callable[[T, Union[R, Exception]], None],
+    writer: BatchWriter,
+    workers: int,
+) -> None:
+    # `workers` tasks run `work` over the items and queue each result (or the
+    # exception it raised) for a single writer task, which passes it to
+    # `handle` and flushes during quiet periods. DuckDB only ever sees writes
+    # from that task, so concurrent items never race on the connection.
+    pending: "asyncio.Queue[T]" = asyncio.Queue()
+    for item in items:
+        pending.put_nowait(item)
+    results: "asyncio.Queue[Optional[Tuple[T, Union[R, Exception]]]]" = asyncio.Queue()
+
+    async def worker() -> None:
+        while not pending.empty():
+            item = pending.get_nowait()
+            try:
+                result: Union[R, Exception] = await work(item)
+            except Exception as e:
+                result = e
+            await results.put((item, result))
+
+    async def write() -> None:
+        try:
+            while True:
+                try:
+                    entry = await asyncio.wait_for(
+                        results.get(), timeout=writer.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    # Quiet period: push out whatever is buffered
+                    writer.flush()
+                    continue
+                if entry is None:
+                    return
+                handle(*entry)
+        finally:
+            writer.close()
+
+    writer_task = asyncio.create_task(write())
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        await results.put(None)
+        await writer_task
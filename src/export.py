@@ -0,0 +1,223 @@
+# src/export.py
+#
+# "Stay exportable": writes the outreach tables out of scout.db. Tables are
+# written by DuckDB's own COPY (Parquet or CSV, optionally one directory
+# per company or per day), so rows never pass through Python. The HTML
+# outreach graph (company -> contacts -> draft -> send -> reply) is read
+# from one sorted query as a stream of Arrow record batches, each row
+# already rendered to HTML by DuckDB, and written as the batches arrive;
+# only one batch is held in memory.
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import duckdb
+import pyarrow.compute as pc
+
+from src.db.connection import get_cursor
+from src.db.replies import REPLIED_TYPES
+from src.db.telemetry import stage_timer
+from src.log import get_logger
+
+logger = get_logger("export")
+
+EXPORT_FORMATS = ["parquet", "csv"]
+EXPORT_PARTITIONS = ["company", "date"]
+
+# Exported tables and the column their rows are dated by
+EXPORT_TABLES: Dict[str, str] = {
+    "processed_companies": "last_updated",
+    "company_contacts": "added_at",
+    "email_drafts": "created_at",
+    "send_log": "sent_at",
+    "replies_log": "COALESCE(received_at, timestamp)",
+}
+
+GRAPH_FILE = "outreach_graph.html"
+GRAPH_BATCH_ROWS = int(os.getenv("EXPORT_GRAPH_BATCH_ROWS", 10_000))
+
+GRAPH_STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+details { margin: .2em 0; }
+summary { cursor: pointer; }
+.meta { color: #666; }
+.replied { color: #1a7f37; }
+.declined, .bounce { color: #cf222e; }
+"""
+REPLY_CLASSES = {"positive": "replied", "decline": "declined", "bounce": "bounce"}
+
+
+def html_sql(expr: str) -> str:
+    # SQL for html.escape(expr)
+    for char, entity in [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;")]:
+        expr = f"replace({expr}, '{char}', '{entity}')"
+    return expr
+
+
+def graph_sql() -> str:
+    # One row per contact (or per company without contacts) in company
+    # order, each carrying its own HTML: the first row of a company opens
+    # its block and the last closes it. DuckDB builds and escapes the markup,
+    # so Python only streams strings:
+    #   <details><summary>Acme · Seed · 2 contacts, 1 replied</summary>
+    #   <ul><li>Ada CTO <ada@acme.com> → draft v2 (approved) → sent 1×, …</li></ul>
+    reply_class = " ".join(f"WHEN '{k}' THEN '{v}'" for k, v in REPLY_CLASSES.items())
+    replied_types = ", ".join(f"'{t}'" for t in REPLIED_TYPES)
+    title = html_sql("company")
+    # Only http(s) URLs become links; anything else (javascript:, data:)
+    # stays plain text
+    summary = f"""
+      '<details><summary>'
+      || CASE WHEN regexp_matches(website_url, '^https?://', 'i')
+           THEN '<a href="' || {html_sql("website_url")} || '">' || {title} || '</a>'
+           ELSE {title} END
+      || ' <span class="meta">'
+      || concat_ws(
+           ' &middot; ',
+           NULLIF({html_sql("industry")}, ''),
+           NULLIF({html_sql("funding_stage")}, ''),
+           contacts || ' contacts, ' || replied || ' replied',
+           CASE WHEN NOT company_processed THEN 'not enriched' END
+         )
+      || '</span></summary><ul>'"""
+    item = f"""
+      '<li><b>' || {html_sql("COALESCE(contact_name, contact_email)")} || '</b>'
+      || CASE WHEN title <> '' THEN ' ' || {html_sql("title")} ELSE '' END
+      || ' <span class="meta">&lt;' || {html_sql("contact_email")} || '&gt;</span>'
+      || CASE WHEN versions IS NOT NULL
+           THEN ' &rarr; draft v' || versions || ' (' || {html_sql("COALESCE(status, '')")} || ')'
+           ELSE '' END
+      || CASE WHEN sent > 0
+           THEN ' &rarr; sent ' || sent || '&times;, last ' || strftime(last_sent, '%Y-%m-%d')
+           ELSE '' END
+      || CASE WHEN replies > 0
+           THEN ' &rarr; <span class="' || CASE last_reply {reply_class} ELSE '' END || '">'
+                || replies || ' replies, last '
+                || {html_sql("COALESCE(last_reply, '')")} || '</span>'
+           ELSE '' END
+      || '</li>'"""
+    return f"""
+    WITH drafts AS (
+      SELECT contact_email, max(draft_version) AS versions,
+             arg_max(status, draft_version) AS status
+      FROM email_drafts
+      GROUP BY contact_email
+    ),
+    sends AS (
+      SELECT contact_email,
+             COUNT(*) FILTER (WHERE delivery_status = 'sent') AS sent,
+             max(sent_at) FILTER (WHERE delivery_status = 'sent') AS last_sent
+      FROM send_log
+      GROUP BY contact_email
+    ),
+    replies AS (
+      SELECT contact_email, COUNT(*) AS replies,
+             arg_max(reply_type, COALESCE(received_at, timestamp)) AS last_reply
+      FROM replies_log
+      GROUP BY contact_email
+    ),
+    graph AS (
+      SELECT p.company, p.industry, p.funding_stage, p.website_url, p.company_processed,
+             c.contact_name, c.contact_email, c.title,
+             d.versions, d.status, s.sent, s.last_sent, r.replies, r.last_reply,
+             COUNT(c.contact_email) OVER company AS contacts,
+             COUNT(*) FILTER (WHERE r.last_reply IN ({replied_types})) OVER company
+               AS replied,
+             row_number() OVER (company ORDER BY c.contact_name, c.contact_email) AS position
+      FROM processed_companies p
+      LEFT JOIN company_contacts c ON c.company = p.company
+      LEFT JOIN drafts d ON d.contact_email = c.contact_email
+      LEFT JOIN sends s ON s.contact_email = c.contact_email
+      LEFT JOIN replies r ON r.contact_email = c.contact_email
+      WINDOW company AS (PARTITION BY p.company)
+    )
+    SELECT
+      CASE WHEN position = 1 THEN {summary} ELSE '' END
+      || CASE WHEN contact_email IS NOT NULL THEN {item} ELSE '' END
+      || CASE WHEN position = greatest(contacts, 1) THEN '</ul></details>' || chr(10) ELSE '' END
+        AS block,
+      position = 1 AS opens,
+      contact_email
+    FROM graph
+    ORDER BY company, contact_name, contact_email
+    """
+
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def export_table(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    out_dir: Path,
+    fmt: str = "parquet",
+    partition_by: Optional[str] = None,
+) -> int:
+    # Partitioned exports are hive-style directories (company=Acme/...,
+    # day=2026-10-06/...) that DuckDB, Spark and pandas read back as one table
+    query = f"SELECT * FROM {table}"
+    options = ["FORMAT csv, HEADER"] if fmt == "csv" else ["FORMAT parquet, COMPRESSION zstd"]
+    if partition_by is None:
+        target = out_dir / f"{table}.{fmt}"
+    else:
+        if partition_by == "date":
+            query = f"SELECT *, CAST({EXPORT_TABLES[table]} AS DATE) AS day FROM {table}"
+        options.append(f"PARTITION_BY ({'day' if partition_by == 'date' else 'company'})")
+        options.append("OVERWRITE")
+        target = out_dir / table
+    (rows,) = con.execute(
+        f"COPY ({query}) TO {sql_string(str(target))} ({', '.join(options)})"
+    ).fetchone()  # type: ignore
+    return rows
+
+
+def write_outreach_graph(
+    con: duckdb.DuckDBPyConnection, path: Path, batch_rows: int = GRAPH_BATCH_ROWS
+) -> Dict[str, int]:
+    counts = {"companies": 0, "contacts": 0}
+    reader = con.execute(graph_sql()).fetch_record_batch(batch_rows)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>Outreach graph</title><style>{GRAPH_STYLE}</style></head>\n"
+            "<body>\n<h1>Outreach graph</h1>\n"
+        )
+        for batch in reader:
+            f.write("".join(batch.column("block").to_pylist()))
+            counts["companies"] += pc.sum(batch.column("opens")).as_py() or 0
+            counts["contacts"] += batch.num_rows - batch.column("contact_email").null_count
+        f.write(
+            f"<p class=\"meta\">{counts['companies']} companies, "
+            f"{counts['contacts']} contacts</p>\n</body></html>\n"
+        )
+    return counts
+
+
+def run_export(
+    out_dir: str,
+    fmt: str = "parquet",
+    partition_by: Optional[str] = None,
+    tables: Optional[List[str]] = None,
+    graph: bool = True,
+) -> Dict[str, int]:
+    con = get_cursor()
+    target = Path(out_dir).expanduser()
+    target.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+    for table in tables or list(EXPORT_TABLES):
+        with stage_timer("export", table) as timing:
+            counts[table] = timing["rows"] = export_table(con, table, target, fmt, partition_by)
+        logger.info("[EXPORT] %s: %s rows", table, counts[table])
+    if graph:
+        with stage_timer("export", "graph") as timing:
+            graph_counts = write_outreach_graph(con, target / GRAPH_FILE)
+            timing["rows"] = graph_counts["companies"]
+        logger.info(
+            "[EXPORT] %s: %s companies, %s contacts",
+            target / GRAPH_FILE,
+            graph_counts["companies"],
+            graph_counts["contacts"],
+        )
+        counts["graph_companies"] = graph_counts["companies"]
+    return counts
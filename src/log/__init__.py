@@ -1,4 +1,2 @@
 # src/log/__init__.py
-from .config import get_logger
-
-get_logger(__name__).info("src/log/__init__.py - Logger ready!")
+from .config import SAMPLED, configure_logging, get_logger  # type: ignore
@@ -1,7 +1,14 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
 
 # Constants and environment configs
 DEFAULT_LOG_DIR = Path("logs")
@@ -9,40 +16,170 @@ DEFAULT_LOG_FILE = DEFAULT_LOG_DIR / "outreach.log"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
 MAX_LOG_BYTES = int(os.getenv("LOG_MAX_BYTES", 5 * 1024 * 1024))  # 5MB default
 BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 2))
+# "text" or "json" (one JSON object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Handlers run on a background listener thread instead of the caller's
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() not in ("0", "false", "no")
+# Keep 1 in N of the records logged with extra=SAMPLED (per message, per run)
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 1))
 
-# Make sure the log directory exists
-DEFAULT_LOG_DIR.mkdir(parents=True, exist_ok=True)
+# Every module logs under a child of this one, e.g. "scout.enrichment"
+BASE_LOGGER = "scout"
+TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
 
-# Global logger instance
-_logger = None
+# Mark noisy per-item messages: logger.info("✅ Enriched: %s", company, extra=SAMPLED)
+SAMPLED = {"sampled": True}
 
 
-def get_logger(name: str = "scout") -> logging.Logger:
-    global _logger
+class LazyRotatingFileHandler(RotatingFileHandler):
+    # The log file (and its directory) is only created on the first record
+    def __init__(self, filename: Path, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
 
-    if _logger:
-        return _logger
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
 
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, LOG_LEVEL, logging.DEBUG))
-    logger.propagate = False  # Avoid duplicate logs in some frameworks
 
-    if not logger.handlers:
-        formatter = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
-        )
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    # Lets the first record of each sampled message through, then every Nth.
+    # Counts are keyed by logger and unformatted message, so they are cheap
+    # and cover one run of the process. Warnings and errors are never dropped.
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self.seen: Dict[Tuple[str, str], int] = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or record.levelno >= logging.WARNING:
+            return True
+        if not getattr(record, "sampled", False):
+            return True
+        # Without the queue this filter sits on every handler; decide once
+        keep = getattr(record, "sample_keep", None)
+        if keep is not None:
+            return keep
+        key = (record.name, str(record.msg))
+        with self._lock:
+            count = self.seen.get(key, 0)
+            self.seen[key] = count + 1
+            record.sample_keep = keep = count % self.every == 0
+            if not keep:
+                self.dropped += 1
+        return keep
+
+
+class InProcessQueueHandler(QueueHandler):
+    # The stock prepare() formats the message on the calling thread so the
+    # record can be pickled; the queue never leaves this process, so the
+    # listener thread formats it instead.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
-        # Console handler
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
 
-        # File handler (rotating)
-        file_handler = RotatingFileHandler(
-            DEFAULT_LOG_FILE, maxBytes=MAX_LOG_BYTES, backupCount=BACKUP_COUNT
+_listener: Optional[QueueListener] = None
+_sampler: Optional[SamplingFilter] = None
+_configured = False
+_config_lock = threading.Lock()
+
+
+def build_handlers(
+    fmt: str = LOG_FORMAT,
+    stream: Optional[TextIO] = None,
+    log_file: Optional[Path] = DEFAULT_LOG_FILE,
+) -> List[logging.Handler]:
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+    # Console handler
+    stream_handler = logging.StreamHandler(stream or sys.stderr)
+    stream_handler.setFormatter(formatter)
+    handlers: List[logging.Handler] = [stream_handler]
+
+    # File handler (rotating)
+    if log_file is not None:
+        file_handler = LazyRotatingFileHandler(
+            log_file, maxBytes=MAX_LOG_BYTES, backupCount=BACKUP_COUNT
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    return handlers
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    use_queue: bool = LOG_QUEUE,
+    sample_every: int = LOG_SAMPLE_EVERY,
+    stream: Optional[TextIO] = None,
+    log_file: Optional[Path] = DEFAULT_LOG_FILE,
+) -> logging.Logger:
+    # Safe to call again (e.g. from tests or a CLI flag): the previous
+    # handlers and listener are replaced.
+    global _listener, _sampler, _configured
+
+    with _config_lock:
+        base = logging.getLogger(BASE_LOGGER)
+        base.setLevel(getattr(logging, level.upper(), logging.DEBUG))
+        base.propagate = False  # Avoid duplicate logs in some frameworks
+
+        stop_logging()
+        for handler in list(base.handlers):
+            base.removeHandler(handler)
+            handler.close()
+
+        handlers = build_handlers(fmt, stream, log_file)
+        _sampler = SamplingFilter(sample_every)
+        if use_queue:
+            records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            queue_handler = InProcessQueueHandler(records)
+            # Sampled-out records are dropped before they are even queued
+            queue_handler.addFilter(_sampler)
+            base.addHandler(queue_handler)
+            _listener = QueueListener(records, *handlers, respect_handler_level=True)
+            _listener.start()
+        else:
+            for handler in handlers:
+                handler.addFilter(_sampler)
+                base.addHandler(handler)
+        _configured = True
+    return base
+
+
+def stop_logging() -> None:
+    # Drains the queue so nothing logged before exit is lost
+    global _listener
+
+    if _sampler is not None and _sampler.dropped:
+        logging.getLogger(BASE_LOGGER).info(
+            "[LOG] %s sampled records suppressed", _sampler.dropped
+        )
+        _sampler.dropped = 0
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
 
-    _logger = logger
-    return logger
+def get_logger(name: str = BASE_LOGGER) -> logging.Logger:
+    if not _configured:
+        configure_logging()
+    if name == BASE_LOGGER:
+        return logging.getLogger(BASE_LOGGER)
+    return logging.getLogger(f"{BASE_LOGGER}.{name}")
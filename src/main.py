@@ -1,14 +1,107 @@
 # src/main.py
-from db.init import init_tables
-from src.db.insert import sync_table
+import hashlib
+from typing import Any, Dict, List
+
+from src.clients.gsuite import (
+    SHEETS_PAGE_SIZE,
+    get_company_research_sheet_name,
+    get_processed_companies_sheet_name,
+    get_sheet_url,
+    get_sheets_session,
+    update_checksum,
+    values_to_records,
+)
+from src.db.init import init_tables
+from src.db.insert import (
+    append_stage_chunk,
+    begin_stage,
+    commit_stage,
+    drop_stage,
+    finish_stage,
+)
+from src.db.telemetry import stage_timer
+from src.db.sync_state import load_sync_states, save_sync_state
 from src.constants.tables import TABLE_PROCESSED_COMPANIES, TABLE_COMPANY_RESEARCH
+from src.log import get_logger
+
+logger = get_logger("sync")
+
+
+def sync_google_sheets_to_duckdb(
+    force: bool = False, page_size: int = SHEETS_PAGE_SIZE
+) -> Dict[str, Dict[str, int]]:
+    sheet_names = {
+        TABLE_PROCESSED_COMPANIES: get_processed_companies_sheet_name(),
+        TABLE_COMPANY_RESEARCH: get_company_research_sheet_name(),
+    }
+    tables = {sheet_name: table_name for table_name, sheet_name in sheet_names.items()}
+    sheet_url = get_sheet_url()
+    session = get_sheets_session()
+    states = load_sync_states()
+
+    # Cheap metadata call first: an untouched spreadsheet needs no download
+    revision = session.revision(sheet_url)
+    if (
+        not force
+        and revision is not None
+        and all(states.get(name, (None,))[0] == revision for name in sheet_names.values())
+    ):
+        logger.info("[SYNC] Sheet unchanged since revision %s, skipping sync", revision)
+        return {}
 
+    # Pages are appended to a raw staging table as they arrive, so memory is
+    # bounded by the page size rather than the sheet size.
+    headers: Dict[str, List[Any]] = {}
+    hashers: Dict[str, Any] = {}
+    offsets: Dict[str, int] = {}
+    try:
+        for table_name in sheet_names:
+            begin_stage(table_name)
+            offsets[table_name] = 0
+        with stage_timer("sync", "fetch") as timing:
+            for sheet_name, rows in session.iter_pages(
+                sheet_url, list(sheet_names.values()), page_size
+            ):
+                table_name = tables[sheet_name]
+                if sheet_name not in headers:
+                    headers[sheet_name], rows = (rows[0], rows[1:]) if rows else ([], [])
+                    hashers[sheet_name] = hashlib.sha256()
+                    update_checksum(hashers[sheet_name], [headers[sheet_name]])
+                update_checksum(hashers[sheet_name], rows)
+                if headers[sheet_name]:
+                    offsets[table_name] += append_stage_chunk(
+                        table_name,
+                        values_to_records([headers[sheet_name]] + rows),
+                        offsets[table_name],
+                    )
+            timing["rows"] = sum(offsets.values())
+    except Exception:
+        for table_name in sheet_names:
+            drop_stage(table_name)
+        raise
 
-def sync_google_sheets_to_duckdb() -> None:
-    [
-        sync_table(table_name=table_name)
-        for table_name in [TABLE_PROCESSED_COMPANIES, TABLE_COMPANY_RESEARCH]
-    ]
+    results: Dict[str, Dict[str, int]] = {}
+    for table_name, sheet_name in sheet_names.items():
+        checksum = hashers[sheet_name].hexdigest()
+        state = states.get(sheet_name)
+        if not force and state is not None and state[1] == checksum:
+            logger.info(
+                "[SYNC] '%s' content unchanged, skipping %s", sheet_name, table_name
+            )
+            drop_stage(table_name)
+            save_sync_state(sheet_name, revision, checksum)
+            continue
+        try:
+            with stage_timer(f"sync.{table_name}", "stage_finish"):
+                stage_name = finish_stage(table_name)
+            results[table_name] = commit_stage(table_name, stage_name)
+        except Exception as e:
+            # State is left as-is so the next run retries this table
+            logger.exception("[SYNC] Failed syncing table '%s': %s", table_name, e)
+            drop_stage(table_name)
+            continue
+        save_sync_state(sheet_name, revision, checksum)
+    return results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+# src/report.py
+#
+# Step 8 dashboard. Everything is read from the summary tables maintained by
+# src.db.summary, so rendering stays instant however large the logs grow.
+import html
+import json
+from typing import Any, Dict, List
+
+from src.db.connection import get_cursor
+from src.db.init import init_tables
+from src.db.summary import refresh_summaries
+
+TOP_TAGS = 10
+
+
+def build_report(top_tags: int = TOP_TAGS) -> Dict[str, Any]:
+    con = get_cursor()
+    total, enriched = con.execute(
+        "SELECT COUNT(*), COUNT(*) FILTER (WHERE enriched) FROM report_companies"
+    ).fetchone()  # type: ignore
+    sent_total, sent_this_week = con.execute(
+        """
+        SELECT
+          COALESCE(SUM(emails), 0),
+          COALESCE(SUM(emails) FILTER (WHERE day >= date_trunc('week', current_date)), 0)
+        FROM report_daily_sends
+        WHERE delivery_status = 'sent'
+        """
+    ).fetchone()  # type: ignore
+    replies = dict(
+        con.execute(
+            "SELECT reply_type, SUM(replies) FROM report_daily_replies GROUP BY reply_type"
+        ).fetchall()
+    )
+    (responded,) = con.execute(
+        "SELECT COUNT(*) FROM report_responded_contacts"
+    ).fetchone()  # type: ignore
+    tag_rows = con.execute(
+        """
+        SELECT COALESCE(industry, '') AS industry, tag, COUNT(*) AS companies
+        FROM report_companies, unnest(tags) AS t(tag)
+        GROUP BY ALL
+        ORDER BY companies DESC, industry, tag
+        LIMIT ?
+        """,
+        [top_tags],
+    ).fetchall()
+
+    return {
+        "companies": {"total": total, "enriched": enriched},
+        "emails": {"sent_total": int(sent_total), "sent_this_week": int(sent_this_week)},
+        "replies": {k: int(v) for k, v in replies.items()},
+        "response_rate": round(responded / sent_total, 4) if sent_total else 0.0,
+        "top_tags": [
+            {"industry": industry, "tag": tag, "companies": n}
+            for industry, tag, n in tag_rows
+        ],
+    }
+
+
+def format_text(report: Dict[str, Any]) -> str:
+    companies = report["companies"]
+    emails = report["emails"]
+    lines = [
+        f"Companies enriched:  {companies['enriched']} / {companies['total']}",
+        f"Emails sent (week):  {emails['sent_this_week']}",
+        f"Emails sent (total): {emails['sent_total']}",
+        f"Response rate:       {report['response_rate']:.1%}",
+    ]
+    if report["replies"]:
+        lines.append(
+            "Replies:             "
+            + ", ".join(f"{k} {v}" for k, v in sorted(report["replies"].items()))
+        )
+    if report["top_tags"]:
+        lines.append("Top tags:")
+        lines.extend(
+            f"  {row['tag']:<24} {row['industry'] or '-':<20} {row['companies']}"
+            for row in report["top_tags"]
+        )
+    return "\n".join(lines)
+
+
+def format_html(report: Dict[str, Any]) -> str:
+    def row(cells: List[Any], tag: str = "td") -> str:
+        return "<tr>" + "".join(f"<{tag}>{html.escape(str(c))}</{tag}>" for c in cells) + "</tr>"
+
+    companies = report["companies"]
+    emails = report["emails"]
+    summary = [
+        row(["Companies enriched", f"{companies['enriched']} / {companies['total']}"]),
+        row(["Emails sent this week", emails["sent_this_week"]]),
+        row(["Emails sent total", emails["sent_total"]]),
+        row(["Response rate", f"{report['response_rate']:.1%}"]),
+    ]
+    tags = [row(["Tag", "Industry", "Companies"], "th")] + [
+        row([r["tag"], r["industry"], r["companies"]]) for r in report["top_tags"]
+    ]
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Scout report</title></head>\n"
+        "<body>\n<h1>Scout report</h1>\n"
+        f"<table>{''.join(summary)}</table>\n"
+        "<h2>Top tags</h2>\n"
+        f"<table>{''.join(tags)}</table>\n"
+        "</body></html>\n"
+    )
+
+
+def render_report(report: Dict[str, Any], fmt: str = "text") -> str:
+    if fmt == "json":
+        return json.dumps(report, indent=2)
+    if fmt == "html":
+        return format_html(report)
+    return format_text(report)
+
+
+if __name__ == "__main__":
+    init_tables()
+    refresh_summaries()
+    print(render_report(build_report()))
@@ -1,5 +1,113 @@
 # tests/conftest.py
+import asyncio
 import sys
 import os
+from types import SimpleNamespace
+
+import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+# Tests swap in fake OpenAI clients; never hit the real API.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+# Console only: test runs never write to the repo's logs/ directory
+from src.log import configure_logging  # noqa: E402
+
+configure_logging(log_file=None)
+
+from src.clients import llm_cache, ratelimit  # noqa: E402
+from src.clients import openai as enrichment  # noqa: E402
+from src.db import connection, telemetry  # noqa: E402
+from src.db.init import init_tables  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def scout_db():
+    # Every test gets its own in-memory database instead of ~/.scout/scout.db
+    connection.configure(connection.MEMORY_DB)
+    yield connection.get_cursor()
+    connection.configure()
+
+
+@pytest.fixture(autouse=True)
+def rate_limiter(monkeypatch):
+    # No pacing or backoff delays in tests unless a test asks for them
+    limiter = ratelimit.RateLimiter(
+        requests_per_minute=1e9, tokens_per_minute=1e12, backoff_base=0
+    )
+    monkeypatch.setattr(ratelimit, "_limiter", limiter)
+    return limiter
+
+
+@pytest.fixture(autouse=True)
+def telemetry_recorder(scout_db, monkeypatch):
+    # A fresh buffer per test; whatever is left is dropped, never flushed
+    # into another test's database
+    recorder = telemetry.Telemetry()
+    monkeypatch.setattr(telemetry, "_telemetry", recorder)
+    yield recorder
+    recorder.close(flush=False)
+
+
+@pytest.fixture
+def companies_db(scout_db):
+    def make(companies):
+        init_tables()
+        for company in companies:
+            scout_db.execute(
+                "INSERT INTO processed_companies (company) VALUES (?)", [company]
+            )
+        return scout_db
+
+    return make
+
+
+@pytest.fixture
+def llm_cache_db(tmp_path, monkeypatch):
+    # A cache of the test's own instead of ~/.scout/llm_cache.db
+    cache = llm_cache.LLMCache(path=tmp_path / "cache.db")
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+class FakeAsyncCompletions:
+    # Stands in for client.chat.completions: `responder(prompt, kwargs)`
+    # returns the message content (or raises) for the last message's prompt.
+    # Each call takes `delay` seconds; max_in_flight is the most at once.
+    def __init__(self, responder, delay=0.0):
+        self.responder = responder
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def calls(self):
+        return len(self.prompts)
+
+    async def create(self, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            prompt = kwargs["messages"][-1]["content"]
+            self.prompts.append(prompt)
+            message = SimpleNamespace(content=self.responder(prompt, kwargs))
+            usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_async_client(monkeypatch, llm_cache_db):
+    # fake_async_client(responder) puts a fake async OpenAI client (and a
+    # fresh LLM cache) in place and returns its completions
+    def install(responder, delay=0.0):
+        completions = FakeAsyncCompletions(responder, delay)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(enrichment, "_async_client", client)
+        return completions
+
+    return install
@@ -0,0 +1,66 @@
+# tests/fake_gspread.py
+#
+# In-memory stand-in for the parts of gspread the sync uses. Worksheets are
+# plain lists of rows (header first); every API round trip is counted.
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+
+def _read_range(rows: List[List[Any]], a1_range: str) -> List[List[Any]]:
+    # Supports the two shapes the sync requests: 'Sheet' and 'Sheet'!start:end
+    if "!" not in a1_range:
+        selected = rows
+    else:
+        start, end = a1_range.rsplit("!", 1)[1].split(":")
+        selected = rows[int(start) - 1 : int(end)]
+    # Like the Sheets API, trailing blank rows are not returned
+    while selected and not selected[-1]:
+        selected = selected[:-1]
+    return selected
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend: "FakeGspreadClient"):
+        self.backend = backend
+
+    def get_lastUpdateTime(self) -> str:
+        self.backend.calls["revision"] += 1
+        return f"rev-{self.backend.revision}"
+
+    def worksheets(self) -> List[SimpleNamespace]:
+        self.backend.calls["metadata"] += 1
+        return [
+            SimpleNamespace(title=name, row_count=len(rows) + self.backend.blank_rows)
+            for name, rows in self.backend.worksheets.items()
+        ]
+
+    def values_batch_get(self, ranges: List[str], params: Any = None) -> Dict[str, Any]:
+        self.backend.calls["batch_get"] += 1
+        value_ranges = []
+        for a1_range in ranges:
+            name = a1_range.split("!")[0].strip("'")
+            value_ranges.append(
+                {"range": a1_range, "values": _read_range(self.backend.worksheets[name], a1_range)}
+            )
+        return {"valueRanges": value_ranges}
+
+
+class FakeGspreadClient:
+    def __init__(self, worksheets: Dict[str, List[List[Any]]], blank_rows: int = 0):
+        self.worksheets = worksheets
+        # Empty grid rows below the data, as in a real sheet
+        self.blank_rows = blank_rows
+        self.revision = 1
+        self.calls = {"open": 0, "revision": 0, "metadata": 0, "batch_get": 0}
+
+    def open_by_url(self, url: str) -> FakeSpreadsheet:
+        self.calls["open"] += 1
+        return FakeSpreadsheet(self)
+
+    def edit(self, sheet_name: str, rows: List[List[Any]]) -> None:
+        self.worksheets[sheet_name] = rows
+        self.revision += 1
+
+    def touch(self) -> None:
+        # Revision changes without a content change (e.g. formatting edits)
+        self.revision += 1
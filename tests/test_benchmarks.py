@@ -0,0 +1,30 @@
+import json
+
+from benchmarks import compare, run
+
+
+def test_benchmark_suite_runs_offline_and_writes_json(tmp_path):
+    output = tmp_path / "results.json"
+    assert run.main(
+        [
+            "--sizes", "200",
+            "--page-size", "50",
+            "--enrich-companies", "5",
+            "--sequential-companies", "2",
+            "--latency-ms", "0",
+            "--error-rate", "0.1",
+            "--output", str(output),
+        ]
+    ) == 0
+
+    report = json.loads(output.read_text())
+    results = {r["name"]: r for r in report["results"]}
+    assert results["sync_table_initial"]["inserted"] == 200
+    assert results["sync_table_unchanged"]["updated"] == 0
+    assert results["sync_table_delta"]["updated"] == 20
+    assert results["sync_google_sheets"]["rows_written"] == 400
+    assert results["run_enrichment_pipeline_async"]["processed"] == 5
+    assert results["run_enrichment_pipeline_sequential"]["processed"] == 2
+
+    # Comparing a run with itself never reports a regression
+    assert compare.main([str(output), str(output)]) == 0
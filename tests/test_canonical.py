@@ -0,0 +1,156 @@
+import pytest
+
+from src import cli
+from src.clients import contacts, drafts, openai_batch
+from src.common.models import get_empty_enriched_company
+from src.db import canonical, insert
+from src.db.canonical import PENDING_COMPANIES_SQL
+from src.db.writer import apply_metadata_batch
+
+
+@pytest.fixture
+def sync_names(monkeypatch, companies_db):
+    con = companies_db([])
+
+    def sync(names):
+        rows = [{"Company": name, "Company Processed": "FALSE"} for name in names]
+        monkeypatch.setattr(insert, "get_incoming_for_table", lambda _: rows)
+        insert.sync_table("processed_companies")
+        return dict(con.execute("SELECT alias, canonical FROM company_aliases").fetchall())
+
+    return con, sync
+
+
+@pytest.mark.parametrize(
+    "name, key",
+    [
+        ("Acme", "acme"),
+        ("ACME, Inc.", "acme"),
+        ("The Acme Company", "acme"),
+        ("https://www.acme.io/about", "acme"),
+        ("acme.co.uk", "acme"),
+        ("Société Générale S.A.", "societegenerale"),
+        ("Open AI", "openai"),
+        ("AT&T", "atandt"),
+        ("Inc.", "inc"),
+    ],
+)
+def test_canonical_key(scout_db, name, key):
+    sql = f"SELECT {canonical.canonical_key_sql('name')} FROM (SELECT ? AS name)"
+    assert scout_db.execute(sql, [name]).fetchone() == (key,)
+
+
+def test_sync_groups_spellings_and_similar_names(sync_names):
+    con, sync = sync_names
+    aliases = sync(
+        [
+            "Acme Inc.",
+            "Acme",
+            "acme.io",
+            "Initech Solutions",
+            "Initech Solution",
+            "Globex",
+            "Stripe",
+            "Stripes",
+            "Company 0000001",
+            "Company 0000002",
+        ]
+    )
+    assert aliases["Acme Inc."] == aliases["acme.io"] == "Acme"
+    assert aliases["Initech Solutions"] == aliases["Initech Solution"] == "Initech Solution"
+    # Too far apart, or told apart by their numbers
+    for name in ["Globex", "Stripe", "Stripes", "Company 0000001", "Company 0000002"]:
+        assert aliases[name] == name
+
+    (group,) = canonical.merged_groups(con)
+    assert group["canonical"] == "Initech Solution"
+    assert group["aliases"][0]["method"] == "similar"
+    assert len(canonical.merged_groups(con, include_exact=True)) == 2
+    assert sorted(c for (c,) in con.execute(PENDING_COMPANIES_SQL).fetchall()) == [
+        "Acme",
+        "Company 0000001",
+        "Company 0000002",
+        "Globex",
+        "Initech Solution",
+        "Stripe",
+        "Stripes",
+    ]
+
+
+def test_later_syncs_only_group_new_names(sync_names):
+    con, sync = sync_names
+    sync(["Acme", "Acme Inc."])
+    aliases = sync(["Acme", "Acme Inc.", "ACME Corp", "Globex"])
+    assert aliases == {
+        "Acme": "Acme",
+        "Acme Inc.": "Acme",
+        "ACME Corp": "Acme",
+        "Globex": "Globex",
+    }
+    # The canonical leaves the sheet: what is left of its group is regrouped
+    aliases = sync(["Acme Inc.", "ACME Corp", "Globex"])
+    assert aliases["Acme Inc."] == aliases["ACME Corp"] == "ACME Corp"
+    assert con.execute(
+        "SELECT COUNT(*) FROM company_keys WHERE alias_key = 'acme'"
+    ).fetchone() == (1,)
+
+
+def test_enrichment_fans_out_to_aliases(sync_names):
+    con, sync = sync_names
+    sync(["Acme", "Acme Inc."])
+    enriched = {**get_empty_enriched_company(), "summary": "Rockets"}
+    apply_metadata_batch(con, [("Acme", enriched)])
+    assert con.execute(
+        "SELECT company, summary, company_processed FROM processed_companies ORDER BY company"
+    ).fetchall() == [("Acme", "Rockets", True), ("Acme Inc.", "Rockets", True)]
+
+    # A new alias of an enriched company is filled in by the sync itself
+    sync(["Acme", "Acme Inc.", "acme.io"])
+    assert con.execute(
+        "SELECT summary FROM processed_companies WHERE company = 'acme.io'"
+    ).fetchone() == ("Rockets",)
+    assert con.execute(PENDING_COMPANIES_SQL).fetchall() == []
+
+
+def test_manual_split_and_merge(sync_names):
+    con, sync = sync_names
+    sync(["Acme", "Acme Inc.", "Globex"])
+    apply_metadata_batch(con, [("Acme", {**get_empty_enriched_company(), "summary": "Rockets"})])
+
+    assert canonical.split_alias(con, "Acme Inc.")
+    assert sorted(con.execute(PENDING_COMPANIES_SQL).fetchall()) == [("Acme Inc.",), ("Globex",)]
+
+    assert canonical.merge_alias(con, "Globex", "Acme Inc.")
+    assert canonical.merge_alias(con, "Acme Inc.", "Acme")
+    aliases = sync(["Acme", "Acme Inc.", "Globex"])
+    assert aliases == {"Acme": "Acme", "Acme Inc.": "Acme", "Globex": "Acme"}
+    assert con.execute(
+        "SELECT summary FROM processed_companies WHERE company = 'Globex'"
+    ).fetchone() == ("Rockets",)
+    assert not canonical.merge_alias(con, "Globex", "Nobody")
+
+
+@pytest.mark.parametrize("mode", ["async", "sequential", "batch"])
+def test_enrich_creates_the_alias_table_on_an_older_database(
+    monkeypatch, tmp_path, companies_db, mode
+):
+    monkeypatch.setattr(openai_batch, "BATCH_DIR", tmp_path)
+    con = companies_db([])
+    con.execute("DROP TABLE company_aliases")
+    assert cli.main(["enrich", "--mode", mode, "--local"]) == 0
+    assert con.execute("SELECT COUNT(*) FROM company_aliases").fetchone() == (0,)
+
+
+def test_contacts_and_drafts_skip_aliases(sync_names):
+    con, sync = sync_names
+    sync(["Acme", "Acme Inc."])
+    apply_metadata_batch(con, [("Acme", {**get_empty_enriched_company(), "summary": "Rockets"})])
+    assert [company for company, _ in contacts.get_companies_for_discovery()] == ["Acme"]
+
+    con.execute(
+        """
+        INSERT INTO company_contacts (company, contact_name, contact_email) VALUES
+          ('Acme', 'Ada', 'ada@acme.com'), ('Acme Inc.', 'Bob', 'bob@acme.com')
+        """
+    )
+    assert [c["contact_email"] for c in drafts.get_pending_contexts()] == ["ada@acme.com"]
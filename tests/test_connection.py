@@ -0,0 +1,40 @@
+import threading
+
+import duckdb
+import pytest
+
+from src.db import connection
+
+
+def test_cursors_are_per_thread():
+    main_cursor = connection.get_cursor()
+    assert connection.get_cursor() is main_cursor
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(connection.get_cursor()))
+    thread.start()
+    thread.join()
+    assert seen[0] is not main_cursor
+
+
+def test_transaction_rolls_back_on_error():
+    cur = connection.get_cursor()
+    cur.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(RuntimeError):
+        with connection.transaction() as tx:
+            tx.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    with connection.transaction() as tx:
+        tx.execute("INSERT INTO t VALUES (2)")
+    assert cur.execute("SELECT x FROM t").fetchall() == [(2,)]
+
+
+def test_read_only_mode(tmp_path):
+    path = tmp_path / "scout.db"
+    connection.configure(path)
+    connection.get_cursor().execute("CREATE TABLE t (x INTEGER)")
+
+    connection.configure(path, read_only=True)
+    assert connection.get_cursor().execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+    with pytest.raises(duckdb.Error):
+        connection.get_cursor().execute("INSERT INTO t VALUES (1)")
@@ -0,0 +1,139 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src.clients import contacts, llm_cache
+from src.clients import openai as enrichment
+
+
+class FakeContactCompletions:
+    def __init__(self, people):
+        self.people = people
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        prompt = kwargs["messages"][-1]["content"]
+        company = prompt.split('"')[1]
+        content = self.people[company]
+        if not isinstance(content, str):
+            content = "```json\n" + json.dumps(content) + "\n```"
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def enriched_db(companies_db, names):
+    con = companies_db(names)
+    con.execute("UPDATE processed_companies SET company_processed = TRUE")
+    return con
+
+
+def use_fake(monkeypatch, tmp_path, people):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    completions = FakeContactCompletions(people)
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    return completions
+
+
+def test_parse_contacts_normalizes_and_drops_unusable_entries():
+    content = json.dumps(
+        [
+            {"name": " Jane Doe ", "role": "CTO", "email": "Jane@Acme.COM",
+             "linkedin": "www.LinkedIn.com/in/Jane-Doe/?trk=x", "note": "Hires"},
+            {"name": "No Email", "role": "CEO", "email": "unknown"},
+            "not a person",
+        ]
+    )
+    assert contacts.parse_contacts("Acme", content) == [
+        {
+            "company": "Acme",
+            "contact_name": "Jane Doe",
+            "contact_email": "jane@acme.com",
+            "contact_linkedin_url": "https://linkedin.com/in/jane-doe",
+            "title": "CTO",
+            "note": "Hires",
+        }
+    ]
+
+
+def test_discovery_dedupes_within_run_and_against_existing(monkeypatch, tmp_path, companies_db):
+    con = enriched_db(companies_db, ["Acme", "Globex", "Initech"])
+    con.execute(
+        """
+        INSERT INTO company_contacts (company, contact_name, contact_email, contact_linkedin_url, title)
+        VALUES ('Acme', 'Old Bob', 'bob@acme.com', 'https://linkedin.com/in/bob', 'Engineer')
+        """
+    )
+    completions = use_fake(
+        monkeypatch,
+        tmp_path,
+        {
+            "Acme": [
+                {"name": "Jane", "email": "jane@acme.com", "role": "CTO"},
+                {"name": "Jane", "email": "JANE@acme.com", "role": "CTO"},
+                {"name": "Bob", "email": "bob@acme.com", "role": "VP Eng"},
+            ],
+            # Same person as Bob under a guessed address
+            "Globex": [{"name": "Bob", "email": "b@globex.com", "linkedin": "linkedin.com/in/bob"}],
+            "Initech": "no json here",
+        },
+    )
+
+    written = contacts.run_contact_discovery(max_concurrent_companies=3)
+
+    assert completions.calls == 3
+    assert written == 2
+    assert con.execute(
+        "SELECT contact_email, company, contact_name, title FROM company_contacts ORDER BY contact_email"
+    ).fetchall() == [
+        ("bob@acme.com", "Acme", "Old Bob", "VP Eng"),
+        ("jane@acme.com", "Acme", "Jane", "CTO"),
+    ]
+    # Companies with an answer are done, even with no new people; the failed
+    # one is logged and stays pending
+    assert con.execute(
+        "SELECT company FROM processed_companies WHERE contacts_discovered_at IS NULL"
+    ).fetchall() == [("Initech",)]
+    assert con.execute("SELECT stage, company FROM api_errors_log").fetchall() == [
+        ("contacts", "Initech")
+    ]
+
+
+def test_discovery_skips_companies_already_searched(monkeypatch, tmp_path, companies_db):
+    enriched_db(companies_db, ["Acme"])
+    completions = use_fake(
+        monkeypatch, tmp_path, {"Acme": [{"name": "Jane", "email": "jane@acme.com"}]}
+    )
+    contacts.run_contact_discovery()
+    assert contacts.run_contact_discovery() == 0
+    assert completions.calls == 1
+
+
+def test_rediscovery_keeps_details_the_new_answer_lacks(monkeypatch, tmp_path, companies_db):
+    con = enriched_db(companies_db, ["Acme"])
+    con.execute(
+        """
+        INSERT INTO company_contacts (company, contact_name, contact_email, title, note)
+        VALUES ('Acme', 'Jane', 'jane@acme.com', 'CTO', 'Hires backend engineers'),
+               ('Acme', 'Bob', 'bob@acme.com', 'Engineer', 'Writes the blog')
+        """
+    )
+    use_fake(
+        monkeypatch,
+        tmp_path,
+        {
+            "Acme": [
+                {"name": "Jane", "email": "jane@acme.com"},
+                {"name": "Bob", "email": "bob@acme.com", "role": "VP Eng", "note": " "},
+            ]
+        },
+    )
+    contacts.run_contact_discovery(rediscover=True)
+    assert con.execute(
+        "SELECT contact_email, title, note FROM company_contacts ORDER BY contact_email"
+    ).fetchall() == [
+        ("bob@acme.com", "VP Eng", "Writes the blog"),
+        ("jane@acme.com", "CTO", "Hires backend engineers"),
+    ]
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.clients import drafts, llm_cache
+from src.clients import openai as enrichment
+from src.db.drafts import apply_drafts_batch
+
+
+class FakeDraftCompletions:
+    def __init__(self, fail_for: str = ""):
+        self.fail_for = fail_for
+        self.prompts = []
+
+    async def create(self, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        if self.fail_for and self.fail_for in prompt:
+            content = "   "
+        else:
+            content = f"Hi! draft #{len(self.prompts)}"
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def profile(tmp_path):
+    path = tmp_path / "you.json"
+    path.write_text(
+        json.dumps(
+            {
+                "title": "Backend Engineer",
+                "github": {"url": "https://github.com/me", "blurb": "I build {things}"},
+                "tone_preference": "Warm",
+            }
+        )
+    )
+    return path
+
+
+@pytest.fixture
+def drafts_db(companies_db):
+    con = companies_db(["Acme", "Globex"])
+    con.execute(
+        """
+        UPDATE processed_companies SET company_processed = company = 'Acme',
+          summary = 'Rockets', tone_advice = 'Technical'
+        """
+    )
+    con.execute(
+        """
+        INSERT INTO company_contacts (company, contact_name, contact_email, title) VALUES
+          ('Acme', 'Jane', 'jane@acme.com', 'CTO'),
+          ('Acme', 'Bob', 'bob@acme.com', 'Recruiter'),
+          ('Globex', 'Hank', 'hank@globex.com', 'CEO')
+        """
+    )
+    con.execute(
+        "INSERT INTO contact_profiles (contact_email, linkedin_headline) VALUES ('jane@acme.com', 'Scaling infra')"
+    )
+    return con
+
+
+def test_prompt_renders_sender_once_and_contact_context(profile):
+    prompt = drafts.DraftPrompt(drafts.load_profile(profile))
+    text = prompt.render(
+        {"company": "Acme", "contact_name": "Jane", "tags": ["AI", "Infra"], "linkedin_headline": "Scaling infra"}
+    )
+    assert "I build {things}" in text
+    assert "🏷️ Tags: AI, Infra" in text
+    assert "🧠 Tone: Warm" in text
+    assert "Scaling infra" in text
+
+
+def test_drafts_are_generated_for_enriched_contacts_only(monkeypatch, tmp_path, profile, drafts_db):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    completions = FakeDraftCompletions(fail_for="Bob")
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+
+    written = asyncio.run(drafts.run_draft_generation_async(profile_path=profile))
+
+    assert written == 1
+    assert drafts_db.execute(
+        "SELECT contact_email, draft_version, tone, intent, status FROM email_drafts"
+    ).fetchall() == [("jane@acme.com", 1, "Technical", "networking", "pending_review")]
+    assert drafts_db.execute("SELECT stage, contact_email FROM api_errors_log").fetchall() == [
+        ("drafts", "bob@acme.com")
+    ]
+    # Jane already has a draft, so only Bob is pending on the next run
+    assert [c["contact_email"] for c in drafts.get_pending_contexts()] == ["bob@acme.com"]
+
+
+def test_batch_versions_continue_per_contact(drafts_db):
+    def draft(email, content):
+        return {
+            "company": "Acme",
+            "contact_name": "x",
+            "contact_email": email,
+            "tone": "t",
+            "draft_content": content,
+            "intent": "networking",
+        }
+
+    apply_drafts_batch(drafts_db, [draft("jane@acme.com", "a")])
+    apply_drafts_batch(
+        drafts_db,
+        [draft("jane@acme.com", "b"), draft("bob@acme.com", "c"), draft("jane@acme.com", "d")],
+    )
+
+    assert drafts_db.execute(
+        "SELECT contact_email, draft_version, draft_content FROM email_drafts ORDER BY contact_email, draft_version"
+    ).fetchall() == [
+        ("bob@acme.com", 1, "c"),
+        ("jane@acme.com", 1, "a"),
+        ("jane@acme.com", 2, "b"),
+        ("jane@acme.com", 3, "d"),
+    ]
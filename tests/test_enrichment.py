@@ -0,0 +1,147 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+
+from src.clients import enrichment_compare, llm_cache
+from src.clients import openai as enrichment
+from src.common.models import EnrichedCompany
+
+
+class FakeCompletions:
+    def __init__(self, delay: float = 0.01, fail_for: str = ""):
+        self.delay = delay
+        self.fail_for = fail_for
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        prompt = kwargs["messages"][-1]["content"]
+        if self.fail_for and self.fail_for in prompt:
+            response = httpx.Response(
+                429, request=httpx.Request("POST", "https://api.openai.com")
+            )
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        if kwargs.get("response_format"):
+            content = json.dumps({"summary": "structured", "tags": ["AI"], "investors": []})
+        elif "Return a JSON object" in prompt:
+            content = json.dumps({"summary": "ok", "tags": ["AI"], "investors": []})
+        else:
+            content = f"answer to {prompt}"
+        message = SimpleNamespace(content=content)
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def test_async_pipeline_respects_request_cap(monkeypatch, tmp_path, companies_db):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    companies = [f"Company {i}" for i in range(10)]
+    con = companies_db(companies)
+    completions = FakeCompletions()
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+
+    asyncio.run(
+        enrichment.run_enrichment_pipeline_async(
+            max_concurrent_companies=4, max_inflight_requests=6
+        )
+    )
+
+    assert completions.calls == len(companies) * 7
+    assert completions.max_in_flight <= 6
+    # Questions of a single company fan out together, so the cap is reached
+    assert completions.max_in_flight == 6
+    processed = con.execute(
+        "SELECT COUNT(*) FROM processed_companies WHERE company_processed AND summary = 'ok'"
+    ).fetchone()
+    assert processed == (len(companies),)
+
+
+def test_repeated_run_is_served_from_cache(monkeypatch, tmp_path, companies_db):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    completions = FakeCompletions(delay=0)
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    con = companies_db(["Acme"])
+    asyncio.run(enrichment.run_enrichment_pipeline_async())
+
+    # A reset row is re-enriched without another API call
+    con.execute("UPDATE processed_companies SET company_processed = FALSE")
+    asyncio.run(enrichment.run_enrichment_pipeline_async())
+
+    assert completions.calls == 7
+    assert llm_cache.get_llm_cache().hits == 7
+
+
+def test_throttled_company_is_logged_and_left_unprocessed(monkeypatch, tmp_path, companies_db):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    completions = FakeCompletions(delay=0, fail_for="Globex")
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    con = companies_db(["Acme", "Globex"])
+    asyncio.run(enrichment.run_enrichment_pipeline_async())
+
+    assert con.execute(
+        "SELECT company, company_processed FROM processed_companies ORDER BY company"
+    ).fetchall() == [("Acme", True), ("Globex", False)]
+    assert con.execute(
+        "SELECT stage, company FROM api_errors_log"
+    ).fetchall() == [("enrichment", "Globex")]
+
+
+def test_structured_mode_uses_one_call_per_company(monkeypatch, tmp_path, companies_db):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    completions = FakeCompletions(delay=0)
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    con = companies_db(["Acme", "Globex"])
+    asyncio.run(enrichment.run_enrichment_pipeline_async(structured=True))
+
+    assert completions.calls == 2
+    assert con.execute(
+        "SELECT COUNT(*) FROM processed_companies WHERE company_processed AND summary = 'structured'"
+    ).fetchone() == (2,)
+
+
+def test_structured_schema_covers_every_field():
+    schema = enrichment.structured_response_format()["json_schema"]["schema"]
+    assert set(schema["required"]) == set(EnrichedCompany.__annotations__)
+    assert schema["properties"]["tags"] == {"type": "array", "items": {"type": "string"}}
+    assert schema["additionalProperties"] is False
+
+
+def test_fenced_synthesis_output_still_parses():
+    fenced = '```json\n{"summary": "ok"}\n```'
+    assert enrichment.parse_enriched_company(fenced) == {"summary": "ok"}
+
+
+def test_compare_reports_both_modes_without_writing(monkeypatch, tmp_path, companies_db):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    completions = FakeCompletions(delay=0)
+    monkeypatch.setattr(
+        enrichment, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    con = companies_db(["Acme", "Globex"])
+
+    report = enrichment_compare.compare_enrichment_modes(["Acme", "Globex"])
+
+    assert report["two-stage"]["calls"] == 14
+    assert report["structured"]["calls"] == 2
+    assert report["structured"]["prompt_tokens"] == 200
+    assert report["structured"]["field_completeness"] > 0
+    assert con.execute(
+        "SELECT COUNT(*) FROM processed_companies WHERE company_processed"
+    ).fetchone() == (0,)
@@ -0,0 +1,118 @@
+import duckdb
+import pytest
+
+from src import export
+from src.db.init import init_tables
+
+
+@pytest.fixture
+def outreach(scout_db):
+    init_tables()
+    scout_db.execute(
+        """
+        INSERT INTO processed_companies (company, industry, funding_stage, company_processed, tags, last_updated)
+        VALUES ('Acme <Rockets>', 'Aerospace', 'Seed', TRUE, ['space'], '2026-10-01 09:00'),
+               ('Globex/EU', NULL, NULL, FALSE, [], '2026-10-02 09:00'),
+               ('Initech', 'Software', NULL, TRUE, [], '2026-10-02 10:00')
+        """
+    )
+    scout_db.execute(
+        """
+        INSERT INTO company_contacts (company, contact_name, contact_email, title) VALUES
+          ('Acme <Rockets>', 'Ada', 'ada@acme.com', 'CTO'),
+          ('Acme <Rockets>', 'Bob', 'bob@acme.com', NULL),
+          ('Initech', 'Cy', 'cy@initech.com', 'CEO')
+        """
+    )
+    scout_db.execute(
+        """
+        INSERT INTO email_drafts (company, contact_name, contact_email, draft_version, status) VALUES
+          ('Acme <Rockets>', 'Ada', 'ada@acme.com', 1, 'sent'),
+          ('Acme <Rockets>', 'Ada', 'ada@acme.com', 2, 'approved')
+        """
+    )
+    scout_db.execute(
+        """
+        INSERT INTO send_log (draft_id, contact_email, company, sent_at, delivery_status)
+        VALUES (1, 'ada@acme.com', 'Acme <Rockets>', '2026-10-06 10:00', 'sent')
+        """
+    )
+    scout_db.execute(
+        """
+        INSERT INTO replies_log (contact_email, company, reply_type, received_at)
+        VALUES ('ada@acme.com', 'Acme <Rockets>', 'positive', '2026-10-07 08:00')
+        """
+    )
+    return scout_db
+
+
+def test_tables_export_as_parquet_and_csv(outreach, tmp_path):
+    counts = export.run_export(str(tmp_path / "out"), graph=False)
+    assert counts == {
+        "processed_companies": 3,
+        "company_contacts": 3,
+        "email_drafts": 2,
+        "send_log": 1,
+        "replies_log": 1,
+    }
+    assert duckdb.sql(
+        f"SELECT company, tags FROM '{tmp_path}/out/processed_companies.parquet' ORDER BY company"
+    ).fetchall() == [("Acme <Rockets>", ["space"]), ("Globex/EU", []), ("Initech", [])]
+
+    export.run_export(str(tmp_path / "csv"), fmt="csv", tables=["company_contacts"], graph=False)
+    assert (tmp_path / "csv" / "company_contacts.csv").read_text().startswith("company,contact_name")
+
+
+@pytest.mark.parametrize(
+    "partition_by, directory",
+    [("company", "company=Globex%2FEU"), ("date", "day=2026-10-02")],
+)
+def test_partitioned_export_reads_back_as_one_table(outreach, tmp_path, partition_by, directory):
+    export.run_export(
+        str(tmp_path), partition_by=partition_by, tables=["processed_companies"], graph=False
+    )
+    assert (tmp_path / "processed_companies" / directory).is_dir()
+    rows = duckdb.sql(
+        f"""
+        SELECT company FROM read_parquet('{tmp_path}/processed_companies/*/*.parquet',
+                                         hive_partitioning = true)
+        ORDER BY company
+        """
+    ).fetchall()
+    assert rows == [("Acme <Rockets>",), ("Globex/EU",), ("Initech",)]
+
+
+def test_outreach_graph_streams_one_block_per_company(outreach, tmp_path):
+    path = tmp_path / "graph.html"
+    counts = export.write_outreach_graph(outreach, path, batch_rows=1)
+    assert counts == {"companies": 3, "contacts": 3}
+
+    page = path.read_text()
+    assert page.count("<details>") == page.count("</details>") == 3
+    assert "Acme &lt;Rockets&gt;" in page and "<Rockets>" not in page
+    acme = page.split("<details>")[1]
+    assert "2 contacts, 1 replied" in acme
+    assert "draft v2 (approved)" in acme and "sent 1&times;, last 2026-10-06" in acme
+    assert "1 replies, last positive" in acme
+    assert "not enriched" in page.split("<details>")[2]
+
+
+def test_outreach_graph_links_only_web_urls_and_counts_real_replies(outreach, tmp_path):
+    outreach.execute(
+        """
+        UPDATE processed_companies SET website_url = CASE company
+          WHEN 'Acme <Rockets>' THEN 'javascript:alert(1)'
+          WHEN 'Initech' THEN 'HTTPS://initech.example' END
+        """
+    )
+    outreach.execute(
+        """
+        INSERT INTO replies_log (contact_email, company, reply_type, received_at)
+        VALUES ('bob@acme.com', 'Acme <Rockets>', 'auto_reply', '2026-10-07 09:00')
+        """
+    )
+    path = tmp_path / "graph.html"
+    export.write_outreach_graph(outreach, path)
+    acme, _, initech = path.read_text().split("<details>")[1:]
+    assert "href" not in acme and "2 contacts, 1 replied" in acme
+    assert '<a href="HTTPS://initech.example">Initech</a>' in initech
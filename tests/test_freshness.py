@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+from src.clients import refresh
+from src.clients import openai as enrichment
+from src.common.models import EnrichedCompany
+from src.db import freshness
+
+
+def versioned_answers():
+    # Each synthesis returns a new "version" of every field
+    syntheses = 0
+
+    def respond(prompt, kwargs):
+        nonlocal syntheses
+        if "Return a JSON object" not in prompt:
+            return f"answer to {prompt}"
+        syntheses += 1
+        return json.dumps(
+            {
+                field: [f"v{syntheses}"] if field in ("tags", "investors") else f"v{syntheses}"
+                for field in EnrichedCompany.__annotations__
+                if field != "linkedin_search_links"
+            }
+        )
+
+    return respond
+
+
+def age_fields(con, company, topic, days):
+    aged = freshness.TOPIC_FIELDS[topic]
+    stamps = ", ".join(
+        f"{f} := field_refreshed_at.{f} - INTERVAL {days if f in aged else 0} DAY"
+        for f in EnrichedCompany.__annotations__
+    )
+    con.execute(
+        f"UPDATE processed_companies SET field_refreshed_at = struct_pack({stamps}) "
+        "WHERE company = ?",
+        [company],
+    )
+
+
+def test_every_enriched_field_belongs_to_one_topic():
+    fields = [f for topic_fields in freshness.TOPIC_FIELDS.values() for f in topic_fields]
+    assert sorted(fields) == sorted(EnrichedCompany.__annotations__)
+    assert len(freshness.TOPICS) == len(enrichment.build_questions("Acme"))
+
+
+def test_plan_ranks_overdue_companies_within_budget(companies_db):
+    con = companies_db(["Acme", "Acme Inc.", "Globex", "Initech", "Umbrella"])
+    con.execute("UPDATE processed_companies SET company_processed = company <> 'Umbrella'")
+    stamps = ", ".join(f"{f} := CURRENT_TIMESTAMP" for f in EnrichedCompany.__annotations__)
+    con.execute(
+        f"UPDATE processed_companies SET field_refreshed_at = struct_pack({stamps}) "
+        "WHERE company IN ('Acme', 'Acme Inc.', 'Globex')"
+    )
+    con.execute(
+        "INSERT INTO company_aliases (alias, canonical) VALUES ('Acme Inc.', 'Acme')"
+    )
+    age_fields(con, "Acme", "news", 20)
+    age_fields(con, "Acme Inc.", "news", 20)
+    age_fields(con, "Globex", "news", 8)
+    age_fields(con, "Globex", "funding", 45)
+    # Initech was enriched before per-field timestamps: every topic counts
+    # from last_updated
+    con.execute(
+        "UPDATE processed_companies SET last_updated = last_updated - INTERVAL 40 DAY "
+        "WHERE company = 'Initech'"
+    )
+
+    plan = freshness.plan_refresh(con)
+    assert [(p["company"], p["topics"], p["calls"]) for p in plan] == [
+        ("Initech", ["news", "funding"], 3),
+        ("Acme", ["news"], 2),
+        ("Globex", ["news", "funding"], 3),
+    ]
+
+    # A draft waiting to go out to the alias puts its canonical company first
+    con.execute(
+        "INSERT INTO email_drafts (company, contact_email, status) "
+        "VALUES ('Acme Inc.', 'ada@acme.com', 'approved')"
+    )
+    assert [p["company"] for p in freshness.plan_refresh(con)] == ["Acme", "Initech", "Globex"]
+    assert [p["company"] for p in freshness.plan_refresh(con, budget=7)] == ["Acme", "Initech"]
+
+
+def test_refresh_reasks_only_stale_questions(fake_async_client, llm_cache_db, companies_db):
+    completions = fake_async_client(versioned_answers())
+    con = companies_db(["Acme"])
+    con.execute("UPDATE processed_companies SET linkedin_search_links = ['kept']")
+    asyncio.run(enrichment.run_enrichment_pipeline_async())
+    assert len(completions.prompts) == 7
+
+    age_fields(con, "Acme", "news", 8)
+    # The cached news answer is as old as the field, too old to reuse
+    llm_cache_db.con.execute("UPDATE llm_response_cache SET created_at = created_at - INTERVAL 8 DAY")
+    assert asyncio.run(refresh.run_refresh_pipeline_async(budget=10)) == {
+        "planned": 1,
+        "refreshed": 1,
+        "failed": 0,
+        "calls": 2,
+    }
+
+    question, synthesis = completions.prompts[7:]
+    assert question == "Any recent news about Acme?"
+    assert "- Recent news: answer to Any recent news about Acme?" in synthesis
+    assert "- Investors & funding: Already known. investors: v1; funding_stage: v1" in synthesis
+    assert con.execute(
+        "SELECT summary, recent_news, suggested_opener, linkedin_search_links "
+        "FROM processed_companies"
+    ).fetchone() == ("v1", "v2", "v2", ["kept"])
+    assert freshness.plan_refresh(con) == []
+    assert freshness.refresh_calls_spent(con) == 2
+
+    # The re-asked answer is cached as new, so while it is fresh a refresh
+    # costs nothing against the budget
+    age_fields(con, "Acme", "news", 8)
+    assert asyncio.run(refresh.run_refresh_pipeline_async(budget=10))["calls"] == 0
+    assert len(completions.prompts) == 9
+    assert freshness.refresh_calls_spent(con) == 2
+
+    # The day's budget is spent
+    age_fields(con, "Acme", "news", 8)
+    assert asyncio.run(refresh.run_refresh_pipeline_async(budget=2))["planned"] == 0
@@ -0,0 +1,205 @@
+import mailbox
+import os
+from email.message import EmailMessage
+
+import pytest
+
+from src.clients import inbox
+from src.db.init import init_tables
+
+
+@pytest.fixture
+def sent_drafts(scout_db):
+    init_tables()
+    for draft_id, email, company in [
+        (1, "ada@acme.com", "Acme"),
+        (2, "bob@globex.com", "Globex"),
+        (3, "cy@initech.com", "Initech"),
+    ]:
+        scout_db.execute(
+            """
+            INSERT INTO email_drafts
+              (id, company, contact_name, contact_email, draft_version, status, message_id, sent_at)
+            VALUES (?, ?, 'X', ?, 1, 'sent', ?, CURRENT_TIMESTAMP)
+            """,
+            [draft_id, company, email, f"<scout-{draft_id}@me.com>"],
+        )
+    return scout_db
+
+
+def make_message(sender, body, subject="Re: Hello", in_reply_to=None, message_id=None, **headers):
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = "me@me.com"
+    message["Subject"] = subject
+    message["Date"] = "Tue, 06 Oct 2026 10:00:00 +0000"
+    if message_id:
+        message["Message-ID"] = message_id
+    if in_reply_to:
+        message["In-Reply-To"] = in_reply_to
+    for name, value in headers.items():
+        message[name.replace("_", "-")] = value
+    message.set_content(body)
+    return message
+
+
+def replies(con):
+    return con.execute(
+        "SELECT contact_email, company, reply_type, draft_id FROM replies_log ORDER BY contact_email"
+    ).fetchall()
+
+
+def test_mbox_replies_are_matched_and_classified(sent_drafts, tmp_path):
+    path = tmp_path / "archive.mbox"
+    box = mailbox.mbox(path)
+    box.add(
+        make_message(
+            "Ada <ada@acme.com>",
+            "Sounds great, let's chat Thursday.\n\nOn Mon, Me wrote:\n> Not interested?",
+            in_reply_to="<scout-1@me.com>",
+            message_id="<r1@acme.com>",
+        )
+    )
+    # A colleague answering the thread, matched through References
+    box.add(
+        make_message(
+            "Dee <dee@globex.com>",
+            "Bob has left. We're not interested, please remove me.\nFrom a line that needs escaping",
+            message_id="<r2@globex.com>",
+            References="<other@x.com> <scout-2@me.com>",
+        )
+    )
+    box.add(
+        make_message(
+            "Cy <CY@initech.com>",
+            "I'm away until Monday.",
+            subject="Out of Office: Hello",
+            message_id="<r3@initech.com>",
+        )
+    )
+    box.add(make_message("news@letters.com", "Weekly digest", message_id="<n1@letters.com>"))
+    # Our own copy of the sent message
+    box.add(make_message("me@me.com", "Hello", message_id="<scout-3@me.com>"))
+    box.close()
+
+    totals = inbox.run_reply_import(str(path), batch_size=2)
+    assert totals == {"read": 5, "imported": 3, "duplicates": 0, "unmatched": 2}
+    assert replies(sent_drafts) == [
+        ("ada@acme.com", "Acme", "positive", 1),
+        ("bob@globex.com", "Globex", "decline", 2),
+        ("cy@initech.com", "Initech", "auto_reply", 3),
+    ]
+    assert sent_drafts.execute(
+        "SELECT reply_text, received_at FROM replies_log WHERE draft_id = 1"
+    ).fetchone() == (
+        "Sounds great, let's chat Thursday.",
+        inbox.received_at("Tue, 06 Oct 2026 10:00:00 +0000"),
+    )
+
+    # Nothing new: the saved offset is the end of the file
+    assert inbox.run_reply_import(str(path))["read"] == 0
+
+    box = mailbox.mbox(path)
+    box.add(make_message("ada@acme.com", "Any update?", message_id="<r4@acme.com>"))
+    box.close()
+    totals = inbox.run_reply_import(str(path))
+    assert totals["read"] == 1 and totals["imported"] == 1
+    assert inbox.run_reply_import(str(path), full=True) == {
+        "read": 6,
+        "imported": 0,
+        "duplicates": 4,
+        "unmatched": 2,
+    }
+
+
+def test_bounce_is_matched_by_the_quoted_message_id(sent_drafts, tmp_path):
+    path = tmp_path / "bounces.mbox"
+    bounce = make_message(
+        "Mail Delivery Subsystem <MAILER-DAEMON@mx.me.com>",
+        "Delivery failed.\n\n--- Original message ---\nMessage-ID: <scout-2@me.com>\n",
+        subject="Undelivered Mail Returned to Sender",
+        message_id="<b1@mx.me.com>",
+    )
+    box = mailbox.mbox(path)
+    box.add(bounce)
+    box.close()
+    inbox.run_reply_import(str(path))
+    assert replies(sent_drafts) == [("bob@globex.com", "Globex", "bounce", 2)]
+
+
+def test_maildir_reimport_reads_only_new_files(sent_drafts, tmp_path):
+    box = mailbox.Maildir(tmp_path / "Maildir")
+    box.add(make_message("ada@acme.com", "Yes, interested", message_id="<m1@acme.com>"))
+    assert inbox.run_reply_import(str(tmp_path / "Maildir"))["imported"] == 1
+
+    key = box.add(make_message("bob@globex.com", "Who is this?", message_id="<m2@globex.com>"))
+    # Read by a mail client: moved from new/ to cur/
+    message = box[key]
+    message.set_subdir("cur")
+    box[key] = message
+    totals = inbox.run_reply_import(str(tmp_path / "Maildir"))
+    assert totals["imported"] == 1 and totals["read"] == 1
+    assert [row[2] for row in replies(sent_drafts)] == ["positive", "neutral"]
+
+    # Synced in late with an mtime older than everything imported so far
+    key = box.add(make_message("cy@initech.com", "Sounds good", message_id="<m3@initech.com>"))
+    os.utime(tmp_path / "Maildir" / "new" / key, (0, 0))
+    totals = inbox.run_reply_import(str(tmp_path / "Maildir"))
+    assert totals["imported"] == 1 and totals["read"] == 1
+    assert inbox.run_reply_import(str(tmp_path / "Maildir"))["read"] == 0
+
+
+def test_repeats_within_a_batch_count_as_duplicates(sent_drafts, tmp_path):
+    # Exports list a message once per label it carries
+    path = tmp_path / "takeout.mbox"
+    box = mailbox.mbox(path)
+    for _ in range(2):
+        box.add(make_message("ada@acme.com", "Yes", message_id="<t1@acme.com>"))
+    box.add(make_message("news@letters.com", "Digest", message_id="<t2@letters.com>"))
+    box.close()
+    assert inbox.run_reply_import(str(path)) == {
+        "read": 3,
+        "imported": 1,
+        "duplicates": 1,
+        "unmatched": 1,
+    }
+
+
+def test_hand_logged_replies_do_not_block_imports(sent_drafts, tmp_path):
+    # Replies logged by hand before imports existed have no message_id
+    sent_drafts.execute(
+        "INSERT INTO replies_log (contact_email, company, reply_type) VALUES ('bob@globex.com', 'Globex', 'neutral')"
+    )
+    path = tmp_path / "archive.mbox"
+    box = mailbox.mbox(path)
+    box.add(make_message("ada@acme.com", "Sounds great", message_id="<h1@acme.com>"))
+    box.close()
+    totals = inbox.run_reply_import(str(path))
+    assert totals["imported"] == 1 and totals["duplicates"] == 0
+
+
+def test_mbox_separators_split_across_reads(sent_drafts, tmp_path, monkeypatch):
+    monkeypatch.setattr(inbox, "MBOX_READ_SIZE", 7)
+    path = tmp_path / "small.mbox"
+    box = mailbox.mbox(path)
+    for i in range(5):
+        box.add(make_message("ada@acme.com", f"Reply {i}", message_id=f"<s{i}@acme.com>"))
+    box.close()
+    offsets = [offset for offset, _ in inbox.iter_mbox(path)]
+    assert len(offsets) == 5 and offsets[-1] == path.stat().st_size
+    assert inbox.run_reply_import(str(path))["imported"] == 5
+
+
+def test_replaced_mbox_is_imported_from_the_top(sent_drafts, tmp_path):
+    path = tmp_path / "archive.mbox"
+    box = mailbox.mbox(path)
+    box.add(make_message("ada@acme.com", "First", message_id="<x1@acme.com>"))
+    box.add(make_message("ada@acme.com", "Second", message_id="<x2@acme.com>"))
+    box.close()
+    inbox.run_reply_import(str(path))
+
+    path.unlink()
+    box = mailbox.mbox(path)
+    box.add(make_message("bob@globex.com", "A different export", message_id="<y1@globex.com>"))
+    box.close()
+    assert inbox.run_reply_import(str(path))["imported"] == 1
@@ -0,0 +1,136 @@
+import pytest
+
+from src.db import insert
+from src.db.canonical import PENDING_COMPANIES_SQL
+from src.db.init import init_tables
+
+
+def sheet_row(company, summary="", processed="FALSE"):
+    return {"Company": company, "Summary": summary, "Company Processed": processed}
+
+
+@pytest.fixture
+def synced_db(monkeypatch, companies_db):
+    con = companies_db([])
+
+    def sync(rows):
+        monkeypatch.setattr(insert, "get_incoming_for_table", lambda _: rows)
+        return insert.sync_table("processed_companies")
+
+    return con, sync
+
+
+def test_sync_inserts_updates_and_deletes(synced_db):
+    con, sync = synced_db
+    assert sync([sheet_row("Acme", "a"), sheet_row("Globex", "g")]) == {
+        "inserted": 2,
+        "updated": 0,
+        "deleted": 0,
+    }
+    assert sync([sheet_row("Acme", "a2", "TRUE"), sheet_row("Initech")]) == {
+        "inserted": 1,
+        "updated": 1,
+        "deleted": 1,
+    }
+    rows = con.execute(
+        "SELECT company, summary, company_processed FROM processed_companies ORDER BY company"
+    ).fetchall()
+    assert rows == [("Acme", "a2", True), ("Initech", "", False)]
+
+
+def test_blank_processed_cells_are_pending(synced_db):
+    con, sync = synced_db
+    sync([sheet_row("Acme", processed=""), sheet_row("Globex", processed="TRUE")])
+    assert con.execute(PENDING_COMPANIES_SQL).fetchall() == [("Acme",)]
+
+
+def test_unchanged_sheet_is_a_no_op(synced_db):
+    _, sync = synced_db
+    rows = [sheet_row("Acme", "a"), sheet_row("Globex", "g")]
+    sync(rows)
+    assert sync(rows) == {"inserted": 0, "updated": 0, "deleted": 0}
+
+
+def test_failed_sync_leaves_table_untouched(synced_db, monkeypatch):
+    con, sync = synced_db
+    sync([sheet_row("Acme", "a"), sheet_row("Globex", "g")])
+
+    def partial(table_name, stage_name):
+        con.execute(f"DELETE FROM {table_name}")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(insert, "apply_staged_delta", partial)
+    assert sync([sheet_row("Acme", "changed")]) == {
+        "inserted": 0,
+        "updated": 0,
+        "deleted": 0,
+    }
+    assert con.execute("SELECT COUNT(*) FROM processed_companies").fetchone() == (2,)
+
+
+def test_duplicate_sheet_keys_keep_last_row(synced_db):
+    con, sync = synced_db
+    sync([sheet_row("Acme", "first"), sheet_row("Acme", "second")])
+    assert con.execute("SELECT summary FROM processed_companies").fetchall() == [
+        ("second",)
+    ]
+
+
+def test_only_changed_sheet_rows_are_rewritten(synced_db):
+    con, sync = synced_db
+    rows = [sheet_row("Acme", "a"), sheet_row("Globex", "g")]
+    sync(rows)
+    # Enrichment writes to the row don't change its sheet fingerprint
+    con.execute("UPDATE processed_companies SET summary = 'enriched' WHERE company = 'Acme'")
+    assert sync(rows)["updated"] == 0
+    assert con.execute(
+        "SELECT summary FROM processed_companies WHERE company = 'Acme'"
+    ).fetchone() == ("enriched",)
+
+
+def test_list_cells_are_synced_as_lists(synced_db):
+    con, sync = synced_db
+    row = sheet_row("Acme", "a")
+    row["Tags"] = "AI,  Fintech, ,"
+    sync([row])
+    assert con.execute("SELECT tags, investors FROM processed_companies").fetchone() == (
+        ["AI", "Fintech"],
+        None,
+    )
+    # Only the list items matter, not the spacing around commas
+    row["Tags"] = "AI, Fintech"
+    assert sync([row])["updated"] == 0
+    row["Tags"] = "AI, Fintech, Payments"
+    assert sync([row])["updated"] == 1
+
+
+def test_init_migrates_text_list_columns(scout_db):
+    scout_db.execute(
+        "CREATE TABLE processed_companies (company TEXT PRIMARY KEY, tags TEXT, investors TEXT, linkedin_search_links TEXT)"
+    )
+    scout_db.execute(
+        "INSERT INTO processed_companies VALUES ('Acme', 'AI, SaaS', '', NULL)"
+    )
+    init_tables()
+    init_tables()  # already migrated: a no-op
+    assert scout_db.execute(
+        "SELECT tags, investors, linkedin_search_links FROM processed_companies"
+    ).fetchone() == (["AI", "SaaS"], None, None)
+    assert scout_db.execute(
+        "SELECT list_contains(tags, 'SaaS') FROM processed_companies"
+    ).fetchone() == (True,)
+
+
+def test_compute_delta_rows_compares_row_hashes(synced_db):
+    _, sync = synced_db
+    sync([sheet_row("Acme", "a"), sheet_row("Gone")])
+    existing = insert.fetch_existing_rows("processed_companies", "company")
+    assert set(existing) == {"Acme", "Gone"}
+
+    comparison_fields = insert.get_comparison_fields_for_table("processed_companies")
+    incoming = [sheet_row("Acme", "a"), sheet_row("New", "n")]
+    to_insert, to_delete = insert.compute_delta_rows(
+        existing, incoming, "Company", comparison_fields
+    )
+    assert [row["Company"] for row in to_insert] == ["New"]
+    assert to_delete == ["Gone"]
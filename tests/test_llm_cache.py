@@ -0,0 +1,53 @@
+from src.clients.llm_cache import LLMCache, make_cache_key
+
+
+def test_cache_key_depends_on_model_messages_and_temperature():
+    messages = [{"role": "user", "content": "Who are the investors in Acme?"}]
+    key = make_cache_key("gpt-4o", messages, 0.3)
+    assert key == make_cache_key("gpt-4o", list(messages), 0.3)
+    assert key != make_cache_key("gpt-4o-mini", messages, 0.3)
+    assert key != make_cache_key("gpt-4o", messages, 0.7)
+    assert key != make_cache_key(
+        "gpt-4o", [{"role": "user", "content": "Who are the investors in Acme Inc?"}], 0.3
+    )
+
+
+def test_hit_miss_counters(tmp_path):
+    cache = LLMCache(path=tmp_path / "cache.db")
+    assert cache.get("k") is None
+    cache.put("k", "gpt-4o", "answer")
+    assert cache.get("k") == "answer"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = LLMCache(path=tmp_path / "cache.db", ttl_seconds=60)
+    cache.put("k", "gpt-4o", "answer")
+    cache.con.execute(
+        "UPDATE llm_response_cache SET created_at = CURRENT_TIMESTAMP - INTERVAL 2 MINUTE"
+    )
+    assert cache.get("k") is None
+    cache.evict()
+    assert cache.stats()["entries"] == 0
+
+
+def test_size_eviction_keeps_most_recent(tmp_path):
+    cache = LLMCache(path=tmp_path / "cache.db", max_entries=2)
+    for i in range(3):
+        cache.put(f"k{i}", "gpt-4o", str(i))
+        cache.con.execute(
+            "UPDATE llm_response_cache SET last_accessed = CURRENT_TIMESTAMP + to_seconds(?) WHERE cache_key = ?",
+            [i, f"k{i}"],
+        )
+    cache.evict()
+    assert cache.get("k0") is None
+    assert cache.get("k2") == "2"
+
+
+def test_bypass_skips_reads_but_refreshes_entries(tmp_path):
+    cache = LLMCache(path=tmp_path / "cache.db", bypass=True)
+    cache.put("k", "gpt-4o", "old")
+    assert cache.get("k") is None
+    cache.put("k", "gpt-4o", "new")
+    cache.bypass = False
+    assert cache.get("k") == "new"
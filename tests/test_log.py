@@ -0,0 +1,72 @@
+import io
+import json
+import threading
+
+import pytest
+
+from src.log import SAMPLED, config, configure_logging, get_logger
+
+
+class Probe:
+    # Records which thread turned it into text
+    def __init__(self):
+        self.formatted_on = []
+
+    def __str__(self):
+        self.formatted_on.append(threading.current_thread().name)
+        return "probe"
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    yield stream
+    config.stop_logging()
+    configure_logging(log_file=None)
+
+
+def test_modules_get_their_own_named_loggers():
+    assert get_logger("enrichment").name == "scout.enrichment"
+    assert get_logger("ratelimit").name == "scout.ratelimit"
+    assert get_logger().name == "scout"
+
+
+def test_queue_mode_formats_json_on_the_listener_thread(log_stream):
+    configure_logging(
+        level="INFO", fmt="json", use_queue=True, stream=log_stream, log_file=None
+    )
+    probe = Probe()
+    get_logger("enrichment").info("Enriched %s", probe)
+    get_logger("enrichment").debug("Never formatted %s", probe)
+    config.stop_logging()
+
+    (line,) = log_stream.getvalue().splitlines()
+    entry = json.loads(line)
+    assert entry["logger"] == "scout.enrichment"
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Enriched probe"
+    assert probe.formatted_on and threading.current_thread().name not in probe.formatted_on
+
+
+@pytest.mark.parametrize("use_queue", [True, False])
+def test_sampling_keeps_one_in_n_per_message(log_stream, use_queue):
+    configure_logging(
+        level="INFO",
+        use_queue=use_queue,
+        sample_every=3,
+        stream=log_stream,
+        log_file=None,
+    )
+    logger = get_logger("contacts")
+    for i in range(7):
+        logger.info("Found %s", i, extra=SAMPLED)
+    logger.info("Summary line")
+    logger.warning("Throttled %s", 1, extra=SAMPLED)
+    config.stop_logging()
+
+    lines = log_stream.getvalue().splitlines()
+    found = [line.rsplit(" ", 1)[-1] for line in lines if "Found" in line]
+    assert found == ["0", "3", "6"]
+    assert any("Summary line" in line for line in lines)
+    assert any("Throttled 1" in line for line in lines)
+    assert any("4 sampled records suppressed" in line for line in lines)
@@ -0,0 +1,197 @@
+import email
+import socket
+from datetime import datetime
+
+import pytest
+
+from src.clients import mailer
+from src.common.models import SendResult, SMTPSettings
+from src.db import sends
+from src.db.init import init_tables
+
+
+def add_drafts(con, addresses, status="approved", send_date=None):
+    init_tables()
+    for address in addresses:
+        con.execute(
+            """
+            INSERT INTO email_drafts
+              (company, contact_name, contact_email, draft_version, draft_content, status, send_date)
+            VALUES ('Acme', 'Ada', ?, 1, 'Subject: Hello\n\nHi there', ?, ?)
+            """,
+            [address, status, send_date],
+        )
+
+
+def statuses(con):
+    return dict(con.execute("SELECT contact_email, status FROM email_drafts").fetchall())
+
+
+def test_only_due_approved_drafts_are_claimed(scout_db):
+    add_drafts(scout_db, ["a@x.com", "b@y.com"])
+    add_drafts(scout_db, ["later@x.com"], send_date="2999-01-01")
+    add_drafts(scout_db, ["review@x.com"], status="pending_review")
+
+    claimed = sends.claim_due_drafts(scout_db, 10, "me.com")
+    assert [e["contact_email"] for e in claimed] == ["a@x.com", "b@y.com"]
+    assert all(e["message_id"].endswith("@me.com>") for e in claimed)
+    assert sends.claim_due_drafts(scout_db, 10, "me.com") == []
+    assert sends.send_counts(scout_db)["sending"] == 2
+
+
+def test_interrupted_batch_is_recovered_from_the_journal(scout_db, tmp_path):
+    add_drafts(scout_db, ["sent@x.com", "started@x.com", "untouched@x.com"])
+    ids = {e["contact_email"]: e["id"] for e in sends.claim_due_drafts(scout_db, 10, "me.com")}
+    journal = sends.SendJournal(tmp_path / "journal.jsonl")
+    journal.record(ids["sent@x.com"], "start")
+    journal.record(ids["sent@x.com"], "sent")
+    journal.record(ids["started@x.com"], "start")
+    journal.close()
+
+    assert sends.recover_sends(scout_db, journal) == {
+        "replayed": 1,
+        "unconfirmed": 1,
+        "requeued": 1,
+    }
+    assert statuses(scout_db) == {
+        "sent@x.com": "sent",
+        "started@x.com": "unconfirmed",
+        "untouched@x.com": "approved",
+    }
+    assert scout_db.execute(
+        "SELECT draft_id, delivery_status FROM send_log"
+    ).fetchall() == [(ids["sent@x.com"], "sent")]
+    assert not journal.path.exists()
+    # Replaying the same outcomes again writes nothing twice
+    sends.apply_send_results(
+        scout_db,
+        [
+            SendResult(
+                draft_id=ids["sent@x.com"], outcome="sent", error=None, finished_at=datetime.now()
+            )
+        ],
+    )
+    assert scout_db.execute("SELECT COUNT(*) FROM send_log").fetchone() == (1,)
+
+
+def test_each_send_is_logged_at_its_own_time(scout_db):
+    add_drafts(scout_db, ["a@x.com", "b@x.com"])
+    ids = [e["id"] for e in sends.claim_due_drafts(scout_db, 10, "me.com")]
+    times = [datetime(2026, 10, 6, 9, 0), datetime(2026, 10, 6, 9, 7)]
+    sends.apply_send_results(
+        scout_db,
+        [
+            SendResult(draft_id=draft_id, outcome="sent", error=None, finished_at=at)
+            for draft_id, at in zip(ids, times)
+        ],
+    )
+    assert scout_db.execute(
+        "SELECT sent_at FROM send_log ORDER BY draft_id"
+    ).fetchall() == [(at,) for at in times]
+    assert scout_db.execute(
+        "SELECT sent_at FROM email_drafts ORDER BY id"
+    ).fetchall() == [(at,) for at in times]
+
+
+def test_interleave_domains_round_robins():
+    emails = [
+        {"contact_email": address}
+        for address in ["1@a.com", "2@a.com", "3@a.com", "1@b.com", "1@c.com"]
+    ]
+    ordered = mailer.interleave_domains(emails)  # type: ignore
+    assert [e["contact_email"] for e in ordered] == [
+        "1@a.com",
+        "1@b.com",
+        "1@c.com",
+        "2@a.com",
+        "3@a.com",
+    ]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("nobody@"):
+            return "550 5.1.1 No such user"
+        if address.startswith("busy@"):
+            return "451 4.3.0 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(email.message_from_bytes(envelope.content))
+        self.peers.add(session.peer)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_server():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    handler = RecordingHandler()
+    controller = controller_module.Controller(
+        handler, hostname="127.0.0.1", port=free_port()
+    )
+    controller.start()
+    yield handler, SMTPSettings(
+        host="127.0.0.1",
+        port=controller.port,
+        username=None,
+        password=None,
+        security="none",
+        sender="me@example.com",
+        sender_name="Me",
+    )
+    controller.stop()
+
+
+def test_queue_is_sent_over_pooled_connections(scout_db, tmp_path, smtp_server):
+    handler, settings = smtp_server
+    addresses = [f"person{i}@domain{i % 5}.com" for i in range(300)]
+    add_drafts(scout_db, addresses + ["nobody@x.com", "busy@x.com"])
+    journal = sends.SendJournal(tmp_path / "journal.jsonl")
+    pacer = mailer.SendPacer(per_minute=0, domain_per_minute=0)
+
+    totals = mailer.run_email_sending(
+        settings, batch_size=64, pool_size=3, pacer=pacer, journal=journal
+    )
+
+    assert totals["sent"] == 300 and totals["failed"] == 1 and totals["deferred"] == 1
+    # Three connections, each replaced once it has carried its share of messages
+    assert totals["connections"] == len(handler.peers)
+    assert totals["connections"] <= 3 + 302 // mailer.SMTP_MAX_MESSAGES_PER_CONNECTION
+    assert sorted(m["To"].split("<")[1].rstrip(">") for m in handler.messages) == sorted(addresses)
+    assert handler.messages[0]["Subject"] == "Hello"
+    assert len({m["Message-ID"] for m in handler.messages}) == 300
+
+    counts = sends.send_counts(scout_db)
+    # The 451 is retried after SEND_RETRY_DELAY, not straight away
+    assert counts == {"approved": 1, "sending": 0, "sent": 300, "failed": 1, "unconfirmed": 0}
+    assert dict(
+        scout_db.execute(
+            "SELECT delivery_status, COUNT(*) FROM send_log GROUP BY ALL"
+        ).fetchall()
+    ) == {"sent": 300, "failed": 1, "deferred": 1}
+
+    # Nothing is due any more, so a second run sends nothing
+    again = mailer.run_email_sending(settings, pacer=pacer, journal=journal)
+    assert again["sent"] == 0 and len(handler.messages) == 300
+
+
+def test_pacer_waits_per_domain_and_overall():
+    waits = []
+    pacer = mailer.SendPacer(per_minute=60, domain_per_minute=2, sleep=waits.append)
+    for domain in ["a.com", "a.com", "a.com", "b.com"]:
+        pacer.wait(domain)
+    # The third a.com send waits for its domain bucket (2/min) to refill
+    domain_waits = waits[0::2]
+    assert domain_waits[:2] == [0.0, 0.0] and domain_waits[2] == pytest.approx(30, abs=1)
+    assert domain_waits[3] == 0.0
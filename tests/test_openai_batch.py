@@ -0,0 +1,155 @@
+import json
+from types import SimpleNamespace
+
+from src.clients import llm_cache
+from src.clients import openai as enrichment
+from src.clients import openai_batch
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        prompt = kwargs["messages"][-1]["content"]
+        if "Return a JSON object" in prompt:
+            # The synthesis prompt is built from the first-stage answers
+            assert "answer to What does the company" in prompt
+            content = json.dumps({"summary": "batched", "tags": ["AI"]})
+        else:
+            content = f"answer to {prompt}"
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_custom_ids_round_trip():
+    custom_id = openai_batch.make_custom_id("questions", "Acme | Co", 4)
+    assert custom_id == openai_batch.make_custom_id("questions", "Acme | Co", 4)
+    assert openai_batch.parse_custom_id(custom_id) == ("questions", 4, "Acme | Co")
+
+
+def test_local_batch_pipeline_enriches_pending_companies(
+    monkeypatch, tmp_path, companies_db
+):
+    con = companies_db(["Acme", "Globex"])
+    completions = FakeCompletions()
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+    monkeypatch.setattr(
+        enrichment, "_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    monkeypatch.setattr(openai_batch, "BATCH_DIR", tmp_path / "batches")
+
+    assert openai_batch.run_batch_enrichment_pipeline(local=True) == 2
+    assert completions.calls == 2 * 7
+
+    (run_dir,) = (tmp_path / "batches").iterdir()
+    with (run_dir / "questions-001.jsonl").open() as f:
+        ids = [json.loads(line)["custom_id"] for line in f]
+    assert ids[:2] == ["questions|0|Acme", "questions|1|Acme"]
+    assert con.execute(
+        "SELECT company, summary FROM processed_companies WHERE company_processed ORDER BY company"
+    ).fetchall() == [("Acme", "batched"), ("Globex", "batched")]
+
+
+def test_failed_synthesis_leaves_company_unprocessed(tmp_path, companies_db):
+    con = companies_db(["Acme"])
+    output = tmp_path / "synthesis.out.jsonl"
+    output.write_text(
+        json.dumps(
+            {
+                "custom_id": "synthesis|0|Acme",
+                "response": {"status_code": 429, "body": {}},
+                "error": None,
+            }
+        )
+        + "\n"
+    )
+    assert openai_batch.apply_synthesis_results([output]) == 0
+    assert con.execute(
+        "SELECT company_processed FROM processed_companies"
+    ).fetchone() == (False,)
+    assert con.execute("SELECT company FROM api_errors_log").fetchall() == [("Acme",)]
+
+
+def batch_result(custom_id, content=None):
+    if content is None:
+        return {"custom_id": custom_id, "response": None, "error": {"message": "boom"}}
+    body = {"choices": [{"message": {"content": content}}]}
+    return {"custom_id": custom_id, "response": {"status_code": 200, "body": body}, "error": None}
+
+
+def write_results(path, results):
+    path.write_text("".join(json.dumps(r) + "\n" for r in results))
+    return path
+
+
+def test_inputs_are_split_under_the_batch_limits(monkeypatch, tmp_path, companies_db):
+    companies_db(["Acme", "Globex", "Initech"])
+    monkeypatch.setattr(openai_batch, "BATCH_MAX_REQUESTS", 13)
+    paths = openai_batch.write_questions_batch(tmp_path)
+    # Two companies (12 requests) fit per file; a company is never split
+    assert [p.name for p in paths] == ["questions-001.jsonl", "questions-002.jsonl"]
+    assert [len(p.read_text().splitlines()) for p in paths] == [12, 6]
+
+    monkeypatch.setattr(openai_batch, "BATCH_MAX_REQUESTS", 50_000)
+    monkeypatch.setattr(openai_batch, "BATCH_MAX_BYTES", 1)
+    assert len(openai_batch.write_questions_batch(tmp_path)) == 3
+
+
+def test_company_with_a_failed_answer_is_not_synthesized(tmp_path, companies_db):
+    con = companies_db(["Acme", "Globex"])
+    output = write_results(
+        tmp_path / "questions-001.out.jsonl",
+        [batch_result(f"questions|{i}|Acme", "answer") for i in range(6) if i != 3]
+        + [batch_result(f"questions|{i}|Globex", "answer") for i in range(5)],
+    )
+    errors = write_results(
+        tmp_path / "questions-001.errors.jsonl", [batch_result("questions|3|Acme")]
+    )
+    assert openai_batch.write_synthesis_batch([output, errors], tmp_path) == []
+    assert con.execute(
+        "SELECT company, error_message FROM api_errors_log ORDER BY company"
+    ).fetchall() == [
+        ("Acme", "1 of 6 question requests failed"),
+        ("Globex", "1 of 6 question requests failed"),
+    ]
+
+
+def test_errors_file_is_downloaded_with_the_output(monkeypatch, tmp_path):
+    files = {
+        "out": [batch_result("synthesis|0|Acme", "{}")],
+        "err": [batch_result("synthesis|0|Globex")],
+    }
+    client = SimpleNamespace(
+        batches=SimpleNamespace(
+            retrieve=lambda batch_id: SimpleNamespace(
+                status="completed", output_file_id="out", error_file_id="err"
+            )
+        ),
+        files=SimpleNamespace(
+            content=lambda file_id: SimpleNamespace(
+                write_to_file=lambda path: write_results(path, files[file_id])
+            )
+        ),
+    )
+    monkeypatch.setattr(enrichment, "_client", client)
+    paths = openai_batch.wait_for_batch("batch_1", tmp_path / "synthesis-001.out.jsonl")
+    assert [p.name for p in paths] == ["synthesis-001.out.jsonl", "synthesis-001.errors.jsonl"]
+    results = [r for p in paths for r in openai_batch.iter_batch_results(p)]
+    assert results == [("synthesis|0|Acme", "{}"), ("synthesis|0|Globex", None)]
+
+
+def test_company_missing_from_every_result_file_is_logged(tmp_path, companies_db):
+    con = companies_db(["Acme", "Globex"])
+    inputs = write_results(
+        tmp_path / "synthesis-001.jsonl",
+        [{"custom_id": "synthesis|0|Acme"}, {"custom_id": "synthesis|0|Globex"}],
+    )
+    output = write_results(
+        tmp_path / "synthesis-001.out.jsonl", [batch_result("synthesis|0|Acme", "{}")]
+    )
+    assert openai_batch.log_missing_results([inputs], [output]) == ["Globex"]
+    assert con.execute("SELECT company, error_message FROM api_errors_log").fetchall() == [
+        ("Globex", "No batch result returned")
+    ]
@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from src.clients import ratelimit
+from src.clients.ratelimit import AdaptiveConcurrency, RateLimiter, TokenBucket
+
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    response = httpx.Response(
+        429, headers=headers, request=httpx.Request("POST", "https://api.openai.com")
+    )
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_reservations_queue_up():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)  # one per second
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now = 10
+    assert bucket.reserve(1) == 0
+
+
+def test_backoff_honors_retry_after():
+    limiter = RateLimiter(backoff_base=0.01)
+    assert limiter.backoff(0, rate_limit_error(retry_after=7)) >= 7
+    assert limiter.backoff(3, rate_limit_error()) <= 0.08
+
+
+def test_call_retries_throttles_then_succeeds(monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda _: None)
+    limiter = RateLimiter(requests_per_minute=1e6, tokens_per_minute=1e9)
+    outcomes = [rate_limit_error(), rate_limit_error(), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert limiter.call(flaky, 10) == "ok"
+    assert limiter.throttled == 2
+
+
+def test_call_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda _: None)
+    limiter = RateLimiter(max_retries=2)
+    calls = []
+
+    def always_throttled():
+        calls.append(1)
+        raise rate_limit_error()
+
+    with pytest.raises(ratelimit.RetriesExhausted):
+        limiter.call(always_throttled, 10)
+    assert len(calls) == 3
+
+
+def test_non_retryable_errors_are_not_retried():
+    limiter = RateLimiter()
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.call(broken, 10)
+    assert len(calls) == 1
+
+
+def test_adaptive_concurrency_halves_on_throttle_and_recovers():
+    concurrency = AdaptiveConcurrency(8)
+    concurrency.on_throttle()
+    assert concurrency.limit == 4
+    concurrency.on_throttle()  # same burst, within the cooldown
+    assert concurrency.limit == 4
+    for _ in range(4):
+        concurrency.on_success()
+    assert concurrency.limit == 5
+
+
+def test_adaptive_concurrency_bounds_in_flight():
+    concurrency = AdaptiveConcurrency(2)
+    peak = 0
+
+    async def task():
+        nonlocal peak
+        async with concurrency:
+            peak = max(peak, concurrency.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(task() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
@@ -0,0 +1,100 @@
+import json
+
+from src.db.init import init_tables
+from src.db.summary import refresh_summaries
+from src.report import build_report, render_report
+
+
+def seed(con):
+    init_tables()
+    con.execute(
+        """
+        INSERT INTO processed_companies (company, industry, tags, company_processed) VALUES
+          ('Acme', 'Fintech', ['AI', 'Payments'], TRUE),
+          ('Globex', 'Fintech', ['AI'], TRUE),
+          ('Initech', 'SaaS', NULL, FALSE)
+        """
+    )
+    con.execute(
+        """
+        INSERT INTO send_log (contact_email, company, sent_at, delivery_status) VALUES
+          ('a@acme.com', 'Acme', current_timestamp - INTERVAL 30 DAY, 'sent'),
+          ('b@acme.com', 'Acme', current_timestamp, 'sent'),
+          ('c@globex.com', 'Globex', current_timestamp, 'bounced')
+        """
+    )
+    con.execute(
+        "INSERT INTO replies_log (contact_email, company, reply_type) VALUES ('a@acme.com', 'Acme', 'positive')"
+    )
+
+
+def test_report_reads_from_summaries(scout_db):
+    seed(scout_db)
+    refresh_summaries()
+    report = build_report()
+
+    assert report["companies"] == {"total": 3, "enriched": 2}
+    assert report["emails"] == {"sent_total": 2, "sent_this_week": 1}
+    assert report["response_rate"] == 0.5
+    assert report["top_tags"][0] == {"industry": "Fintech", "tag": "AI", "companies": 2}
+    assert json.loads(render_report(report, "json")) == report
+    assert "<h1>Scout report</h1>" in render_report(report, "html")
+    assert "Companies enriched:  2 / 3" in render_report(report)
+
+
+def test_incremental_refresh_only_adds_new_rows(scout_db):
+    seed(scout_db)
+    refresh_summaries()
+    assert refresh_summaries() == {"companies": 0, "sends": 0, "replies": 0}
+
+    scout_db.execute(
+        "INSERT INTO send_log (contact_email, company, delivery_status) VALUES ('d@acme.com', 'Acme', 'sent')"
+    )
+    scout_db.execute(
+        """
+        UPDATE processed_companies SET company_processed = TRUE, last_updated = current_timestamp + INTERVAL 1 SECOND
+        WHERE company = 'Initech'
+        """
+    )
+    scout_db.execute("DELETE FROM processed_companies WHERE company = 'Globex'")
+    counts = refresh_summaries()
+
+    assert counts["sends"] == 1 and counts["companies"] == 1
+    report = build_report()
+    assert report["emails"]["sent_total"] == 3
+    assert report["companies"] == {"total": 2, "enriched": 2}
+
+    # A full refresh rebuilds the same numbers from scratch
+    refresh_summaries(full_refresh=True)
+    assert build_report() == report
+
+
+def test_response_rate_counts_contacts_who_answered(scout_db):
+    seed(scout_db)
+    scout_db.execute(
+        """
+        INSERT INTO replies_log (contact_email, company, reply_type) VALUES
+          ('a@acme.com', 'Acme', 'neutral'),
+          ('b@acme.com', 'Acme', 'auto_reply'),
+          ('c@globex.com', 'Globex', 'bounce')
+        """
+    )
+    refresh_summaries()
+    report = build_report()
+    # Only a@acme.com answered, twice; the auto-reply and bounce don't count
+    assert report["response_rate"] == 0.5
+    assert report["replies"]["auto_reply"] == 1
+
+
+def test_backdated_sends_are_counted(scout_db):
+    seed(scout_db)
+    refresh_summaries()
+    # Written now, but sent before the newest send already counted
+    scout_db.execute(
+        """
+        INSERT INTO send_log (contact_email, company, sent_at, delivery_status)
+        VALUES ('e@acme.com', 'Acme', current_timestamp - INTERVAL 2 DAY, 'sent')
+        """
+    )
+    assert refresh_summaries()["sends"] == 1
+    assert build_report()["emails"]["sent_total"] == 3
@@ -0,0 +1,104 @@
+import pytest
+
+from src import main
+from src.clients import gsuite
+from src.db.init import init_tables
+from tests.fake_gspread import FakeGspreadClient
+
+
+@pytest.fixture
+def fake_sheets(monkeypatch):
+    client = FakeGspreadClient(
+        {
+            "Processed Companies": [["Company", "Summary"], ["Acme", "Rockets"], ["Globex"]],
+            "Company Research": [["Company", "Company Info"], ["Acme", "Founded 1949"]],
+        }
+    )
+    monkeypatch.setenv("SHEET_URL", "https://sheets.example/d/1")
+    monkeypatch.setattr(gsuite, "load_gcp_settings", lambda: "")
+    monkeypatch.setattr(gsuite, "_session", gsuite.SheetsSession(lambda: client))
+    init_tables()
+    return client
+
+
+def test_values_to_records_matches_get_all_records_shape():
+    records = gsuite.values_to_records([["Company", "Employees"], ["Acme", "12"], ["Globex"]])
+    assert records == [
+        {"Company": "Acme", "Employees": 12},
+        {"Company": "Globex", "Employees": ""},
+    ]
+
+
+def test_sync_opens_once_and_reads_both_worksheets_in_one_call(fake_sheets, scout_db):
+    results = main.sync_google_sheets_to_duckdb()
+
+    assert fake_sheets.calls == {"open": 1, "revision": 1, "metadata": 1, "batch_get": 1}
+    assert results["processed_companies"]["inserted"] == 2
+    assert results["company_research"]["inserted"] == 1
+    assert scout_db.execute(
+        "SELECT company, summary FROM processed_companies ORDER BY company"
+    ).fetchall() == [("Acme", "Rockets"), ("Globex", "")]
+
+
+def test_unchanged_revision_skips_download(fake_sheets):
+    main.sync_google_sheets_to_duckdb()
+    assert main.sync_google_sheets_to_duckdb() == {}
+    assert fake_sheets.calls["batch_get"] == 1
+
+
+def test_only_changed_worksheet_is_resynced(fake_sheets, scout_db):
+    main.sync_google_sheets_to_duckdb()
+    fake_sheets.touch()
+    assert main.sync_google_sheets_to_duckdb() == {}
+
+    fake_sheets.edit("Company Research", [["Company", "Company Info"], ["Acme", "Updated"]])
+    results = main.sync_google_sheets_to_duckdb()
+    assert list(results) == ["company_research"]
+    assert results["company_research"]["updated"] == 1
+    assert fake_sheets.calls["open"] == 1
+
+
+def test_force_resyncs_unchanged_sheet(fake_sheets):
+    main.sync_google_sheets_to_duckdb()
+    results = main.sync_google_sheets_to_duckdb(force=True)
+    assert set(results) == {"processed_companies", "company_research"}
+    assert results["processed_companies"] == {"inserted": 0, "updated": 0, "deleted": 0}
+
+
+def test_large_worksheet_is_streamed_in_pages(monkeypatch, scout_db):
+    rows = [["Company", "Summary"]] + [[f"Company {i:04d}", f"s{i}"] for i in range(2500)]
+    # A blank gap inside the data must not end the stream early
+    rows[1200:1300] = [[] for _ in range(100)]
+    rows.append(["Company 0001", "duplicate, later row wins"])
+    client = FakeGspreadClient(
+        {"Processed Companies": rows, "Company Research": [["Company"]]}, blank_rows=40
+    )
+    monkeypatch.setenv("SHEET_URL", "https://sheets.example/d/1")
+    monkeypatch.setattr(gsuite, "load_gcp_settings", lambda: "")
+    monkeypatch.setattr(gsuite, "_session", gsuite.SheetsSession(lambda: client))
+    init_tables()
+
+    pages = []
+    original_append = main.append_stage_chunk
+
+    def counting_append(table_name, data, offset=0):
+        pages.append(len(data))
+        return original_append(table_name, data, offset)
+
+    monkeypatch.setattr(main, "append_stage_chunk", counting_append)
+    results = main.sync_google_sheets_to_duckdb(page_size=500)
+
+    assert max(pages) <= 500
+    assert results["processed_companies"]["inserted"] == 2400
+    assert scout_db.execute(
+        "SELECT summary FROM processed_companies WHERE company = 'Company 0001'"
+    ).fetchone() == ("duplicate, later row wins",)
+    # Same content read in one piece hashes the same as the streamed pages
+    state = scout_db.execute(
+        "SELECT checksum FROM sheet_sync_state WHERE sheet_name = 'Processed Companies'"
+    ).fetchone()
+    assert state == (gsuite.values_checksum(rows),)
+    # No raw or staged rows are left behind in the session
+    assert scout_db.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE temporary"
+    ).fetchone() == (0,)
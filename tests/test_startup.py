@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold-start budget for `import src.cli`, in milliseconds
+IMPORT_BUDGET_MS = float(os.getenv("SCOUT_IMPORT_BUDGET_MS", 150))
+
+HEAVY_MODULES = {"openai", "gspread", "duckdb", "pyarrow", "google.oauth2"}
+
+
+def import_times(module: str) -> Dict[str, int]:
+    # Cumulative microseconds per imported module, from `python -X importtime`
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_stays_within_budget():
+    # Best of three runs to keep a busy machine from failing the check
+    cold_start_ms = min(import_times("src.cli")["src.cli"] for _ in range(3)) / 1000
+    assert cold_start_ms <= IMPORT_BUDGET_MS, (
+        f"import src.cli took {cold_start_ms:.1f}ms (budget {IMPORT_BUDGET_MS}ms)"
+    )
+
+
+def test_cli_import_does_not_load_clients():
+    loaded = HEAVY_MODULES & set(import_times("src.cli"))
+    assert not loaded, f"import src.cli eagerly loaded {sorted(loaded)}"
+
+
+def test_db_init_does_not_load_api_clients():
+    loaded = {"openai", "gspread"} & set(import_times("src.db.init"))
+    assert not loaded, f"import src.db.init eagerly loaded {sorted(loaded)}"
@@ -0,0 +1,147 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src import cli
+from src.clients import ratelimit
+from src.clients.ratelimit import RateLimiter, RetriesExhausted
+from src.db import insert, telemetry
+from src.db.init import init_tables
+from tests.test_ratelimit import rate_limit_error
+
+
+def completion(prompt_tokens, completion_tokens):
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+    return SimpleNamespace(usage=usage)
+
+
+def test_records_are_buffered_until_flush(scout_db, telemetry_recorder):
+    init_tables()
+    telemetry_recorder.record_api_call("sheets", "batch_get", 0.25)
+    telemetry_recorder.record_stage("sync", "fetch", 0.5, rows=10)
+    assert scout_db.execute("SELECT COUNT(*) FROM api_calls_log").fetchone() == (0,)
+
+    assert telemetry_recorder.flush() == 2
+    assert scout_db.execute(
+        "SELECT service, operation, duration_ms, outcome FROM api_calls_log"
+    ).fetchall() == [("sheets", "batch_get", 250.0, "ok")]
+    assert scout_db.execute("SELECT stage, step, rows FROM stage_timings").fetchall() == [
+        ("sync", "fetch", 10)
+    ]
+
+
+def test_due_batch_is_written_off_the_calling_thread():
+    flushed = []
+    recorder = telemetry.Telemetry(
+        flush_size=2,
+        sink=lambda calls, stages: flushed.append(threading.current_thread()),
+    )
+    recorder.record_stage("sync", "fetch", 0.1)
+    recorder.record_stage("sync", "insert", 0.1)
+    recorder.close(flush=False)
+    assert len(flushed) == 1
+    assert flushed[0] is not threading.current_thread()
+
+
+def test_flush_failure_drops_records_without_raising(telemetry_recorder):
+    # No tables yet: telemetry must never break the pipeline
+    telemetry_recorder.record_stage("sync", "fetch", 0.1)
+    assert telemetry_recorder.flush() == 0
+    assert telemetry_recorder.flush() == 0
+
+
+def test_rate_limiter_records_tokens_and_retries(monkeypatch, scout_db, telemetry_recorder):
+    init_tables()
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda _: None)
+    limiter = RateLimiter(requests_per_minute=1e6, tokens_per_minute=1e9, max_retries=1)
+    outcomes = [rate_limit_error(), completion(100, 20)]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def throttled():
+        raise rate_limit_error()
+
+    limiter.call(flaky, 10, operation="question", model="gpt-4o")
+    with pytest.raises(RetriesExhausted):
+        limiter.call(throttled, 10, operation="synthesis")
+    telemetry_recorder.flush()
+
+    assert scout_db.execute(
+        """
+        SELECT operation, model, prompt_tokens, completion_tokens, retries, outcome
+        FROM api_calls_log ORDER BY operation
+        """
+    ).fetchall() == [
+        ("question", "gpt-4o", 100, 20, 1, "ok"),
+        ("synthesis", None, 0, 0, 1, "error"),
+    ]
+
+
+def test_sync_records_each_delta_step(scout_db, telemetry_recorder):
+    init_tables()
+    insert.apply_incoming(
+        "company_research",
+        [{"Company": "Acme", "Company Info": "a", "Contact Info": ""}],
+    )
+    insert.apply_incoming(
+        "company_research",
+        [{"Company": "Beta", "Company Info": "b", "Contact Info": ""}],
+    )
+    telemetry_recorder.flush()
+
+    steps = dict(
+        scout_db.execute(
+            """
+            SELECT step, SUM(rows) FROM stage_timings
+            WHERE stage = 'sync.company_research' GROUP BY step
+            """
+        ).fetchall()
+    )
+    assert steps["stage_append"] == 2
+    assert steps["insert"] == 2
+    assert steps["delete"] == 1
+    assert steps["update"] == 0
+    assert "commit" in steps
+
+
+def test_summary_reports_percentiles_and_cost(scout_db, telemetry_recorder):
+    init_tables()
+    for ms in range(1, 101):
+        telemetry_recorder.record_api_call(
+            "openai",
+            "question",
+            ms / 1000,
+            model="gpt-4o",
+            prompt_tokens=10_000,
+            completion_tokens=1_000,
+        )
+    # Cache hits are counted but stay out of the latency percentiles
+    for _ in range(100):
+        telemetry_recorder.record_api_call(
+            "openai", "question", 0.0001, outcome="cache_hit", model="gpt-4o"
+        )
+    telemetry_recorder.flush()
+
+    (row,) = telemetry.summarize()["api_calls"]
+    assert row["calls"] == 200
+    assert row["cache_hits"] == 100
+    assert row["p50_ms"] == pytest.approx(50, abs=1)
+    assert row["p99_ms"] == pytest.approx(99, abs=1)
+    # 1M prompt tokens at $2.50 plus 100k completion tokens at $10 per 1M
+    assert row["cost_usd"] == pytest.approx(3.5)
+
+
+def test_stats_command_prints_summary(scout_db, telemetry_recorder, capsys):
+    telemetry_recorder.record_stage("enrichment", "write", 0.02, rows=5)
+    assert cli.main(["stats", "--since", "1"]) == 0
+    out = capsys.readouterr().out
+    assert "enrichment.write" in out
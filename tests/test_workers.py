@@ -0,0 +1,102 @@
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from src.clients import llm_cache, workers
+from src.db import jobs
+
+
+def statuses(con):
+    return dict(con.execute("SELECT company, status FROM enrichment_jobs").fetchall())
+
+
+def test_jobs_are_leased_once_and_retried_until_max_attempts(companies_db):
+    con = companies_db(["Acme", "Beta"])
+    assert jobs.enqueue_pending_companies(con) == 2
+    # Enqueueing again doesn't duplicate or reset open jobs
+    assert jobs.enqueue_pending_companies(con) == 0
+
+    first = jobs.lease_job(con, "w1")
+    second = jobs.lease_job(con, "w2")
+    assert {first, second} == {"Acme", "Beta"}
+    assert jobs.lease_job(con, "w3") is None
+
+    assert jobs.fail_job(con, first, "w1", "boom", max_attempts=2) == "pending"
+    # Only the lease holder can settle a job
+    assert jobs.fail_job(con, second, "w1", "boom", max_attempts=2) is None
+    assert jobs.lease_job(con, "w1") == first
+    assert jobs.fail_job(con, first, "w1", "boom again", max_attempts=2) == "failed"
+    assert jobs.lease_job(con, "w1") is None
+
+    assert jobs.enqueue_pending_companies(con, retry_failed=True) == 1
+    assert statuses(con)[first] == "pending"
+
+
+def test_expired_and_orphaned_leases_go_back_to_the_queue(companies_db):
+    con = companies_db(["Acme", "Beta"])
+    jobs.enqueue_pending_companies(con)
+    jobs.lease_job(con, "w1", lease_seconds=-1)
+    jobs.lease_job(con, "w2", lease_seconds=600)
+
+    assert [company for company, _ in jobs.expire_leases(con)] == ["Acme"]
+    assert statuses(con) == {"Acme": "pending", "Beta": "leased"}
+    assert jobs.release_leases(con) == [("Beta", "pending")]
+    assert jobs.job_counts(con)["pending"] == 2
+
+
+def test_job_results_complete_jobs_with_metadata(companies_db):
+    con = companies_db(["Acme"])
+    jobs.enqueue_pending_companies(con)
+    jobs.lease_job(con, "w1")
+    jobs.apply_job_results(con, [("Acme", {"summary": "Rockets", "tags": ["space"]})])
+
+    assert con.execute(
+        "SELECT summary, tags, company_processed FROM processed_companies"
+    ).fetchone() == ("Rockets", ["space"], True)
+    assert statuses(con) == {"Acme": "done"}
+
+    # A company reset to unprocessed gets its job back
+    con.execute("UPDATE processed_companies SET company_processed = FALSE")
+    assert jobs.enqueue_pending_companies(con) == 1
+
+
+def test_failed_job_results_leave_metadata_unwritten(monkeypatch, companies_db):
+    con = companies_db(["Acme"])
+    jobs.enqueue_pending_companies(con)
+    jobs.lease_job(con, "w1")
+
+    def broken(con, companies):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(jobs, "complete_jobs", broken)
+    with pytest.raises(RuntimeError):
+        jobs.apply_job_results(con, [("Acme", {"summary": "Rockets"})])
+    assert con.execute(
+        "SELECT summary, company_processed FROM processed_companies"
+    ).fetchone() == (None, False)
+    assert statuses(con) == {"Acme": "leased"}
+
+
+def test_worker_processes_enrich_through_the_coordinator(
+    monkeypatch, tmp_path, companies_db, telemetry_recorder
+):
+    con = companies_db(["Acme", "Beta", "Gamma"])
+    # A lease left behind by a coordinator that crashed mid-run
+    jobs.enqueue_pending_companies(con)
+    jobs.lease_job(con, "dead-coordinator")
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(path=tmp_path / "cache.db"))
+
+    with FakeOpenAIServer(latency=0) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        counts = workers.run_enrichment_workers(workers=2)
+
+    assert counts["done"] == 3 and counts["leased"] == 0
+    assert con.execute(
+        "SELECT COUNT(*) FROM processed_companies WHERE company_processed"
+    ).fetchone() == (3,)
+    # Six questions and a synthesis per company, stored by the coordinator
+    assert llm_cache.get_llm_cache().stats()["entries"] == 21
+    # Worker telemetry is shipped back and written with the coordinator's
+    telemetry_recorder.flush()
+    assert con.execute(
+        "SELECT COUNT(*) FROM api_calls_log WHERE service = 'openai'"
+    ).fetchone() == (21,)
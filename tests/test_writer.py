@@ -0,0 +1,79 @@
+import asyncio
+
+import duckdb
+import pytest
+
+from src.common.models import get_empty_enriched_company
+from src.db.writer import MetadataWriter, apply_metadata_batch, run_pipeline
+
+
+def enriched(summary, tags=()):
+    result = get_empty_enriched_company()
+    result["summary"] = summary
+    result["tags"] = list(tags)
+    return result
+
+
+def test_apply_metadata_batch_updates_all_rows(companies_db):
+    con = companies_db(["Acme", "Globex", "Initech"])
+    apply_metadata_batch(
+        con, [("Acme", enriched("a", ["AI", "SaaS"])), ("Globex", enriched("g"))]
+    )
+    rows = con.execute(
+        "SELECT company, summary, tags, company_processed FROM processed_companies ORDER BY company"
+    ).fetchall()
+    assert rows == [
+        ("Acme", "a", ["AI", "SaaS"], True),
+        ("Globex", "g", [], True),
+        ("Initech", None, None, False),
+    ]
+
+
+def test_writer_flushes_by_size_and_on_close(companies_db):
+    con = companies_db([f"C{i}" for i in range(5)])
+    with MetadataWriter(con, flush_size=2, flush_interval=3600) as writer:
+        for i in range(5):
+            writer.add(f"C{i}", enriched(str(i)))
+        assert writer.written == 4
+    assert writer.written == 5
+    (done,) = con.execute(
+        "SELECT COUNT(*) FROM processed_companies WHERE company_processed"
+    ).fetchone()
+    assert done == 5
+
+
+def test_failed_flush_keeps_buffer(companies_db):
+    con = companies_db(["Acme"])
+    writer = MetadataWriter(con, flush_size=10)
+    writer.add("Acme", enriched("a"))
+    con.execute("ALTER TABLE processed_companies RENAME TO renamed")
+    with pytest.raises(duckdb.Error):
+        writer.flush()
+    con.execute("ALTER TABLE renamed RENAME TO processed_companies")
+    assert writer.flush() == 1
+    writer.close()
+
+
+def test_pipeline_hands_results_and_errors_to_the_writer_task(companies_db):
+    con = companies_db(["Acme", "Globex", "Initech"])
+    failed = []
+
+    async def work(company):
+        if company == "Globex":
+            raise ValueError("boom")
+        await asyncio.sleep(0)
+        return enriched(company.lower())
+
+    def handle(company, result):
+        if isinstance(result, Exception):
+            failed.append(company)
+        else:
+            writer.add(company, result)
+
+    writer = MetadataWriter(con, flush_size=10, flush_interval=3600)
+    asyncio.run(run_pipeline(["Acme", "Globex", "Initech"], work, handle, writer, 2))
+    assert failed == ["Globex"]
+    assert writer.written == 2
+    assert con.execute(
+        "SELECT company FROM processed_companies WHERE company_processed ORDER BY company"
+    ).fetchall() == [("Acme",), ("Initech",)]